@@ -0,0 +1,235 @@
+# actuator.py
+"""
+Mouse output used by the gesture state machine.
+
+Backends perform the actual OS calls:
+  PyAutoGuiBackend  real cursor, no tween and no pyautogui.PAUSE sleep
+  RecordingBackend  keeps a list of applied actions (local stand-in for tests)
+
+ThreadedActuator puts a backend on its own thread: the frame loop only
+enqueues, queued moves collapse to the newest position and queued scrolls
+add up, so mouse calls never block frame processing. NullActuator only counts
+calls, for replaying and benchmarking the decision logic without a desktop.
+"""
+
+import threading
+import time
+from collections import deque
+
+
+# -----------------------------
+# Backends
+# -----------------------------
+class PyAutoGuiBackend:
+    def __init__(self):
+        import pyautogui
+        pyautogui.FAILSAFE = False
+        self.pyautogui = pyautogui
+        self.errors = 0
+
+    def screen_size(self):
+        return tuple(self.pyautogui.size())
+
+    def apply(self, action, args):
+        gui = self.pyautogui
+        try:
+            if action == "move_to":
+                gui.moveTo(args[0], args[1], _pause=False)
+            elif action == "scroll":
+                gui.scroll(args[0], _pause=False)
+            elif action == "click":
+                gui.click(_pause=False)
+            elif action == "double_click":
+                gui.doubleClick(_pause=False)
+            elif action == "right_click":
+                gui.rightClick(_pause=False)
+        except Exception as e:
+            self.errors += 1
+            if self.errors == 1:
+                print(f"[WARNING] Mouse action '{action}' failed: {e}")
+
+
+class RecordingBackend:
+    """Records (time, action, args) instead of touching the OS."""
+
+    def __init__(self, screen=(1920, 1080)):
+        self.screen = screen
+        self.actions = []
+        self.errors = 0
+
+    def screen_size(self):
+        return self.screen
+
+    def apply(self, action, args):
+        self.actions.append((time.perf_counter(), action, args))
+
+
+# -----------------------------
+# Threaded, coalescing actuator
+# -----------------------------
+class ThreadedActuator:
+    """
+    Same interface as NullActuator, applied by a worker thread.
+    Pending work is a sequence of motion segments separated by clicks. Within a
+    segment only the newest move is kept and scroll deltas are summed (both
+    counted as merged); a segment is applied as one move followed by one scroll.
+    If more than max_pending segments/clicks build up, the oldest click is
+    dropped together with the move that led to it (counted as dropped), so a
+    click never lands anywhere but where it was made; that segment's scroll
+    stays in front of the remaining clicks. Clicks that are applied keep their
+    order relative to moves.
+    """
+
+    def __init__(self, backend, max_pending=64):
+        self.backend = backend
+        self.max_pending = max_pending
+        self.screen = backend.screen_size()
+        self.counts = {"enqueued": 0, "applied": 0, "merged": 0, "dropped": 0}
+        self._pending = deque()     # [move or None, scroll total] lists, or click action names
+        self._busy = False
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="mouse-actuator", daemon=True)
+        self._thread.start()
+
+    def screen_size(self):
+        return self.screen
+
+    def move_to(self, x, y):
+        with self._cond:
+            segment = self._motion()
+            if segment[0] is not None:
+                self.counts["merged"] += 1
+            segment[0] = (x, y)
+            self._cond.notify()
+
+    def scroll(self, amount):
+        with self._cond:
+            segment = self._motion()
+            if segment[1]:
+                self.counts["merged"] += 1
+            segment[1] += amount
+            self._cond.notify()
+
+    def click(self):
+        self._put_click("click")
+
+    def double_click(self):
+        self._put_click("double_click")
+
+    def right_click(self):
+        self._put_click("right_click")
+
+    def _motion(self):
+        """Returns the open motion segment at the tail, creating one if needed (lock held)."""
+        self.counts["enqueued"] += 1
+        if self._pending and isinstance(self._pending[-1], list):
+            return self._pending[-1]
+        segment = [None, 0]
+        self._pending.append(segment)
+        self._trim()
+        return segment
+
+    def _put_click(self, action):
+        with self._cond:
+            self.counts["enqueued"] += 1
+            self._pending.append(action)
+            self._trim()
+            self._cond.notify()
+
+    def _trim(self):
+        pending = self._pending
+        while len(pending) > self.max_pending:
+            scroll = 0
+            if isinstance(pending[0], list):
+                move, scroll = pending.popleft()
+                if move is not None:
+                    self.counts["dropped"] += 1
+            pending.popleft()                          # the click that followed
+            self.counts["dropped"] += 1
+            if scroll:
+                if pending and isinstance(pending[0], list):
+                    pending[0][1] += scroll
+                else:
+                    pending.appendleft([None, scroll])
+
+    def _run(self):
+        apply = self.backend.apply
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending and self._closed:
+                    return
+                batch = list(self._pending)
+                self._pending.clear()
+                self._busy = True
+            applied = 0
+            for item in batch:
+                if isinstance(item, list):
+                    move, scroll = item
+                    if move is not None:
+                        apply("move_to", move)
+                        applied += 1
+                    if scroll:
+                        apply("scroll", (scroll,))
+                        applied += 1
+                else:
+                    apply(item, ())
+                    applied += 1
+            with self._cond:
+                self.counts["applied"] += applied
+                self._busy = False
+                self._cond.notify_all()
+
+    def flush(self, timeout=1.0):
+        """Waits until every pending event has been applied."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._busy:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout=1.0):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self.counts)
+        stats["errors"] = self.backend.errors
+        return stats
+
+
+# -----------------------------
+# No-op stand-in
+# -----------------------------
+class NullActuator:
+    """Discards every action and keeps per-action counts in `counts`."""
+
+    def __init__(self, screen=(1920, 1080)):
+        self.screen = screen
+        self.counts = {"move_to": 0, "click": 0, "double_click": 0, "right_click": 0, "scroll": 0}
+
+    def screen_size(self):
+        return self.screen
+
+    def move_to(self, x, y):
+        self.counts["move_to"] += 1
+
+    def click(self):
+        self.counts["click"] += 1
+
+    def double_click(self):
+        self.counts["double_click"] += 1
+
+    def right_click(self):
+        self.counts["right_click"] += 1
+
+    def scroll(self, amount):
+        self.counts["scroll"] += 1
@@ -0,0 +1,579 @@
+# benchmark.py
+"""
+Performance benchmarks for the whole pipeline, runnable without camera,
+microphone or desktop:
+
+  frame_source.*   SyntheticSource (and --video) read throughput
+  landmarks.*      Mediapipe-shaped result -> arrays -> HandFrame
+  gesture.*        GestureStateMachine decisions (synthetic stream, or --recording)
+  gui.*            per-frame menu rendering: backdrop, frosted panel, button, border, menu
+  voice.*          VoiceDesktopController.handle_command dispatch over a transcript corpus
+  desktop.*        window lookup by name with 10 / 100 / 500 open windows: event-fed
+                   WindowIndex vs rebuilding the table per lookup (the old EnumWindows shape)
+  explorer.*       "enumerate files" on a simulated 200-item Explorer tree (0.2 ms per UI call):
+                   fresh snapshot vs cached, and "click number N" from the shown snapshot
+  speech.*         getting a response ready to play: phrase cache hit, a template sentence
+                   joined from cached fragments, and (with pyttsx3) synthesizing it instead
+  intent.*         IntentRouter dispatch with 10 / 100 / 500 intents, vs a linear substring scan
+  voice_stream.*   phrase segmentation (EnergyVad) per 30 ms audio chunk
+  asr.*            offline recognition per utterance over WAV fixtures, with real-time
+                   factor and exact-match accuracy: grammar-constrained vs full vocabulary
+
+The asr fixtures are WAV files plus a transcripts.tsv ("file.wav<TAB>expected
+text") in --asr-fixtures (default fixtures/voice). Record your own, or render
+the transcript corpus with the local TTS voice:
+
+    python benchmark.py --make-asr-fixtures fixtures/voice
+
+The set committed in fixtures/voice is a placeholder made without a TTS
+voice: synthetic voiced bursts, one per syllable, timed like the transcript.
+It exercises decoding cost (mean time, real-time factor) on every checkout,
+but accuracy only means something after re-rendering or recording it.
+
+Results are written as JSON and compared against a stored baseline:
+
+    python benchmark.py --save-baseline bench_baseline.json
+    python benchmark.py --baseline bench_baseline.json --output bench.json
+
+A benchmark regresses when its mean time per op exceeds the baseline by more
+than --tolerance (default 20%); the exit code is 1 if anything regressed.
+Benchmarks whose dependencies are missing are reported as skipped.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import numpy as np
+
+DEFAULT_TRANSCRIPTS = [
+    "help",
+    "open app chrome",
+    "open notepad",
+    "open documents",
+    "open downloads",
+    "open this pc",
+    "type hello world",
+    "press control c",
+    "press alt f four",
+    "press enter",
+    "minimize window",
+    "maximize window",
+    "restore window",
+    "close window",
+    "close app notepad",
+    "refresh",
+    "back",
+    "forward",
+    "click number 3",
+    "enumerate files",
+    "what is the weather like",
+    "play some music",
+]
+
+
+# -----------------------------
+# Timing
+# -----------------------------
+def measure(fn, min_time=0.5, min_iters=20, max_iters=200000):
+    """Calls fn() repeatedly; returns per-call timing stats in milliseconds."""
+    fn()  # warm-up
+    samples = []
+    start = time.perf_counter()
+    while len(samples) < max_iters:
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+        if len(samples) >= min_iters and time.perf_counter() - start >= min_time:
+            break
+    samples.sort()
+    n = len(samples)
+    mean = sum(samples) / n
+    return {
+        "iterations": n,
+        "mean_ms": 1000 * mean,
+        "p50_ms": 1000 * samples[n // 2],
+        "p95_ms": 1000 * samples[min(n - 1, int(n * 0.95))],
+        "ops_per_sec": 1.0 / mean if mean > 0 else 0.0,
+    }
+
+
+def cycle(items):
+    """Returns a function that yields items round-robin on each call."""
+    state = {"i": 0}
+
+    def next_item():
+        item = items[state["i"] % len(items)]
+        state["i"] += 1
+        return item
+    return next_item
+
+
+# -----------------------------
+# Synthetic inputs
+# -----------------------------
+def synthetic_result(i, n_hands=2):
+    """Mediapipe-Hands-shaped result with n_hands moving hands."""
+    hands, info = [], []
+    for k, label in enumerate(("Right", "Left")[:n_hands]):
+        cx = 0.3 + 0.4 * k + 0.1 * math.sin(i * 0.05)
+        cy = 0.5 + 0.1 * math.cos(i * 0.04)
+        pts = [SimpleNamespace(x=cx + 0.01 * (j % 5), y=cy - 0.01 * (j // 5) + 0.005 * math.sin(i * 0.3 + j), z=0.0)
+               for j in range(21)]
+        hands.append(SimpleNamespace(landmark=pts))
+        info.append(SimpleNamespace(classification=[SimpleNamespace(label=label, score=0.95)]))
+    return SimpleNamespace(multi_hand_landmarks=hands, multi_handedness=info)
+
+
+def synthetic_hand_frames(n=600, w=1280, h=720):
+    from landmarks import HandFrame, LandmarkExtractor
+    extractor = LandmarkExtractor()
+    frames = []
+    for i in range(n):
+        handedness, scores, landmarks = extractor.extract(synthetic_result(i))
+        frames.append(HandFrame(handedness, landmarks, w, h, scores))
+    return frames
+
+
+# -----------------------------
+# Benchmarks
+# -----------------------------
+def bench_frame_sources(args):
+    from frame_source import SyntheticSource, VideoFileSource
+    results = {}
+    for w, h in ((640, 480), (1280, 720)):
+        src = SyntheticSource(w, h)
+        results[f"frame_source.synthetic_{w}x{h}"] = measure(src.read, args.min_time)
+    if args.video:
+        src = VideoFileSource(args.video, loop=True)
+        results["frame_source.video_file"] = measure(src.read, args.min_time)
+        src.release()
+    return results
+
+
+def bench_landmarks(args):
+    from landmarks import HandFrame, LandmarkExtractor
+    extractor = LandmarkExtractor()
+    inputs = cycle([synthetic_result(i) for i in range(64)])
+    extracted = extractor.extract(synthetic_result(0))
+    handedness, scores, landmarks = (a.copy() for a in extracted)
+    return {
+        "landmarks.extract_2_hands": measure(lambda: extractor.extract(inputs()), args.min_time),
+        "landmarks.hand_frame_2_hands": measure(lambda: HandFrame(handedness, landmarks, 1280, 720, scores),
+                                                args.min_time),
+    }
+
+
+def bench_gesture(args):
+    from actuator import NullActuator
+    from gesture_state import GestureStateMachine, ReplayClock
+    results = {}
+    clock = ReplayClock()
+    machine = GestureStateMachine(NullActuator(), clock=clock)
+    frames = synthetic_hand_frames()
+    state = {"i": 0}
+
+    def decide():
+        i = state["i"]
+        state["i"] += 1
+        clock.t = i / 30.0
+        machine.update(frames[i % len(frames)])
+    results["gesture.decide_2_hands"] = measure(decide, args.min_time)
+
+    if args.recording:
+        from landmark_stream import open_recording, replay
+        recording = open_recording(args.recording)
+        stats = replay(recording)
+        per_frame = stats["elapsed"] / max(1, stats["frames"])
+        results["gesture.replay_recording"] = {
+            "iterations": stats["frames"],
+            "mean_ms": 1000 * per_frame,
+            "p50_ms": 1000 * per_frame,
+            "p95_ms": 1000 * per_frame,
+            "ops_per_sec": stats["decisions_per_sec"],
+        }
+    return results
+
+
+def bench_gui(args):
+    import gui
+    from frame_source import SyntheticSource
+    from gui_layers import WorkBuffers
+    from menu import Menu
+    results = {}
+    for w, h in ((1280, 720), (1920, 1080)):
+        ok, frame = SyntheticSource(w, h).read()
+        center, (bx1, by1, bx2, by2) = gui.launch_button_rect(w, h)
+        tag = f"{h}p"
+        results[f"gui.backdrop_{tag}"] = measure(lambda: gui.draw_backdrop(frame.copy()), args.min_time)
+        results[f"gui.frosted_panel_{tag}"] = measure(
+            lambda: gui.draw_frosted_panel(frame.copy(), bx1 - 8, by1 - 8, bx2 + 8, by2 + 8, alpha=0.36), args.min_time)
+        results[f"gui.gradient_button_{tag}"] = measure(
+            lambda: gui.draw_gradient_round_button(frame.copy(), bx1, by1, bx2, by2, "LAUNCH", glow=1.0, scale=1.08),
+            args.min_time)
+        results[f"gui.neon_border_{tag}"] = measure(lambda: gui.draw_neon_border(frame.copy(), intensity=0.6),
+                                                    args.min_time)
+        menu = Menu()
+        renderer = gui.MenuRenderer(menu, w, h)
+        work = WorkBuffers()
+        hover_path = cycle([menu.hover(w * (0.2 + 0.6 * i / 60), h * 0.7) for i in range(60)])
+        target = frame.copy()
+
+        def menu_frame():
+            renderer.update(hover_path())
+            renderer.draw(target, work)
+        results[f"gui.menu_frame_{tag}"] = measure(menu_frame, args.min_time)
+    return results
+
+
+@contextmanager
+def _voice_dry_run(voice_os):
+    """Silences speech; desktop side effects go to the controller's SimulatedDesktop."""
+    saved = voice_os.speak
+    voice_os.speak = lambda *a, **k: None
+    try:
+        yield
+    finally:
+        voice_os.speak = saved
+
+
+def bench_voice(args):
+    import voice_os
+    from desktop import SimulatedDesktop
+    from explorer_snapshot import ExplorerSnapshots
+    transcripts = DEFAULT_TRANSCRIPTS
+    if args.transcripts:
+        with open(args.transcripts) as f:
+            transcripts = [line.strip().lower() for line in f if line.strip()]
+    controller = voice_os.VoiceDesktopController.__new__(voice_os.VoiceDesktopController)
+    controller.running = True
+    controller.overlay = None
+    controller.desktop = SimulatedDesktop()
+    controller.explorer = ExplorerSnapshots(controller.desktop)
+    next_text = cycle(transcripts)
+    try:
+        with _voice_dry_run(voice_os):
+            return {"voice.handle_command": measure(lambda: controller.handle_command(next_text()), args.min_time)}
+    finally:
+        controller.explorer.close()
+
+
+def synthetic_intents(n, seed=0):
+    """n distinct 'verb object' / 'verb object {slot}' command patterns."""
+    import random
+    rng = random.Random(seed)
+    verbs = ["open", "close", "show", "hide", "start", "stop", "play", "pause", "move", "switch", "mute", "find"]
+    nouns = [f"{a}{b}" for a in ("win", "tab", "doc", "app", "pane", "list", "file", "menu") for b in "abcdefghijklmnop"]
+    pairs = rng.sample([(v, o) for v in verbs for o in nouns], n)
+    return [f"{v} {o}" + (" {target}" if i % 3 == 0 else "") for i, (v, o) in enumerate(pairs)]
+
+
+def bench_intent(args):
+    from intent_router import IntentRouter
+    results = {}
+    for n in (10, 100, 500):
+        patterns = synthetic_intents(n)
+        router = IntentRouter()
+        for i, pattern in enumerate(patterns):
+            router.add(f"intent{i}", pattern, lambda **slots: True)
+        # spoken forms of every 10th intent, plus phrases no intent matches
+        utterances = [p.replace("{target}", "the report") for p in patterns[::max(1, n // 10)]]
+        utterances += ["what is the weather like", "play some music please"]
+        next_text = cycle(utterances)
+        results[f"intent.router_{n}"] = measure(lambda: router.match(next_text()), args.min_time)
+        if n == 500:
+            # the old handle_command shape: one substring test per command, in order
+            literals = [p.replace(" {target}", "") for p in patterns]
+
+            def linear():
+                text = next_text()
+                for literal in literals:
+                    if literal in text:
+                        return literal
+            results["intent.linear_500"] = measure(linear, args.min_time)
+    return results
+
+
+def bench_desktop(args):
+    from desktop import SimulatedDesktop, WindowIndex
+    results = {}
+    for n in (10, 100, 500):
+        desktop = SimulatedDesktop()
+        for i in range(n):
+            desktop.create_window(f"Document {i} - Notepad" if i % 10 == 0 else f"Window {i}", f"Class{i % 7}")
+        names = cycle(["notepad", "document 42", "calculator"])
+        state = {"i": 0}
+
+        def lookup_with_churn():
+            # a window opens and one closes between lookups, as on a live desktop
+            state["i"] += 1
+            hwnd = desktop.create_window(f"Transient {state['i']}", "Transient")
+            desktop.destroy_window(hwnd)
+            return desktop.find_windows(names())
+        results[f"desktop.find_window_{n}"] = measure(lookup_with_churn, args.min_time)
+        if n == 500:
+            rows = [(w.hwnd, w.title, w.class_name) for w in desktop.windows.values()]
+            index = WindowIndex()
+
+            def rescan():
+                index.reset(rows)
+                return index.find(names())
+            results["desktop.rescan_500"] = measure(rescan, args.min_time)
+    return results
+
+
+def bench_explorer(args):
+    from desktop import SimElement, SimulatedDesktop
+    from explorer_snapshot import ExplorerSnapshots
+    desktop = SimulatedDesktop()
+    items = [SimElement(f"file{i}.txt", "ListItem", (10 + 100 * (i % 10), 40 + 20 * (i // 10),
+                                                     100 + 100 * (i % 10), 58 + 20 * (i // 10)))
+             for i in range(200)]
+    tree = [SimElement("Navigation", "Pane", children=[SimElement("Tree", "Tree")]),
+            SimElement("Shell", "Pane", children=[SimElement("Items View", "List", children=items)])]
+    desktop.create_window("Downloads", "CabinetWClass", tree)
+    explorer = ExplorerSnapshots(desktop)
+    numbers = cycle([1, 17, 42, 60])
+    SimElement.delay = 0.0002
+    try:
+        def fresh():
+            explorer.invalidate()
+            return explorer.get().page(1)
+        results = {
+            "explorer.snapshot_fresh": measure(fresh, args.min_time),
+            "explorer.snapshot_cached": measure(lambda: explorer.get().page(1), args.min_time),
+        }
+        explorer.shown = explorer.get()
+        results["explorer.click_number"] = measure(lambda: explorer.current().item(numbers()), args.min_time)
+    finally:
+        SimElement.delay = 0.0
+        explorer.close()
+    return results
+
+
+def bench_voice_stream(args):
+    from voice_stream import EnergyVad
+    import numpy as np
+    sample_rate = 16000
+    t = np.arange(10 * sample_rate) / sample_rate
+    # 10 s of noise with a 300 Hz "phrase" in the middle of every 2 s
+    speech = (np.arange(len(t)) % (2 * sample_rate)) < sample_rate
+    signal = np.random.default_rng(0).normal(0, 80, len(t)) + speech * 6000 * np.sin(2 * np.pi * 300 * t)
+    pcm = signal.astype(np.int16).tobytes()
+    chunk = 2 * sample_rate * 30 // 1000
+    chunks = cycle([pcm[i:i + chunk] for i in range(0, len(pcm), chunk)])
+    vad = EnergyVad(sample_rate)
+    return {"voice_stream.vad_chunk": measure(lambda: vad.feed(chunks()), args.min_time)}
+
+
+ASR_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "voice")
+
+
+def load_asr_fixtures(directory):
+    from voice_stream import read_wav
+    path = os.path.join(directory, "transcripts.tsv")
+    if not os.path.exists(path):
+        raise ImportError(f"no ASR fixtures in {directory} (see --make-asr-fixtures)")
+    fixtures = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                name, expected = line.rstrip("\n").split("\t", 1)
+                samples, sample_rate = read_wav(os.path.join(directory, name))
+                fixtures.append((samples.tobytes(), sample_rate, len(samples) / sample_rate, expected))
+    return fixtures
+
+
+def bench_asr(args):
+    import voice_grammar
+    if voice_grammar.vosk is None:
+        raise ImportError("vosk is not installed")
+    fixtures = load_asr_fixtures(args.asr_fixtures)
+    recognizer = voice_grammar.GrammarRecognizer()
+    backends = {
+        "asr.grammar": recognizer.recognize,
+        "asr.full_vocabulary": lambda pcm, rate: voice_grammar.normalize(recognizer._decode(pcm, rate, False)),
+    }
+    results = {}
+    for name, recognize in backends.items():
+        recognize(*fixtures[0][:2])  # warm-up (decoder construction)
+        samples, correct, audio = [], 0, 0.0
+        for pcm, sample_rate, duration, expected in fixtures:
+            t0 = time.perf_counter()
+            text = recognize(pcm, sample_rate)
+            samples.append(time.perf_counter() - t0)
+            correct += text == voice_grammar.normalize(expected)
+            audio += duration
+        samples.sort()
+        n = len(samples)
+        mean = sum(samples) / n
+        results[name] = {
+            "iterations": n,
+            "mean_ms": 1000 * mean,
+            "p50_ms": 1000 * samples[n // 2],
+            "p95_ms": 1000 * samples[min(n - 1, int(n * 0.95))],
+            "ops_per_sec": 1.0 / mean if mean > 0 else 0.0,
+            "rtf": sum(samples) / audio,
+            "accuracy": correct / n,
+        }
+    return results
+
+
+def make_asr_fixtures(directory, transcripts):
+    """Renders each transcript to <directory>/NN.wav with pyttsx3 and writes transcripts.tsv."""
+    import pyttsx3
+    os.makedirs(directory, exist_ok=True)
+    engine = pyttsx3.init()
+    rows = []
+    for i, text in enumerate(transcripts):
+        name = f"{i:02d}.wav"
+        engine.save_to_file(text, os.path.join(directory, name))
+        rows.append(f"{name}\t{text}\n")
+    engine.runAndWait()
+    with open(os.path.join(directory, "transcripts.tsv"), "w") as f:
+        f.writelines(rows)
+    print(f"[INFO] Wrote {len(rows)} ASR fixtures to {directory}")
+
+
+def bench_speech(args):
+    import tempfile
+    from phrase_cache import PhraseCache, join_wavs
+    from speech_out import CachedEngine, NullEngine, WavPlayer
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        cache = PhraseCache(directory, templates=["Clicked number {n}"])
+        engine = CachedEngine(cache, NullEngine, WavPlayer(silent=True))
+        fragments = [engine.audio("Clicked number"), engine.audio("42")]
+        engine.audio("Window minimized.")
+        joined = os.path.join(directory, "joined.wav")
+        results["speech.cache_hit"] = measure(lambda: engine.audio("Window minimized."), args.min_time)
+        results["speech.template_join"] = measure(lambda: join_wavs(fragments, joined), args.min_time)
+        try:
+            from speech_out import Pyttsx3Engine
+            synthesizer = Pyttsx3Engine()
+        except Exception:
+            return results   # no TTS engine here: cache paths only
+        rendered = os.path.join(directory, "rendered.wav")
+        try:
+            results["speech.synthesize"] = measure(lambda: synthesizer.render("Window minimized.", rendered),
+                                                   args.min_time)
+        finally:
+            synthesizer.close()
+    return results
+
+
+SUITES = {
+    "frame_source": bench_frame_sources,
+    "landmarks": bench_landmarks,
+    "gesture": bench_gesture,
+    "gui": bench_gui,
+    "voice": bench_voice,
+    "intent": bench_intent,
+    "desktop": bench_desktop,
+    "explorer": bench_explorer,
+    "speech": bench_speech,
+    "voice_stream": bench_voice_stream,
+    "asr": bench_asr,
+}
+
+
+# -----------------------------
+# Baseline comparison
+# -----------------------------
+def compare(results, baseline, tolerance):
+    """Returns a list of (name, current_ms, baseline_ms, ratio, regressed)."""
+    rows = []
+    for name, cur in sorted(results.items()):
+        base = baseline.get(name)
+        if not base or "mean_ms" not in cur:
+            continue
+        ratio = cur["mean_ms"] / base["mean_ms"] if base["mean_ms"] else 1.0
+        rows.append((name, cur["mean_ms"], base["mean_ms"], ratio, ratio > 1.0 + tolerance))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Virtual World performance benchmarks")
+    parser.add_argument("--suites", nargs="+", choices=list(SUITES), default=list(SUITES))
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds per benchmark")
+    parser.add_argument("--video", default=None, help="video file for frame_source.video_file")
+    parser.add_argument("--recording", default=None, help="landmark recording (.npy) for gesture.replay_recording")
+    parser.add_argument("--transcripts", default=None, help="text file, one voice transcript per line")
+    parser.add_argument("--asr-fixtures", default=ASR_FIXTURES, help="WAV fixtures for the asr suite")
+    parser.add_argument("--make-asr-fixtures", default=None, metavar="DIR",
+                        help="render the transcripts to WAV fixtures with pyttsx3 and exit")
+    parser.add_argument("--output", default=None, help="write results JSON here")
+    parser.add_argument("--baseline", default=None, help="compare against this results JSON")
+    parser.add_argument("--save-baseline", default=None, help="write results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown vs baseline (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    if args.make_asr_fixtures:
+        transcripts = DEFAULT_TRANSCRIPTS
+        if args.transcripts:
+            with open(args.transcripts) as f:
+                transcripts = [line.strip().lower() for line in f if line.strip()]
+        make_asr_fixtures(args.make_asr_fixtures, transcripts)
+        return 0
+
+    results, skipped = {}, {}
+    for name in args.suites:
+        try:
+            results.update(SUITES[name](args))
+        except ImportError as e:
+            skipped[name] = str(e)
+            print(f"[WARNING] Skipping {name} benchmarks: {e}")
+
+    report = {
+        "timestamp": time.time(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "results": results,
+        "skipped": skipped,
+    }
+
+    print(f"{'benchmark':36s} {'mean ms':>9s} {'p95 ms':>9s} {'ops/s':>12s}")
+    for name, r in sorted(results.items()):
+        print(f"{name:36s} {r['mean_ms']:9.3f} {r['p95_ms']:9.3f} {r['ops_per_sec']:12.1f}")
+        if "rtf" in r:
+            print(f"{'':36s} real-time factor {r['rtf']:.3f}, accuracy {100 * r['accuracy']:.0f}%")
+
+    regressed = []
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get("results", {})
+        rows = compare(results, baseline, args.tolerance)
+        report["comparison"] = [
+            {"name": n, "mean_ms": c, "baseline_ms": b, "ratio": r, "regressed": bad} for n, c, b, r, bad in rows
+        ]
+        print(f"\n{'vs baseline':36s} {'ratio':>9s}")
+        for name, cur, base, ratio, bad in rows:
+            print(f"{name:36s} {ratio:9.2f}{'  REGRESSION' if bad else ''}")
+            if bad:
+                regressed.append(name)
+    elif args.baseline:
+        print(f"[WARNING] Baseline {args.baseline} not found; nothing to compare.")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[INFO] Saved baseline to {args.save_baseline}")
+
+    if regressed:
+        print(f"[ERROR] {len(regressed)} benchmark(s) regressed: {', '.join(regressed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,388 @@
+# camera_broker.py
+"""
+Camera broker: one process captures frames (and optionally runs hand
+detection) and publishes them into a multiprocessing.shared_memory ring, so
+the launch menu, the virtual mouse and any later consumer share a single
+capture instead of each reopening the camera.
+
+Layout of the shared block:
+    header    magic, width, height, slot count, state, latest sequence number
+    slot[i]   sequence number, capture time, landmark record, BGR frame
+
+Landmark records use landmark_stream.FRAME_DTYPE and are stored in mirrored
+(selfie) coordinates, exactly as gesture.detect_hands returns them; frames are
+stored as captured (not flipped), so consumers flip them as they always have.
+
+The writer zeroes a slot's sequence number before overwriting it and sets it
+to the new value afterwards; a reader that sees the number change (or zero)
+across its copy retries, so no locks are needed. Consumers read through
+SharedFrameSource (spec "shm:NAME" in frame_source.open_source).
+
+    python camera_broker.py --source synthetic:640x480 --no-detect
+"""
+
+import os
+import time
+
+import numpy as np
+
+from frame_source import FrameSource, open_source
+from landmark_stream import FRAME_DTYPE, to_hand_frame
+from landmarks import MAX_HANDS
+
+DEFAULT_NAME = "virtualnova-camera"
+MAGIC = 0x564E4342  # "VNCB"
+
+STATE_STARTING = 0
+STATE_RUNNING = 1
+STATE_STOPPED = 2
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "<u4"),
+    ("width", "<u4"),
+    ("height", "<u4"),
+    ("slots", "<u4"),
+    ("state", "<u4"),
+    ("epoch", "<u8"),        # creation time in ns; tells a restarted broker's block apart
+    ("seq", "<u8"),          # sequence number of the newest complete frame (0 = none yet)
+])
+
+SLOT_DTYPE = np.dtype([
+    ("seq", "<u8"),          # 0 while the slot is being written
+    ("t", "<f8"),            # time.time() at capture
+    ("detected", "u1"),      # 1 if `hands` holds a detection result for this frame
+    ("hands", FRAME_DTYPE),
+])
+
+ALIGN = 64
+
+_owned = set()  # names of the blocks created by this process
+
+
+def _aligned(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+# -----------------------------
+# Shared ring
+# -----------------------------
+class FrameRing:
+    """
+    Fixed-size ring of `slots` frames of width x height BGR in one named shared
+    memory block. create=True makes a new block (replacing a stale one left by a
+    crashed broker); create=False attaches to an existing block and reads the
+    geometry from its header.
+    """
+
+    def __init__(self, name=DEFAULT_NAME, width=None, height=None, slots=4, create=False):
+        from multiprocessing import shared_memory
+
+        if create:
+            size = self._size(width, height, slots)
+            try:
+                self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            except FileExistsError:
+                stale = shared_memory.SharedMemory(name=name)
+                stale.close()
+                stale.unlink()
+                self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            _owned.add(name)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            if name not in _owned:
+                _untrack(self.shm)
+        self.name = name
+        self.owner = create
+
+        self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self.shm.buf)
+        if create:
+            self.header["magic"] = MAGIC
+            self.header["width"] = width
+            self.header["height"] = height
+            self.header["slots"] = slots
+            self.header["state"] = STATE_STARTING
+            self.header["epoch"] = time.time_ns()
+            self.header["seq"] = 0
+        elif self.header["magic"] != MAGIC:
+            self.close()
+            raise ValueError(f"Shared memory block {name!r} is not a camera ring")
+
+        self.width = int(self.header["width"])
+        self.height = int(self.header["height"])
+        self.slots = int(self.header["slots"])
+        self.epoch = int(self.header["epoch"])
+        meta_offset = _aligned(HEADER_DTYPE.itemsize)
+        self.meta = np.ndarray((self.slots,), dtype=SLOT_DTYPE, buffer=self.shm.buf, offset=meta_offset)
+        frame_offset = _aligned(meta_offset + SLOT_DTYPE.itemsize * self.slots)
+        frame_bytes = _aligned(self.width * self.height * 3)
+        self.frames = []
+        for i in range(self.slots):
+            frame = np.ndarray((self.height, self.width, 3), dtype=np.uint8, buffer=self.shm.buf,
+                               offset=frame_offset + i * frame_bytes)
+            if not create:
+                frame.flags.writeable = False
+            self.frames.append(frame)
+
+    @staticmethod
+    def _size(width, height, slots):
+        return (_aligned(_aligned(HEADER_DTYPE.itemsize) + SLOT_DTYPE.itemsize * slots)
+                + slots * _aligned(width * height * 3))
+
+    @property
+    def latest(self):
+        return int(self.header["seq"])
+
+    @property
+    def state(self):
+        return int(self.header["state"])
+
+    def publish(self, frame, hand_frame=None, t=None):
+        """Writes one frame (and its landmarks.HandFrame, if detected) to the next slot."""
+        seq = self.latest + 1
+        i = seq % self.slots
+        meta = self.meta[i]
+        meta["seq"] = 0
+        np.copyto(self.frames[i], frame)
+        meta["t"] = time.time() if t is None else t
+        rec = meta["hands"]
+        if hand_frame is None:
+            meta["detected"] = 0
+            rec["n_hands"] = 0
+        else:
+            n = min(len(hand_frame), MAX_HANDS)
+            rec["t"] = meta["t"]
+            rec["width"] = hand_frame.w
+            rec["height"] = hand_frame.h
+            rec["n_hands"] = n
+            rec["handedness"][:n] = hand_frame.handedness[:n]
+            rec["score"][:n] = hand_frame.scores[:n]
+            rec["landmarks"][:n] = hand_frame.landmarks[:n]
+            meta["detected"] = 1
+        meta["seq"] = seq
+        self.header["seq"] = seq
+        return seq
+
+    def set_state(self, state):
+        self.header["state"] = state
+
+    def close(self):
+        # drop our views before closing; if a consumer still holds a frame view
+        # the mapping stays alive until that view is garbage collected
+        self.header = self.meta = None
+        self.frames = []
+        try:
+            self.shm.close()
+        except BufferError:
+            pass
+        if self.owner:
+            _owned.discard(self.name)
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _untrack(shm):
+    """
+    On POSIX, attaching registers the block with this process's resource
+    tracker, which would unlink it when a consumer exits. Only the broker
+    owns (and unlinks) the block.
+    """
+    if os.name != "posix":
+        return
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+
+# -----------------------------
+# Consumer side
+# -----------------------------
+class SharedFrameSource(FrameSource):
+    """
+    Reads the newest frame from a broker's FrameRing. read() blocks (polling)
+    until a frame newer than the last one read is published, returning a
+    read-only view into shared memory (zero-copy) or, if a writable buffer of
+    the right shape is passed, a copy in that buffer. A view stays valid until
+    the broker wraps around the ring (slots - 1 more frames); check with
+    is_current() or copy it if it must live longer. Frames that were published
+    and overwritten before this consumer got to them are counted in `skipped`.
+    If no frame arrives within read_timeout, read() returns (False, None) and
+    checks whether a restarted broker has replaced the block.
+    """
+
+    def __init__(self, name=DEFAULT_NAME, attach_timeout=5.0, read_timeout=1.0, poll=0.001):
+        self.ring = self._attach(name, attach_timeout)
+        super().__init__(fps=30.0, realtime=False)
+        self.read_timeout = read_timeout
+        self.poll = poll
+        self.last_seq = 0
+        self.skipped = 0
+        self._slot = None
+        self._hands = np.zeros((), dtype=FRAME_DTYPE)
+        self._detected = False
+
+    @staticmethod
+    def _attach(name, timeout):
+        deadline = time.perf_counter() + timeout
+        while True:
+            try:
+                return FrameRing(name)
+            except FileNotFoundError:
+                if time.perf_counter() >= deadline:
+                    raise
+                time.sleep(0.05)
+
+    def _read(self):
+        return self._read_into(None)
+
+    def _read_into(self, image):
+        ring = self.ring
+        deadline = time.perf_counter() + self.read_timeout
+        while True:
+            seq = ring.latest
+            if seq > self.last_seq:
+                i = seq % ring.slots
+                meta = ring.meta[i]
+                if meta["seq"] == seq:
+                    frame = ring.frames[i]
+                    if (image is not None and image.flags.writeable
+                            and image.shape == frame.shape and image.dtype == frame.dtype):
+                        np.copyto(image, frame)
+                        frame = image
+                    detected = bool(meta["detected"])
+                    if detected:
+                        self._hands[...] = meta["hands"]
+                    if meta["seq"] == seq:
+                        if self.last_seq and seq - self.last_seq > 1:
+                            self.skipped += seq - self.last_seq - 1
+                        self.last_seq = seq
+                        self._slot = i
+                        self._detected = detected
+                        return True, frame
+                continue  # overwritten while reading: take the newer frame
+            if ring.state == STATE_STOPPED:
+                self.eof = True
+                return False, None
+            if time.perf_counter() >= deadline:
+                self._reattach()
+                return False, None
+            time.sleep(self.poll)
+
+    def _reattach(self):
+        """After a read timeout: switch to a new block if the broker was restarted."""
+        try:
+            ring = FrameRing(self.ring.name)
+        except (FileNotFoundError, ValueError):
+            return False
+        if ring.epoch == self.ring.epoch:
+            ring.close()
+            return False
+        print(f"[INFO] Camera broker restarted; reattached to {ring.name!r}.")
+        self.ring.close()
+        self.ring = ring
+        self.last_seq = 0
+        self._slot = None
+        return True
+
+    def is_current(self):
+        """True while the view returned by the last read() has not been overwritten."""
+        return self._slot is not None and self.ring.meta[self._slot]["seq"] == self.last_seq
+
+    def hand_frame(self):
+        if not self._detected:
+            return None
+        return to_hand_frame(self._hands)
+
+    def is_opened(self):
+        return not self.eof
+
+    def release(self):
+        if self.ring.header is not None:
+            self.ring.close()
+
+
+# -----------------------------
+# Broker
+# -----------------------------
+def run_broker(source=None, name=DEFAULT_NAME, slots=4, detect=True,
+               stop_event=None, ready_event=None, report_every=10.0, heartbeat=None):
+    """
+    Captures from `source` (FrameSource or open_source spec; webcam by default)
+    and publishes every frame to the FrameRing `name` until the source runs out
+    or stop_event is set. detect=True also runs Mediapipe Hands (via
+    gesture.detect_hands, without flipping the frame) and publishes the
+    landmarks, so consumers skip their own detection. ready_event is set once
+    the ring exists and the first frame is published. heartbeat: optional
+    supervisor.Heartbeat, beaten per published frame (a frozen camera stops
+    the beats); its stop event is used if stop_event is not given.
+    """
+    if stop_event is None and heartbeat is not None:
+        stop_event = heartbeat.stop_event
+    source = open_source(source)
+    ok, frame = source.read()
+    if not ok:
+        source.release()
+        print("[ERROR] Camera broker: source returned no frames.")
+        return 0
+
+    detect_hands = None
+    buffers = {}
+    if detect:
+        try:
+            from gesture import detect_hands
+        except Exception as e:
+            print(f"[WARNING] Camera broker: hand detection unavailable ({e}); publishing frames only.")
+
+    h, w = frame.shape[:2]
+    ring = FrameRing(name, w, h, slots, create=True)
+    ring.set_state(STATE_RUNNING)
+    print(f"[INFO] Camera broker publishing {w}x{h} frames to shared memory {name!r}.")
+    published = 0
+    start = last_report = time.perf_counter()
+    try:
+        while ok:
+            t = time.time()
+            hand_frame = None
+            if detect_hands is not None:
+                _, hand_frame = detect_hands(frame, mirror=False, buffers=buffers)
+            ring.publish(frame, hand_frame, t)
+            published += 1
+            if heartbeat is not None:
+                heartbeat.beat(time.time() - t)
+            if published == 1 and ready_event is not None:
+                ready_event.set()
+            if stop_event is not None and stop_event.is_set():
+                break
+            if report_every and time.perf_counter() - last_report >= report_every:
+                last_report = time.perf_counter()
+                print(f"[INFO] Camera broker: {published} frames "
+                      f"({published / (last_report - start):.1f} FPS).")
+            ok, frame = source.read(frame)
+            while not ok and not source.eof and not (stop_event is not None and stop_event.is_set()):
+                ok, frame = source.read(frame)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ring.set_state(STATE_STOPPED)
+        source.release()
+        ring.close()
+    print(f"[INFO] Camera broker stopped after {published} frames.")
+    return published
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Publish camera frames and hand landmarks to shared memory")
+    parser.add_argument("--source", default=None,
+                        help="camera index, video file, image directory or synthetic[:WxH[:N]]")
+    parser.add_argument("--realtime", action="store_true",
+                        help="pace file/synthetic sources at their FPS instead of full speed")
+    parser.add_argument("--name", default=DEFAULT_NAME, help="shared memory block name")
+    parser.add_argument("--slots", type=int, default=4, help="frames kept in the ring")
+    parser.add_argument("--no-detect", action="store_true", help="publish frames only, no landmarks")
+    args = parser.parse_args()
+    source = open_source(args.source, realtime=args.realtime) if args.source else None
+    run_broker(source, name=args.name, slots=args.slots, detect=not args.no_detect)
@@ -0,0 +1,532 @@
+# desktop.py
+"""
+Desktop access for the voice assistant.
+
+Backends share one interface (windows, keyboard, mouse, launching, UI
+element trees):
+  Win32Desktop      win32gui / pywinauto / keyboard / pyautogui / os.startfile
+  SimulatedDesktop  windows, titles, classes, focus and UI element trees kept
+                    in memory; records every action (tests and benchmarks)
+
+Window lookups by name ("close app notepad") go through a WindowIndex: an
+in-memory table of top-level windows that is kept current by create /
+destroy / rename events (a SetWinEventHook thread on Windows, direct calls in
+the simulator), so a lookup no longer runs EnumWindows with two syscalls per
+window. Without the hook Win32Desktop falls back to a rescan per lookup.
+
+add_listener(callback) subscribes to changes that make cached UI state
+stale: callback(kind, hwnd) with kind "focus" (hwnd came to the
+foreground), "scroll" or "content" (something inside top-level window hwnd
+scrolled or was added / removed / reordered) and "destroyed".
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+
+# -----------------------------
+# Window index
+# -----------------------------
+class WindowIndex:
+    """
+    Lowercase title and class name of every top-level window, by handle.
+    find(name) returns the handles whose title or class contains `name`.
+    Answers for the last `cached` names are kept and updated with every
+    create / destroy / rename, so repeated lookups stay O(1) while windows
+    come and go; a new name costs one pass over the table.
+    """
+
+    def __init__(self, cached=64):
+        self.windows = {}        # hwnd -> (title, class name), lowercase
+        self.cached = cached
+        self._results = {}       # name -> {hwnd: None} (insertion-ordered set)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _matches(name, entry):
+        return name in entry[0] or name in entry[1]
+
+    def reset(self, windows):
+        """Replaces the table with (hwnd, title, class name) tuples."""
+        with self._lock:
+            self.windows = {hwnd: (title.lower(), cls.lower()) for hwnd, title, cls in windows}
+            self._results.clear()
+
+    def created(self, hwnd, title, cls):
+        with self._lock:
+            entry = self.windows[hwnd] = (title.lower(), cls.lower())
+            for name, found in self._results.items():
+                if self._matches(name, entry):
+                    found[hwnd] = None
+                else:
+                    found.pop(hwnd, None)
+
+    def renamed(self, hwnd, title):
+        with self._lock:
+            entry = self.windows.get(hwnd)
+            if entry is None or entry[0] == title.lower():
+                return
+            entry = self.windows[hwnd] = (title.lower(), entry[1])
+            for name, found in self._results.items():
+                if self._matches(name, entry):
+                    found[hwnd] = None
+                else:
+                    found.pop(hwnd, None)
+
+    def destroyed(self, hwnd):
+        with self._lock:
+            if self.windows.pop(hwnd, None) is not None:
+                for found in self._results.values():
+                    found.pop(hwnd, None)
+
+    def find(self, name):
+        name = name.lower()
+        with self._lock:
+            found = self._results.pop(name, None)
+            if found is None:
+                found = {hwnd: None for hwnd, entry in self.windows.items() if self._matches(name, entry)}
+                if len(self._results) >= self.cached:
+                    del self._results[next(iter(self._results))]   # least recently used
+            self._results[name] = found
+            return list(found)
+
+    def __len__(self):
+        return len(self.windows)
+
+
+# -----------------------------
+# Windows backend
+# -----------------------------
+EVENT_SYSTEM_FOREGROUND = 0x0003
+EVENT_SYSTEM_SCROLLINGEND = 0x0013
+EVENT_OBJECT_CREATE = 0x8000
+EVENT_OBJECT_DESTROY = 0x8001
+EVENT_OBJECT_REORDER = 0x8004
+EVENT_OBJECT_NAMECHANGE = 0x800C
+EVENT_OBJECT_CONTENTSCROLLED = 0x8015
+WINEVENT_OUTOFCONTEXT = 0x0000
+OBJID_WINDOW = 0
+GA_ROOT = 2
+WM_QUIT = 0x0012
+
+
+class _WinEventWatcher:
+    """
+    Feeds a WindowIndex and the desktop's listeners from SetWinEventHook
+    callbacks on its own message-loop thread.
+    """
+
+    def __init__(self, win32gui, index, listeners):
+        import ctypes
+        from ctypes import wintypes
+        self.ctypes = ctypes
+        self.wintypes = wintypes
+        self.win32gui = win32gui
+        self.index = index
+        self.listeners = listeners
+        self.alive = False
+        self.events = 0
+        self._thread_id = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="window-events", daemon=True)
+        self._thread.start()
+        self._ready.wait(2.0)
+
+    def _run(self):
+        ctypes, wintypes = self.ctypes, self.wintypes
+        user32 = ctypes.windll.user32
+        proc_type = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+                                       wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+        self._proc = proc_type(self._callback)   # keep a reference, or the callback is freed
+        hooks = [user32.SetWinEventHook(first, last, 0, self._proc, 0, 0, WINEVENT_OUTOFCONTEXT)
+                 for first, last in ((EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND),
+                                     (EVENT_SYSTEM_SCROLLINGEND, EVENT_SYSTEM_SCROLLINGEND),
+                                     (EVENT_OBJECT_CREATE, EVENT_OBJECT_DESTROY),
+                                     (EVENT_OBJECT_REORDER, EVENT_OBJECT_REORDER),
+                                     (EVENT_OBJECT_NAMECHANGE, EVENT_OBJECT_NAMECHANGE),
+                                     (EVENT_OBJECT_CONTENTSCROLLED, EVENT_OBJECT_CONTENTSCROLLED))]
+        self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+        self.alive = all(hooks)
+        self._ready.set()
+        if self.alive:
+            msg = wintypes.MSG()
+            while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+        for hook in hooks:
+            if hook:
+                user32.UnhookWinEvent(hook)
+        self.alive = False
+
+    def _notify(self, kind, hwnd):
+        for callback in self.listeners:
+            callback(kind, hwnd)
+
+    def _callback(self, hook, event, hwnd, id_object, id_child, thread, time_ms):
+        if not hwnd:
+            return
+        self.events += 1
+        window = id_object == OBJID_WINDOW and id_child == 0
+        try:
+            if event == EVENT_SYSTEM_FOREGROUND:
+                self._notify("focus", hwnd)
+                return
+            if event == EVENT_OBJECT_DESTROY and window:
+                # the handle is already invalid, so no ancestor lookup
+                if hwnd in self.index.windows:
+                    self.index.destroyed(hwnd)
+                    self._notify("destroyed", hwnd)
+                return
+            root = self.ctypes.windll.user32.GetAncestor(hwnd, GA_ROOT)
+            if window and root == hwnd and event in (EVENT_OBJECT_CREATE, EVENT_OBJECT_NAMECHANGE):
+                title = self.win32gui.GetWindowText(hwnd)
+                if event == EVENT_OBJECT_CREATE or hwnd not in self.index.windows:
+                    self.index.created(hwnd, title, self.win32gui.GetClassName(hwnd))
+                else:
+                    self.index.renamed(hwnd, title)
+            elif root and self.listeners:
+                scrolled = event in (EVENT_SYSTEM_SCROLLINGEND, EVENT_OBJECT_CONTENTSCROLLED)
+                self._notify("scroll" if scrolled else "content", root)
+        except Exception:
+            pass  # the window went away while we looked at it
+
+    def stop(self):
+        if self._thread_id is not None and self.alive:
+            self.ctypes.windll.user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+        self._thread.join(1.0)
+
+
+class Win32Desktop:
+    """The real desktop. watch=False disables the event hook (rescan per lookup)."""
+
+    def __init__(self, watch=True):
+        import keyboard
+        import pyautogui
+        import win32con
+        import win32gui
+        from pywinauto import Desktop
+        self.keyboard = keyboard
+        self.pyautogui = pyautogui
+        self.win32con = win32con
+        self.win32gui = win32gui
+        self.uia = Desktop
+        self.index = WindowIndex()
+        self.listeners = []
+        self.watcher = None
+        if watch:
+            try:
+                self.watcher = _WinEventWatcher(win32gui, self.index, self.listeners)
+            except Exception as e:
+                print(f"[WARNING] Window event hook unavailable ({e}); window lookups will rescan.")
+        # windows that existed before the hook was installed
+        self.index.reset(self._enum_windows())
+
+    def _enum_windows(self):
+        gui = self.win32gui
+        windows = []
+
+        def add(hwnd, _):
+            windows.append((hwnd, gui.GetWindowText(hwnd), gui.GetClassName(hwnd)))
+        gui.EnumWindows(add, None)
+        return windows
+
+    # windows
+    def foreground_window(self):
+        return self.win32gui.GetForegroundWindow()
+
+    def window_text(self, hwnd):
+        return self.win32gui.GetWindowText(hwnd)
+
+    def find_windows(self, name):
+        """Handles of top-level windows whose title or class contains `name`."""
+        if self.watcher is None or not self.watcher.alive:
+            self.index.reset(self._enum_windows())
+        return [hwnd for hwnd in self.index.find(name) if self.win32gui.IsWindow(hwnd)]
+
+    def _show(self, hwnd, command, label):
+        try:
+            self.win32gui.ShowWindow(hwnd, command)
+        except Exception as e:
+            print(f"{label} error", e)
+
+    def minimize(self, hwnd):
+        self._show(hwnd, self.win32con.SW_MINIMIZE, "minimize")
+
+    def maximize(self, hwnd):
+        self._show(hwnd, self.win32con.SW_MAXIMIZE, "maximize")
+
+    def restore(self, hwnd):
+        self._show(hwnd, self.win32con.SW_RESTORE, "restore")
+
+    def close(self, hwnd):
+        try:
+            self.win32gui.PostMessage(hwnd, self.win32con.WM_CLOSE, 0, 0)
+        except Exception as e:
+            print("close window error", e)
+
+    def ui_windows(self):
+        """Top-level UI Automation elements (pywinauto wrappers)."""
+        return self.uia(backend="uia").windows()
+
+    def add_listener(self, callback):
+        """callback(kind, hwnd) on focus / scroll / content / destroyed events (needs the hook)."""
+        self.listeners.append(callback)
+        return self.watcher is not None and self.watcher.alive
+
+    def thread_init(self):
+        """Run on every worker thread that touches UI elements (COM must be initialized there)."""
+        import ctypes
+        ctypes.windll.ole32.CoInitializeEx(None, 0)   # COINIT_MULTITHREADED
+
+    # input
+    def screen_size(self):
+        return tuple(self.pyautogui.size())
+
+    def press(self, key):
+        self.pyautogui.press(key)
+
+    def hotkey(self, *keys):
+        self.pyautogui.hotkey(*keys)
+
+    def type_text(self, text, interval=0.03):
+        self.pyautogui.typewrite(text, interval=interval)
+
+    def click(self, x, y):
+        self.pyautogui.click(x, y)
+
+    def send_keys(self, combo):
+        """keyboard-module combo such as 'alt+left'."""
+        self.keyboard.send(combo)
+
+    # launching
+    def start(self, path):
+        os.startfile(path)
+
+    def launch(self, name, wait=0.15):
+        """Press Windows key, type, press enter"""
+        self.pyautogui.press('win')
+        time.sleep(0.12)
+        self.pyautogui.typewrite(name, interval=0.03)
+        time.sleep(wait)
+        self.pyautogui.press('enter')
+
+    def close_backend(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+
+
+# -----------------------------
+# Simulated backend
+# -----------------------------
+class Rect:
+    def __init__(self, left, top, right, bottom):
+        self.left, self.top, self.right, self.bottom = left, top, right, bottom
+
+    def mid_point(self):
+        return (self.left + self.right) // 2, (self.top + self.bottom) // 2
+
+    def __repr__(self):
+        return f"Rect({self.left}, {self.top}, {self.right}, {self.bottom})"
+
+
+class SimElement:
+    """
+    A UI element with the part of pywinauto's wrapper API the assistant uses.
+    `delay` (seconds per call, class-wide) mimics UI Automation's cross-process calls.
+    """
+
+    delay = 0.0
+
+    def __init__(self, name="", control_type="Pane", rect=(0, 0, 0, 0), children=None, handle=None, pid=0,
+                 class_name=""):
+        self.name = name
+        self.control_type = control_type
+        self.class_name = class_name
+        self.rect = Rect(*rect)
+        self.children_list = list(children or [])
+        self.handle = handle
+        self.pid = pid
+        self.calls = 0            # element API calls, for traversal-cost checks
+
+    def _call(self):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+
+    def window_text(self):
+        self._call()
+        return self.name
+
+    def rectangle(self):
+        self._call()
+        return self.rect
+
+    def process_id(self):
+        return self.pid
+
+    def children(self, control_type=None):
+        self._call()
+        return [c for c in self.children_list if control_type is None or c.control_type == control_type]
+
+    def descendants(self, control_type=None):
+        self._call()
+        found = []
+        stack = list(reversed(self.children_list))
+        while stack:
+            element = stack.pop()
+            if control_type is None or element.control_type == control_type:
+                found.append(element)
+            stack.extend(reversed(element.children_list))
+        return found
+
+    def __repr__(self):
+        return f"SimElement({self.control_type} {self.name!r})"
+
+
+class SimWindow:
+    def __init__(self, hwnd, title, class_name, element):
+        self.hwnd = hwnd
+        self.title = title
+        self.class_name = class_name
+        self.state = "normal"
+        self.element = element
+
+
+class SimulatedDesktop:
+    """
+    In-memory desktop. create_window / destroy_window / rename_window / focus /
+    scroll / set_content change it and raise the same events the Windows hook
+    delivers (window index and listeners); every input or window action is
+    appended to `actions` as (action, args).
+    """
+
+    def __init__(self, screen=(1920, 1080), max_actions=10000):
+        self.screen = screen
+        self.windows = {}
+        self.z_order = []                 # hwnds, foreground last
+        self.index = WindowIndex()
+        self.listeners = []
+        self.actions = deque(maxlen=max_actions)
+        self._next_hwnd = 0x10000
+
+    def _notify(self, kind, hwnd):
+        for callback in self.listeners:
+            callback(kind, hwnd)
+
+    # simulation controls
+    def create_window(self, title, class_name="", elements=None, pid=0):
+        """Adds and focuses a top-level window; elements: its UI children (SimElement)."""
+        hwnd = self._next_hwnd
+        self._next_hwnd += 4
+        element = SimElement(title, "Window", (0, 0) + self.screen, elements, handle=hwnd, pid=pid,
+                             class_name=class_name)
+        self.windows[hwnd] = SimWindow(hwnd, title, class_name, element)
+        self.z_order.append(hwnd)
+        self.index.created(hwnd, title, class_name)
+        self._notify("focus", hwnd)
+        return hwnd
+
+    def destroy_window(self, hwnd):
+        if self.windows.pop(hwnd, None) is not None:
+            self.z_order.remove(hwnd)
+            self.index.destroyed(hwnd)
+            self._notify("destroyed", hwnd)
+
+    def rename_window(self, hwnd, title):
+        window = self.windows[hwnd]
+        window.title = title
+        window.element.name = title
+        self.index.renamed(hwnd, title)
+
+    def focus(self, hwnd):
+        self.z_order.remove(hwnd)
+        self.z_order.append(hwnd)
+        self._notify("focus", hwnd)
+
+    def scroll(self, hwnd, dy):
+        """Moves every element inside the window up by dy pixels."""
+        for element in self.windows[hwnd].element.descendants():
+            r = element.rect
+            r.top, r.bottom = r.top - dy, r.bottom - dy
+        self._notify("scroll", hwnd)
+
+    def set_content(self, hwnd, elements):
+        """Replaces the window's UI children."""
+        self.windows[hwnd].element.children_list = list(elements)
+        self._notify("content", hwnd)
+
+    # windows
+    def foreground_window(self):
+        return self.z_order[-1] if self.z_order else 0
+
+    def window_text(self, hwnd):
+        window = self.windows.get(hwnd)
+        return window.title if window else ""
+
+    def find_windows(self, name):
+        return self.index.find(name)
+
+    def _set_state(self, hwnd, state):
+        self.actions.append((state, (hwnd,)))
+        if hwnd in self.windows:
+            self.windows[hwnd].state = state
+
+    def minimize(self, hwnd):
+        self._set_state(hwnd, "minimized")
+
+    def maximize(self, hwnd):
+        self._set_state(hwnd, "maximized")
+
+    def restore(self, hwnd):
+        self._set_state(hwnd, "normal")
+
+    def close(self, hwnd):
+        self.actions.append(("close", (hwnd,)))
+        self.destroy_window(hwnd)
+
+    def ui_windows(self):
+        return [self.windows[hwnd].element for hwnd in reversed(self.z_order)]
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+        return True
+
+    def thread_init(self):
+        pass
+
+    # input
+    def screen_size(self):
+        return self.screen
+
+    def press(self, key):
+        self.actions.append(("press", (key,)))
+
+    def hotkey(self, *keys):
+        self.actions.append(("hotkey", keys))
+
+    def type_text(self, text, interval=0.03):
+        self.actions.append(("type", (text,)))
+
+    def click(self, x, y):
+        self.actions.append(("click", (x, y)))
+
+    def send_keys(self, combo):
+        self.actions.append(("send_keys", (combo,)))
+
+    # launching
+    def start(self, path):
+        self.actions.append(("start", (path,)))
+
+    def launch(self, name, wait=0.15):
+        """Opens (or focuses) a window titled `name`, like a Start-menu search."""
+        self.actions.append(("launch", (name,)))
+        found = [hwnd for hwnd in self.z_order if self.windows[hwnd].title == name]
+        if found:
+            self.focus(found[0])
+        else:
+            self.create_window(name, name.replace(" ", ""))
+
+    def close_backend(self):
+        pass
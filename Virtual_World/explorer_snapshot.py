@@ -0,0 +1,245 @@
+# explorer_snapshot.py
+"""
+Cached snapshots of the items in a File Explorer window.
+
+Walking the UI Automation tree is slow: every element call is a cross-process
+round trip. The voice assistant used to walk the whole Explorer window
+(descendants() of every List / DataGrid) for "enumerate files", stopped at 60
+items, and walked it all again for every "click number N".
+
+ExplorerSnapshots keeps one Snapshot per Explorer window handle:
+  - the tree is searched breadth-first, a level at a time, down to max_depth,
+    stopping at the first level that contains List / DataGrid controls; their
+    ListItems are collected below them the same way (through the Group
+    elements of grouped views). Each level's children() calls and the
+    per-item name / rectangle lookups run on a small thread pool;
+  - items are resolved a page (page_size items) at a time, so a folder with
+    hundreds of entries costs one page up front and the rest on demand;
+  - the desktop backend's focus / scroll / content / destroyed events drop the
+    snapshot of the window they concern, and only then is the tree walked again.
+
+"click number N" resolves N from the snapshot shown in the overlay.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+LIST_TYPES = ("List", "DataGrid")
+ITEM_TYPE = "ListItem"
+EXPLORER_CLASS = "CabinetWClass"   # top-level window class of File Explorer
+
+
+def _control_type(element):
+    info = getattr(element, "element_info", None)   # pywinauto wrappers
+    return info.control_type if info is not None else element.control_type
+
+
+def _class_name(element):
+    info = getattr(element, "element_info", None)
+    return info.class_name if info is not None else element.class_name
+
+
+def _children(element):
+    try:
+        return element.children()
+    except Exception:
+        return []
+
+
+def _resolve(element):
+    """(name, (center_x, center_y)) of one item, or None if it has no usable rectangle."""
+    try:
+        rect = element.rectangle()
+        if rect.right <= rect.left or rect.bottom <= rect.top:
+            return None
+        return element.window_text(), ((rect.left + rect.right) // 2, (rect.top + rect.bottom) // 2)
+    except Exception:
+        return None
+
+
+def find_explorer_window(desktop):
+    """
+    The File Explorer window to enumerate: the foreground one if it is an
+    Explorer window, otherwise the first Explorer-like top-level window.
+    """
+    foreground = desktop.foreground_window()
+    win = None
+    for w in desktop.ui_windows():
+        try:
+            if _class_name(w) == EXPLORER_CLASS or 'explorer' in w.window_text().lower():
+                # choose the one that matches foreground if possible
+                if w.handle == foreground:
+                    return w
+                # fallback: use the first explorer-like window
+                if win is None:
+                    win = w
+        except Exception:
+            continue
+    return win
+
+
+class Snapshot:
+    """
+    The items of one Explorer window as enumerated at one point in time.
+    Item numbers start at 1; page(p) resolves and returns items
+    (p - 1) * page_size + 1 ... p * page_size as (number, name, (x, y)).
+    `valid` turns False when a desktop event makes the snapshot stale.
+    """
+
+    def __init__(self, hwnd, elements, page_size, pool):
+        self.hwnd = hwnd
+        self.elements = elements
+        self.page_size = page_size
+        self.pool = pool
+        self.valid = True
+        self._resolved = [None] * len(elements)
+        self._done = [False] * len(elements)
+
+    def __len__(self):
+        return len(self.elements)
+
+    @property
+    def pages(self):
+        return max(1, -(-len(self.elements) // self.page_size))
+
+    def _fill(self, start, stop):
+        todo = [i for i in range(start, stop) if not self._done[i]]
+        for i, item in zip(todo, self.pool.map(_resolve, [self.elements[i] for i in todo])):
+            self._resolved[i] = item
+            self._done[i] = True
+
+    def page(self, number):
+        start = (number - 1) * self.page_size
+        stop = min(len(self.elements), start + self.page_size)
+        self._fill(start, stop)
+        return [(i + 1,) + self._resolved[i] for i in range(start, stop) if self._resolved[i] is not None]
+
+    def item(self, number):
+        """(name, (x, y)) of item `number`, or None if out of range or not on screen."""
+        if not 1 <= number <= len(self.elements):
+            return None
+        self._fill(number - 1, number)
+        return self._resolved[number - 1]
+
+
+class ExplorerSnapshots:
+    """
+    Snapshot cache for a desktop.py backend. get() returns the cached
+    snapshot of the current Explorer window, or takes a new one;
+    `shown` / `shown_page` are what the overlay currently displays.
+    """
+
+    def __init__(self, desktop, page_size=60, max_depth=6, workers=4):
+        self.desktop = desktop
+        self.page_size = page_size
+        self.max_depth = max_depth
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="explorer",
+                                       initializer=desktop.thread_init)
+        self.snapshots = {}
+        self._changes = {}        # hwnd -> number of events seen, to catch changes during a walk
+        self.shown = None
+        self.shown_page = 1
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # without events nothing could tell us a snapshot went stale
+        self.events = desktop.add_listener(self._on_event)
+
+    def _on_event(self, kind, hwnd):
+        with self._lock:
+            self._changes[hwnd] = self._changes.get(hwnd, 0) + 1
+            snapshot = self.snapshots.pop(hwnd, None)
+        if snapshot is not None:
+            snapshot.valid = False
+
+    def invalidate(self):
+        with self._lock:
+            snapshots, self.snapshots = self.snapshots, {}
+        for snapshot in snapshots.values():
+            snapshot.valid = False
+
+    def get(self):
+        """Snapshot of the current Explorer window, or None if there is none."""
+        win = find_explorer_window(self.desktop)
+        if win is None:
+            return None
+        with self._lock:
+            snapshot = self.snapshots.get(win.handle) if self.events else None
+            changes = self._changes.get(win.handle, 0)
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+        self.misses += 1
+        snapshot = Snapshot(win.handle, self._items(win), self.page_size, self.pool)
+        with self._lock:
+            if self._changes.get(win.handle, 0) == changes:
+                self.snapshots[win.handle] = snapshot
+            else:
+                snapshot.valid = False   # changed while we walked it: use once, do not cache
+        return snapshot
+
+    def current(self):
+        """The snapshot shown in the overlay if it is still valid, else a fresh one."""
+        if self.shown is not None and self.shown.valid:
+            self.hits += 1
+            return self.shown
+        return self.get()
+
+    def _items(self, win):
+        lists = self._find_lists(win)
+        if not lists:
+            # no list control within max_depth: items straight under the window
+            try:
+                return win.descendants(control_type=ITEM_TYPE)
+            except Exception:
+                return []
+        return self._list_items(lists)
+
+    def _list_items(self, lists):
+        """
+        ListItems under `lists` in document order. Grouped views (Downloads
+        groups by date) put them under Group elements, so non-item children
+        are descended into, level by level, down to max_depth.
+        """
+        found = []                                  # (position path, item)
+        frontier = [((i,), element) for i, element in enumerate(lists)]
+        for _ in range(self.max_depth):
+            deeper = []
+            for (path, _), children in zip(frontier, self.pool.map(_children, [e for _, e in frontier])):
+                for j, child in enumerate(children):
+                    try:
+                        kind = _control_type(child)
+                    except Exception:
+                        continue
+                    if kind == ITEM_TYPE:
+                        found.append((path + (j,), child))
+                    else:
+                        deeper.append((path + (j,), child))
+            if not deeper:
+                break
+            frontier = deeper
+        found.sort(key=lambda entry: entry[0])
+        return [item for _, item in found]
+
+    def _find_lists(self, win):
+        """List / DataGrid controls at the shallowest depth (<= max_depth) that has any."""
+        frontier = [win]
+        for _ in range(self.max_depth):
+            lists, deeper = [], []
+            for children in self.pool.map(_children, frontier):
+                for child in children:
+                    try:
+                        kind = _control_type(child)
+                    except Exception:
+                        continue
+                    if kind in LIST_TYPES:
+                        lists.append(child)
+                    elif kind != ITEM_TYPE:
+                        deeper.append(child)
+            if lists or not deeper:
+                return lists
+            frontier = deeper
+        return []
+
+    def close(self):
+        self.pool.shutdown(wait=False)
@@ -0,0 +1,298 @@
+# filters.py
+"""
+Cursor filters for the virtual mouse, plus an offline evaluator.
+
+Each axis gets its own filter instance, so x and y can be tuned separately:
+
+    cursor_filter = make_cursor_filter("one_euro:min_cutoff=0.8,beta=0.02,y.beta=0.03")
+    sx, sy = cursor_filter(target_x, target_y, t)
+
+Available filters:
+  exponential  fixed blend toward the target (the original smooth_factor behaviour)
+  one_euro     One-Euro filter: low cutoff at rest (no jitter), higher when moving (low lag)
+  kalman       constant-velocity Kalman filter, optionally leading by `lead` seconds
+  predictive   One-Euro output extrapolated `lead` seconds along its velocity
+
+The evaluator replays recorded landmark streams (landmark_stream.py), feeds the
+raw cursor targets through each filter and scores lag and jitter:
+
+    python filters.py evaluate session.npy --filters exponential one_euro kalman predictive
+"""
+
+import json
+import math
+
+import numpy as np
+
+
+# -----------------------------
+# Per-axis filters
+# -----------------------------
+class AxisFilter:
+    """Base class: filter(value, t) -> filtered value. Restarts after gaps longer than max_gap."""
+
+    def __init__(self, max_gap=0.5):
+        self.max_gap = max_gap
+        self.t_prev = None
+
+    def filter(self, value, t):
+        if self.t_prev is None or t - self.t_prev > self.max_gap or t <= self.t_prev:
+            out = self.start(value)
+        else:
+            out = self.step(value, t - self.t_prev)
+        self.t_prev = t
+        return out
+
+    def reset(self):
+        self.t_prev = None
+
+    def start(self, value):
+        raise NotImplementedError
+
+    def step(self, value, dt):
+        raise NotImplementedError
+
+
+class ExponentialFilter(AxisFilter):
+    def __init__(self, smooth_factor=0.5, **kwargs):
+        super().__init__(**kwargs)
+        self.smooth_factor = smooth_factor
+        self.value = 0.0
+
+    def start(self, value):
+        self.value = value
+        return value
+
+    def step(self, value, dt):
+        self.value += (value - self.value) * self.smooth_factor
+        return self.value
+
+
+def _alpha(cutoff, dt):
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter(AxisFilter):
+    """Casiez et al. 1-Euro filter. Units: cutoffs in Hz, beta per (px/s)."""
+
+    def __init__(self, min_cutoff=1.0, beta=0.01, d_cutoff=1.0, **kwargs):
+        super().__init__(**kwargs)
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.value = 0.0
+        self.velocity = 0.0
+
+    def start(self, value):
+        self.value = value
+        self.velocity = 0.0
+        return value
+
+    def step(self, value, dt):
+        raw_velocity = (value - self.value) / dt
+        a_d = _alpha(self.d_cutoff, dt)
+        self.velocity += (raw_velocity - self.velocity) * a_d
+        cutoff = self.min_cutoff + self.beta * abs(self.velocity)
+        self.value += (value - self.value) * _alpha(cutoff, dt)
+        return self.value
+
+
+class KalmanFilter(AxisFilter):
+    """
+    Constant-velocity Kalman filter on [position, velocity].
+    process_noise: acceleration variance ((px/s^2)^2); measurement_noise: px^2.
+    lead > 0 outputs the state predicted that many seconds ahead.
+    """
+
+    def __init__(self, process_noise=5e5, measurement_noise=16.0, lead=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.q = process_noise
+        self.r = measurement_noise
+        self.lead = lead
+        self.x = 0.0
+        self.v = 0.0
+        self.p = [[measurement_noise, 0.0], [0.0, 1e6]]
+
+    def start(self, value):
+        self.x, self.v = value, 0.0
+        self.p = [[self.r, 0.0], [0.0, 1e6]]
+        return value
+
+    def step(self, value, dt):
+        # predict
+        x = self.x + self.v * dt
+        v = self.v
+        (p00, p01), (p10, p11) = self.p
+        dt2, dt3, dt4 = dt * dt, dt ** 3, dt ** 4
+        p00 = p00 + dt * (p10 + p01) + dt2 * p11 + self.q * dt4 / 4
+        p01 = p01 + dt * p11 + self.q * dt3 / 2
+        p10 = p10 + dt * p11 + self.q * dt3 / 2
+        p11 = p11 + self.q * dt2
+        # update
+        s = p00 + self.r
+        k0, k1 = p00 / s, p10 / s
+        innovation = value - x
+        self.x = x + k0 * innovation
+        self.v = v + k1 * innovation
+        self.p = [[(1 - k0) * p00, (1 - k0) * p01],
+                  [p10 - k1 * p00, p11 - k1 * p01]]
+        return self.x + self.v * self.lead
+
+
+class PredictiveFilter(AxisFilter):
+    """Smooths with a One-Euro filter, then extrapolates `lead` seconds along the smoothed velocity."""
+
+    def __init__(self, lead=0.03, min_cutoff=1.0, beta=0.01, d_cutoff=1.0, **kwargs):
+        super().__init__(**kwargs)
+        self.lead = lead
+        self.inner = OneEuroFilter(min_cutoff=min_cutoff, beta=beta, d_cutoff=d_cutoff)
+
+    def start(self, value):
+        return self.inner.start(value)
+
+    def step(self, value, dt):
+        value = self.inner.step(value, dt)
+        return value + self.inner.velocity * self.lead
+
+
+FILTERS = {
+    "exponential": ExponentialFilter,
+    "one_euro": OneEuroFilter,
+    "kalman": KalmanFilter,
+    "predictive": PredictiveFilter,
+}
+
+
+# -----------------------------
+# Two-axis cursor filter
+# -----------------------------
+class CursorFilter:
+    def __init__(self, x_filter, y_filter, name=""):
+        self.x_filter = x_filter
+        self.y_filter = y_filter
+        self.name = name
+
+    def __call__(self, x, y, t):
+        return self.x_filter.filter(x, t), self.y_filter.filter(y, t)
+
+    def reset(self):
+        self.x_filter.reset()
+        self.y_filter.reset()
+
+
+def _parse_value(text):
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def make_cursor_filter(spec="exponential", x=None, y=None):
+    """
+    Builds a CursorFilter from "name" or "name:key=value,...". Keys prefixed with
+    "x." or "y." apply to one axis only; x / y dicts override further.
+    """
+    if isinstance(spec, CursorFilter):
+        return spec
+    name, _, params = spec.partition(":")
+    if name not in FILTERS:
+        raise ValueError(f"Unknown cursor filter '{name}' (choose from {', '.join(FILTERS)})")
+    common, per_axis = {}, {"x": {}, "y": {}}
+    for item in filter(None, params.split(",")):
+        key, _, value = item.partition("=")
+        axis, dot, key_name = key.partition(".")
+        if dot and axis in per_axis:
+            per_axis[axis][key_name] = _parse_value(value)
+        else:
+            common[key] = _parse_value(value)
+    x_params = dict(common, **per_axis["x"], **(x or {}))
+    y_params = dict(common, **per_axis["y"], **(y or {}))
+    cls = FILTERS[name]
+    return CursorFilter(cls(**x_params), cls(**y_params), name=spec)
+
+
+# -----------------------------
+# Offline evaluation
+# -----------------------------
+def cursor_track(frames):
+    """
+    Raw (unfiltered) cursor targets from a landmark recording.
+    Returns (t, xy) arrays for frames that had a hand.
+    """
+    from actuator import NullActuator
+    from gesture_state import GestureStateMachine
+    from landmark_stream import open_recording, to_hand_frame
+
+    if isinstance(frames, str):
+        frames = open_recording(frames)
+    machine = GestureStateMachine(NullActuator())
+    ts, xy = [], []
+    for rec in frames:
+        target = machine.cursor_target(to_hand_frame(rec))
+        if target is not None:
+            ts.append(float(rec["t"]))
+            xy.append(target)
+    return np.array(ts), np.array(xy, dtype=np.float64).reshape(-1, 2)
+
+
+def evaluate(cursor_filter, ts, raw, rest_speed=60.0, max_lag_frames=15):
+    """
+    Scores a filter on a raw cursor track:
+      lag_ms     shift (in time) that best aligns filtered output with the raw track
+      jitter_px  RMS frame-to-frame movement of the output while the hand is at rest
+      error_px   RMS distance between output and raw target
+    Rest frames are those where a 9-frame moving average of the raw track moves
+    slower than rest_speed px/s.
+    """
+    cursor_filter.reset()
+    out = np.array([cursor_filter(x, y, t) for t, (x, y) in zip(ts.tolist(), raw.tolist())])
+    n = len(ts)
+    if n < 3:
+        return {"filter": cursor_filter.name, "frames": n, "lag_ms": 0.0, "jitter_px": 0.0, "error_px": 0.0}
+    dt = float(np.median(np.diff(ts))) or 1 / 30
+
+    errors = []
+    for shift in range(0, min(max_lag_frames, n - 2) + 1):
+        diff = out[shift:] - raw[:n - shift]
+        errors.append(float(np.mean(np.sum(diff * diff, axis=1))))
+    lag_ms = 1000.0 * dt * int(np.argmin(errors))
+
+    kernel = np.ones(9) / 9
+    smooth = np.stack([np.convolve(raw[:, i], kernel, mode="same") for i in range(2)], axis=1)
+    speed = np.linalg.norm(np.diff(smooth, axis=0), axis=1) / np.maximum(np.diff(ts), 1e-6)
+    steps = np.linalg.norm(np.diff(out, axis=0), axis=1)
+    rest = speed < rest_speed
+    jitter = float(np.sqrt(np.mean(steps[rest] ** 2))) if rest.any() else 0.0
+    error = float(np.sqrt(np.mean(np.sum((out - raw) ** 2, axis=1))))
+    return {"filter": cursor_filter.name, "frames": n, "lag_ms": lag_ms,
+            "jitter_px": jitter, "error_px": error}
+
+
+def _main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Score cursor filters against landmark recordings")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_eval = sub.add_parser("evaluate")
+    p_eval.add_argument("recordings", nargs="+")
+    p_eval.add_argument("--filters", nargs="+", default=list(FILTERS),
+                        help="filter specs, e.g. one_euro:beta=0.02 kalman:lead=0.02")
+    p_eval.add_argument("--json", action="store_true", help="print JSON lines instead of a table")
+    args = parser.parse_args()
+
+    for path in args.recordings:
+        ts, raw = cursor_track(path)
+        if not args.json:
+            print(f"{path}: {len(ts)} frames with a hand")
+            print(f"  {'filter':40s} {'lag ms':>8s} {'jitter px':>10s} {'error px':>9s}")
+        for spec in args.filters:
+            result = evaluate(make_cursor_filter(spec), ts, raw)
+            result["recording"] = path
+            if args.json:
+                print(json.dumps(result))
+            else:
+                print(f"  {spec:40s} {result['lag_ms']:8.1f} {result['jitter_px']:10.2f} {result['error_px']:9.1f}")
+
+
+if __name__ == "__main__":
+    _main()
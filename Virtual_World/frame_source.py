@@ -0,0 +1,252 @@
+# frame_source.py
+"""
+Frame sources for the gesture and GUI loops.
+Every source has the same small interface as cv2.VideoCapture:
+
+    ok, frame = source.read()     # BGR uint8 frame, or (False, None)
+    source.release()
+
+plus `eof` (True once a finite source has run out of frames), `frames_read` and
+hand_frame() (landmarks published with the frame by camera_broker, else None).
+Non-camera sources run unthrottled by default so recorded sessions can be
+replayed at full speed; pass realtime=True to pace them at their FPS.
+"""
+
+import os
+import time
+import math
+
+import cv2
+import numpy as np
+
+
+# -----------------------------
+# Base class
+# -----------------------------
+class FrameSource:
+    def __init__(self, fps=30.0, realtime=False):
+        self.fps = fps or 30.0
+        self.realtime = realtime
+        self.eof = False
+        self.frames_read = 0
+        self._next_due = None
+
+    def read(self, image=None):
+        """
+        image: optional preallocated BGR buffer. Sources backed by cv2.VideoCapture
+        decode into it when the size matches; others ignore it.
+        """
+        ok, frame = self._read() if image is None else self._read_into(image)
+        if not ok:
+            return False, None
+        self.frames_read += 1
+        if self.realtime:
+            self._throttle()
+        return True, frame
+
+    def _read(self):
+        raise NotImplementedError
+
+    def _read_into(self, image):
+        return self._read()
+
+    def _throttle(self):
+        now = time.perf_counter()
+        if self._next_due is None:
+            self._next_due = now
+        delay = self._next_due - now
+        if delay > 0:
+            time.sleep(delay)
+        self._next_due = max(self._next_due, now - 1.0 / self.fps) + 1.0 / self.fps
+
+    def hand_frame(self):
+        """
+        Hand landmarks published alongside the last frame read (a landmarks.HandFrame),
+        or None if this source carries pixels only and the consumer must detect.
+        """
+        return None
+
+    def is_opened(self):
+        return not self.eof
+
+    def release(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+# -----------------------------
+# Live camera
+# -----------------------------
+class CameraSource(FrameSource):
+    """Live webcam via cv2.VideoCapture. Never reports eof; failed reads return (False, None)."""
+
+    def __init__(self, index=0, fps=None, width=None, height=None):
+        super().__init__(fps=fps or 30.0, realtime=False)
+        self.cap = cv2.VideoCapture(index)
+        if fps:
+            self.cap.set(cv2.CAP_PROP_FPS, fps)
+        if width:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        if height:
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+
+    def _read(self):
+        return self.cap.read()
+
+    def _read_into(self, image):
+        return self.cap.read(image)
+
+    def is_opened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+
+# -----------------------------
+# Recorded video
+# -----------------------------
+class VideoFileSource(FrameSource):
+    def __init__(self, path, loop=False, realtime=False):
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        super().__init__(fps=self.cap.get(cv2.CAP_PROP_FPS) or 30.0, realtime=realtime)
+        self.loop = loop
+        if not self.cap.isOpened():
+            self.eof = True
+
+    def _read(self):
+        return self._read_into(None)
+
+    def _read_into(self, image):
+        if self.eof:
+            return False, None
+        ok, frame = self.cap.read(image)
+        if not ok and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self.cap.read(image)
+        if not ok:
+            self.eof = True
+        return ok, frame
+
+    def release(self):
+        self.cap.release()
+
+
+# -----------------------------
+# Directory of images
+# -----------------------------
+class ImageDirSource(FrameSource):
+    EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+    def __init__(self, path, fps=30.0, loop=False, realtime=False):
+        super().__init__(fps=fps, realtime=realtime)
+        self.path = path
+        self.loop = loop
+        self.files = sorted(os.path.join(path, f) for f in os.listdir(path)
+                            if f.lower().endswith(self.EXTENSIONS))
+        self._pos = 0
+        if not self.files:
+            self.eof = True
+
+    def _read(self):
+        while not self.eof:
+            if self._pos >= len(self.files):
+                if not self.loop:
+                    self.eof = True
+                    break
+                self._pos = 0
+            frame = cv2.imread(self.files[self._pos])
+            self._pos += 1
+            if frame is not None:
+                return True, frame
+        return False, None
+
+
+# -----------------------------
+# Synthetic generator
+# -----------------------------
+class SyntheticSource(FrameSource):
+    """
+    Generates frames without any hardware: a dark gradient background with a
+    skin-coloured blob moving on a Lissajous path. `frames=None` runs forever.
+    Each read returns a fresh frame (consumers draw on it in place), unless a
+    matching image buffer is passed to read().
+    """
+
+    def __init__(self, width=640, height=480, frames=None, fps=30.0, realtime=False):
+        super().__init__(fps=fps, realtime=realtime)
+        self.width = width
+        self.height = height
+        self.frames = frames
+        col = np.linspace(30, 90, width, dtype=np.uint8)
+        self._background = np.empty((height, width, 3), dtype=np.uint8)
+        self._background[:, :, 0] = col
+        self._background[:, :, 1] = 20
+        self._background[:, :, 2] = col[::-1]
+
+    def _read(self):
+        return self._read_into(None)
+
+    def _read_into(self, image):
+        if self.frames is not None and self.frames_read >= self.frames:
+            self.eof = True
+            return False, None
+        t = self.frames_read / self.fps
+        if image is not None and image.shape == self._background.shape and image.dtype == np.uint8:
+            frame = image
+            np.copyto(frame, self._background)
+        else:
+            frame = self._background.copy()
+        cx = int(self.width * (0.5 + 0.35 * math.sin(t * 1.3)))
+        cy = int(self.height * (0.5 + 0.35 * math.sin(t * 1.7 + 0.5)))
+        r = max(8, min(self.width, self.height) // 10)
+        cv2.circle(frame, (cx, cy), r, (120, 160, 220), -1)
+        cv2.rectangle(frame, (cx - r // 4, cy - 2 * r), (cx + r // 4, cy), (120, 160, 220), -1)
+        return True, frame
+
+
+# -----------------------------
+# Factory
+# -----------------------------
+def open_source(spec=None, realtime=False, loop=False):
+    """
+    Builds a source from a short spec string (used by the --source CLI flags):
+      None / "0" / "camera:1"     -> CameraSource
+      "synthetic" / "synthetic:1280x720:300" -> SyntheticSource (WxH, frame count)
+      path to a directory         -> ImageDirSource
+      path to a video file        -> VideoFileSource
+      "shm" / "shm:NAME"          -> camera_broker.SharedFrameSource (frames from a running broker)
+    """
+    if spec is None:
+        return CameraSource(0)
+    if isinstance(spec, FrameSource):
+        return spec
+    spec = str(spec)
+    if spec.isdigit():
+        return CameraSource(int(spec))
+    # the scheme is the part before the first ':', so "camera_clip.avi" is a file
+    scheme, _, arg = spec.partition(":")
+    if scheme == "camera":
+        return CameraSource(int(arg or 0))
+    if scheme == "shm":
+        from camera_broker import DEFAULT_NAME, SharedFrameSource
+        return SharedFrameSource(arg or DEFAULT_NAME)
+    if scheme == "synthetic":
+        parts = spec.split(":")[1:]
+        width, height, frames = 640, 480, None
+        if parts and parts[0]:
+            width, height = (int(v) for v in parts[0].lower().split("x"))
+        if len(parts) > 1 and parts[1]:
+            frames = int(parts[1])
+        return SyntheticSource(width, height, frames=frames, realtime=realtime)
+    if os.path.isdir(spec):
+        return ImageDirSource(spec, loop=loop, realtime=realtime)
+    if os.path.isfile(spec):
+        return VideoFileSource(spec, loop=loop, realtime=realtime)
+    raise ValueError(f"Unknown frame source: {spec}")
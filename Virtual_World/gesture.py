@@ -1,187 +1,432 @@
 # gesture.py (Dual-Hand Virtual Mouse)
 import cv2
 import mediapipe as mp
-import pyautogui
+import numpy as np
 import time
-import math
+import signal
+import threading
+
+import metrics
+from pipeline import LatestQueue, StageStats, format_stats
+from frame_source import CameraSource, open_source
+from actuator import PyAutoGuiBackend, ThreadedActuator
+from gesture_state import GestureStateMachine
+from landmark_stream import LandmarkRecorder
+from landmarks import HAND_LEFT, HAND_RIGHT, HandFrame, LandmarkExtractor
+from roi_tracker import RoiHandTracker
+from scheduler import AdaptiveScheduler, LandmarkPredictor
 
 # -----------------------------
 # Mediapipe setup
 # -----------------------------
 mp_hands = mp.solutions.hands
-mp_drawing = mp.solutions.drawing_utils
 hands = mp_hands.Hands(max_num_hands=2,
                        min_detection_confidence=0.7,
                        min_tracking_confidence=0.7)
+extractor = LandmarkExtractor(max_hands=2)
+hand_connections = np.array(sorted(mp_hands.HAND_CONNECTIONS), dtype=np.int32)
 
 # -----------------------------
-# Screen info
+# Metrics (no-ops unless metrics.enable() was called)
 # -----------------------------
-screen_w, screen_h = pyautogui.size()
-pyautogui.FAILSAFE = False
+FRAMES = metrics.counter("gesture_frames_total", "Frames through the virtual mouse loop")
+READ_FAILURES = metrics.counter("gesture_read_failures_total", "Frame reads that returned nothing")
+INFER_ERRORS = metrics.counter("gesture_inference_errors_total", "Exceptions in the inference stage")
+CAPTURE_SPAN = metrics.span("gesture_capture_seconds", "Frame read time")
+INFER_SPAN = metrics.span("gesture_infer_seconds", "Hand detection (or prediction) time per frame")
+ACT_SPAN = metrics.span("gesture_act_seconds", "Gesture state machine and drawing time per frame")
+LOOP_SECONDS = metrics.histogram("gesture_loop_seconds", "Capture to actuation time per frame")
+
+def make_roi_tracker(**kwargs):
+    """ROI tracker that uses the shared full-frame model and its own model for crops."""
+    roi_hands = mp_hands.Hands(max_num_hands=2,
+                               min_detection_confidence=0.7,
+                               min_tracking_confidence=0.7)
+    return RoiHandTracker(hands, roi_hands, max_hands=2, **kwargs)
 
 # -----------------------------
-# Helper functions
+# Per-frame stages
 # -----------------------------
-def distance(p1, p2):
-    return math.hypot(p2[0]-p1[0], p2[1]-p1[1])
+def _buffer(buffers, shape):
+    if buffers is None:
+        return None
+    buf = buffers.get(shape)
+    if buf is None:
+        buf = buffers[shape] = np.empty(shape, dtype=np.uint8)
+    return buf
 
-def fingers_up(lm_list):
-    """Returns list of fingers up: [thumb, index, middle, ring, pinky]"""
-    fingers = []
-    # Thumb: basic heuristic (works for many cases)
-    try:
-        fingers.append(lm_list[4][0] < lm_list[3][0])
-    except Exception:
-        fingers.append(False)
-    # Other fingers
-    for tip_id, pip_id in [(8,6), (12,10), (16,14), (20,18)]:
-        try:
-            fingers.append(lm_list[tip_id][1] < lm_list[pip_id][1])
-        except Exception:
-            fingers.append(False)
-    return fingers
+def detect_hands(frame, tracker=None, scale=1.0, mirror=True, buffers=None):
+    """Inference stage: flip, run Mediapipe (full frame, or via an RoiHandTracker)
+    and copy all hands into a landmarks.HandFrame. Returns (frame, hand_frame).
+    scale < 1 downsizes only the detection input; landmarks stay in frame pixels.
+    mirror=False leaves the frame untouched and mirrors the landmarks and
+    handedness instead (headless mode). buffers: optional dict of reusable
+    arrays for the colour conversion, keyed by shape."""
+    if mirror:
+        frame = cv2.flip(frame, 1)
+    h, w, c = frame.shape
+    small = frame if scale >= 1.0 else cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    rgb_frame = cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=_buffer(buffers, small.shape))
+    if tracker is None:
+        handedness, scores, landmarks = extractor.extract(hands.process(rgb_frame))
+    else:
+        handedness, scores, landmarks = tracker.process(rgb_frame)
+    if not mirror and len(handedness):
+        # Mediapipe labels hands assuming a mirrored (selfie) image
+        landmarks[:, :, 0] = 1.0 - landmarks[:, :, 0]
+        handedness = np.where(handedness == HAND_RIGHT, HAND_LEFT, HAND_RIGHT)
+    return frame, HandFrame(handedness, landmarks, w, h, scores)
 
-# -----------------------------
-# Main Virtual Mouse
-# -----------------------------
-def virtual_mouse():
-    cap = cv2.VideoCapture(0)
-    cap.set(cv2.CAP_PROP_FPS, 30)  # increase camera FPS for faster detection
-    cv2.namedWindow("Virtual Mouse", cv2.WINDOW_NORMAL)
+def draw_hands(frame, hand_frame):
+    """Draws the hand skeletons (Mediapipe's default style) from pixel landmarks."""
+    if not len(hand_frame):
+        return
+    segments = hand_frame.px[:, hand_connections].reshape(-1, 2, 2)
+    cv2.polylines(frame, list(segments), False, (224, 224, 224), 2)
+    for x, y in hand_frame.px.reshape(-1, 2).tolist():
+        cv2.circle(frame, (x, y), 2, (0, 0, 255), 2)
 
-    last_left_click_time = 0
-    last_right_click_time = 0
-    click_cooldown = 0.3   # faster click cooldown
-    pinch_state = False
-    pinch_start_time = 0
+def handle_hands(frame, hand_frame, machine, recorder=None, draw=True):
+    """Actuation stage: run the gesture state machine and (if draw) annotate the frame."""
+    notes = machine.update(hand_frame)
+    if recorder is not None:
+        recorder.add(machine.now, hand_frame)
+    if draw:
+        draw_hands(frame, hand_frame)
+        for text, org, color in notes:
+            cv2.putText(frame, text, org, cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+    return frame
 
-    prev_x, prev_y = 0, 0
-    smooth_factor = 0.5    # faster cursor movement
-    cam_margin = 40
+class MouseLoop:
+    """
+    Per-run collaborators shared by the sequential and pipelined loops:
+    gesture state machine, optional landmark recorder, ROI tracker and
+    adaptive scheduler (with landmark prediction on skipped detections).
+    In headless mode frames are never flipped, drawn on or shown, and the
+    loop stops only through stop_event.
+    """
+    def __init__(self, machine, recorder=None, tracker=None, scheduler=None,
+                 headless=False, stop_event=None, heartbeat=None):
+        self.machine = machine
+        self.heartbeat = heartbeat
+        self.recorder = recorder
+        self.tracker = tracker
+        self.scheduler = scheduler
+        self.headless = headless
+        self.stop_event = stop_event or threading.Event()
+        self.predictor = LandmarkPredictor() if scheduler is not None else None
+        self.buffers = {} if headless else None
+
+    def infer(self, frame, t, published=None):
+        """
+        Returns (frame, hand_frame, render) for a frame captured at perf_counter time t.
+        published: a HandFrame already detected upstream (e.g. by camera_broker),
+        used instead of running detection.
+        """
+        mirror = not self.headless
+        if published is not None:
+            render = mirror and (self.scheduler is None or self.scheduler.plan().render)
+            if mirror:
+                frame = cv2.flip(frame, 1)
+            return frame, published, render
+        if self.scheduler is None:
+            frame, hand_frame = detect_hands(frame, self.tracker, mirror=mirror, buffers=self.buffers)
+            return frame, hand_frame, mirror
+        plan = self.scheduler.plan()
+        render = plan.render and mirror
+        if plan.detect:
+            frame, hand_frame = detect_hands(frame, self.tracker, plan.scale, mirror=mirror, buffers=self.buffers)
+            self.predictor.update(t, hand_frame)
+        else:
+            if render:
+                frame = cv2.flip(frame, 1)
+            h, w = frame.shape[:2]
+            hand_frame = self.predictor.predict(t, w, h)
+        return frame, hand_frame, render
 
+    def should_stop(self):
+        """Polls the stop event, and ESC in the preview window unless headless."""
+        if not self.headless and cv2.waitKey(1) & 0xFF == 27:
+            return True
+        return self.stop_event.is_set()
+
+    def act(self, frame, hand_frame, render=True):
+        return handle_hands(frame, hand_frame, self.machine, self.recorder, draw=render)
+
+    def finish(self, loop_seconds):
+        """Feeds the measured end-to-end time of one frame to the scheduler, heartbeat and metrics."""
+        FRAMES.inc()
+        LOOP_SECONDS.observe(loop_seconds)
+        if self.heartbeat is not None:
+            self.heartbeat.beat(loop_seconds)
+        if self.scheduler is not None and self.scheduler.record(loop_seconds):
+            print("[INFO] Scheduler: " + self.scheduler.describe())
+
+# -----------------------------
+# Main Virtual Mouse
+# -----------------------------
+def _run_sequential(source, loop):
+    processed = 0
     while True:
-        ret, frame = cap.read()
+        t0 = time.perf_counter()
+        ret, frame = source.read()
         if not ret:
+            READ_FAILURES.inc()
+            if source.eof:
+                break
             continue
+        t1 = time.perf_counter()
+        CAPTURE_SPAN.record(t0, t1 - t0)
 
-        frame = cv2.flip(frame, 1)
-        h, w, c = frame.shape
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        result = hands.process(rgb_frame)
-
-        right_hand_lm = None
-        left_hand_lm = None
-
-        # Detect hands
-        if result.multi_hand_landmarks and result.multi_handedness:
-            for hand_landmarks, hand_info in zip(result.multi_hand_landmarks, result.multi_handedness):
-                lm_list = [(int(lm.x * w), int(lm.y * h)) for lm in hand_landmarks.landmark]
-                label = hand_info.classification[0].label
-
-                if label == "Right":
-                    right_hand_lm = lm_list
-                else:
-                    left_hand_lm = lm_list
-
-                mp_drawing.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-
-        # -----------------------------
-        # Cursor movement (prefer right hand, else left)
-        # -----------------------------
-        if right_hand_lm:
-            x, y = right_hand_lm[8]
-        elif left_hand_lm:
-            x, y = left_hand_lm[8]
-        else:
-            x = y = None
-
-        if x is not None and y is not None:
-            # avoid division by zero and clamp margins
-            usable_w = max(1, (w - 2 * cam_margin))
-            usable_h = max(1, (h - 2 * cam_margin))
-            rel_x = (x - cam_margin) / usable_w
-            rel_y = (y - cam_margin) / usable_h
-            rel_x = max(0.0, min(1.0, rel_x))
-            rel_y = max(0.0, min(1.0, rel_y))
-
-            screen_x = int(screen_w * rel_x)
-            screen_y = int(screen_h * rel_y)
-            screen_x = max(0, min(screen_w-1, screen_x))
-            screen_y = max(0, min(screen_h-1, screen_y))
-            screen_x = int(prev_x + (screen_x - prev_x) * smooth_factor)
-            screen_y = int(prev_y + (screen_y - prev_y) * smooth_factor)
-            prev_x, prev_y = screen_x, screen_y
-            try:
-                pyautogui.moveTo(screen_x, screen_y, duration=0.01)
-            except Exception:
-                pass
-
-
-
-        # -----------------------------
-        # Right hand -> left click
-        # -----------------------------
-        if right_hand_lm:
-            thumb_index_dist = distance(right_hand_lm[4], right_hand_lm[8])
-            if thumb_index_dist < 40:  # slightly higher threshold for faster detection
-                if not pinch_state:
-                    pinch_state = True
-                    pinch_start_time = time.time()
-            else:
-                if pinch_state:
-                    pinch_duration = time.time() - pinch_start_time
-                    try:
-                        if pinch_duration < 0.5:
-                            pyautogui.click()
-                            cv2.putText(frame, "Left Click!", (x+10, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0,255,0), 2)
-                        else:
-                            pyautogui.doubleClick()
-                            cv2.putText(frame, "Double Click!", (x+10, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0,200,0), 2)
-                    except Exception:
-                        pass
-                    pinch_state = False
-
-            # Scroll up/down with 3 fingers (index+middle+ring)
-            fingers = fingers_up(right_hand_lm)
-            if fingers[1] and fingers[2] and fingers[3]:
-                try:
-                    pyautogui.scroll(60)  # faster scrolling
-                except Exception:
-                    pass
-                cv2.putText(frame, "Scroll Up", (x+10, y-30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255,0,0), 2)
-            elif not fingers[1] and not fingers[2] and not fingers[3]:
-                try:
-                    pyautogui.scroll(-60)  # faster scrolling
-                except Exception:
-                    pass
-                cv2.putText(frame, "Scroll Down", (x+10, y-30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255,0,0), 2)
-
-        # -----------------------------
-        # Left hand -> right click
-        # -----------------------------
-        if left_hand_lm and time.time() - last_right_click_time > click_cooldown:
-            thumb_index_dist = distance(left_hand_lm[4], left_hand_lm[8])
-            if thumb_index_dist < 40:  # faster detection
-                try:
-                    pyautogui.rightClick()
-                    last_right_click_time = time.time()
-                    lx, ly = left_hand_lm[8]
-                    cv2.putText(frame, "Right Click!", (lx+10, ly-10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0,0,255), 2)
-                except Exception:
-                    pass
+        frame, hand_frame, render = loop.infer(frame, t1, source.hand_frame())
+        INFER_SPAN.stop(t1)
+        t2 = ACT_SPAN.start()
+        frame = loop.act(frame, hand_frame, render)
+        ACT_SPAN.stop(t2)
+        processed += 1
 
         # Show feed
-        cv2.imshow("Virtual Mouse", frame)
-        if cv2.waitKey(1) & 0xFF == 27:
+        if render:
+            cv2.imshow("Virtual Mouse", frame)
+        if loop.should_stop():
             break
+        loop.finish(time.perf_counter() - t0)
+    return processed
+
+def _run_pipelined(source, loop, report_every=5.0):
+    """
+    Capture and inference run on their own threads, joined to the actuation stage
+    (this thread, which also owns the OpenCV window) by drop-oldest queues of size 1.
+    A slow stage makes older frames get dropped instead of queued, so the cursor
+    always follows the newest hand pose.
+    """
+    stop = threading.Event()
+    inference_done = threading.Event()
+    frames = LatestQueue(maxsize=1)
+    results = LatestQueue(maxsize=1)
+    capture_stats = StageStats("capture")
+    inference_stats = StageStats("inference")
+    actuation_stats = StageStats("actuation")
+    e2e_stats = StageStats("end_to_end")
+
+    def capture_loop():
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            ret, frame = source.read()
+            if not ret:
+                READ_FAILURES.inc()
+                if source.eof:
+                    break
+                continue
+            t1 = time.perf_counter()
+            capture_stats.add(t1 - t0)
+            CAPTURE_SPAN.record(t0, t1 - t0)
+            frames.put((frame, t1, source.hand_frame()))
+        frames.close()
+
+    def inference_loop():
+        while not stop.is_set():
+            item = frames.get(timeout=0.1)
+            if item is None:
+                if frames.closed:
+                    break
+                continue
+            frame, t_captured, published = item
+            t0 = time.perf_counter()
+            try:
+                packet = loop.infer(frame, t_captured, published)
+            except Exception as e:
+                INFER_ERRORS.inc()
+                print(f"[ERROR] Inference stage failed: {e}")
+                continue
+            inference_stats.add(time.perf_counter() - t0)
+            INFER_SPAN.record(t0, time.perf_counter() - t0)
+            results.put((packet, t_captured))
+        inference_done.set()
+
+    workers = [threading.Thread(target=capture_loop, name="gesture-capture", daemon=True),
+               threading.Thread(target=inference_loop, name="gesture-inference", daemon=True)]
+    for t in workers:
+        t.start()
+
+    last_report = time.time()
+    processed = 0
+    try:
+        while True:
+            item = results.get(timeout=0.05)
+            if item is None and inference_done.is_set() and not len(results):
+                break
+            if item is not None:
+                (frame, hand_frame, render), t_captured = item
+                t0 = time.perf_counter()
+                frame = loop.act(frame, hand_frame, render)
+                t1 = time.perf_counter()
+                actuation_stats.add(t1 - t0)
+                ACT_SPAN.record(t0, t1 - t0)
+                e2e_stats.add(t1 - t_captured)
+                loop.finish(t1 - t_captured)
+                processed += 1
+                if render:
+                    cv2.imshow("Virtual Mouse", frame)
+
+            if loop.should_stop():
+                break
+
+            if report_every and time.time() - last_report >= report_every:
+                last_report = time.time()
+                print("[INFO] Pipeline latency: "
+                      + format_stats([capture_stats, inference_stats, actuation_stats, e2e_stats])
+                      + f" | dropped capture={frames.dropped} inference={results.dropped}")
+    finally:
+        stop.set()
+        frames.close()
+        results.close()
+        for t in workers:
+            t.join(timeout=1.0)
+    return processed
+
+def _install_stop_triggers(stop_event, stop_hotkey=None):
+    """
+    SIGINT/SIGTERM (and an optional global hotkey via the `keyboard` package) set
+    stop_event. Returns a function that restores the previous handlers.
+    """
+    restore = []
+    if threading.current_thread() is threading.main_thread():
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            previous = signal.signal(sig, lambda signum, frame: stop_event.set())
+            restore.append(lambda sig=sig, previous=previous: signal.signal(sig, previous))
+    if stop_hotkey:
+        try:
+            import keyboard
+            handle = keyboard.add_hotkey(stop_hotkey, stop_event.set)
+            restore.append(lambda: keyboard.remove_hotkey(handle))
+        except Exception as e:
+            print(f"[WARNING] Stop hotkey unavailable: {e}")
+
+    def undo():
+        for fn in restore:
+            fn()
+    return undo
+
+def virtual_mouse(source=None, pipelined=False, record=None, roi=False,
+                  adaptive=False, target_latency=0.040,
+                  headless=False, stop_event=None, stop_hotkey=None,
+                  cursor_filter="exponential:smooth_factor=0.5", heartbeat=None):
+    """
+    Runs the dual-hand virtual mouse until ESC is pressed in the preview window,
+    stop_event is set, or a finite source (video file, image directory, synthetic)
+    runs out.
+    source: a frame_source.FrameSource or a spec string for open_source();
+            defaults to the webcam at 30 FPS. With "shm[:NAME]" frames come
+            from a running camera_broker, and so do the landmarks if it detects.
+    pipelined=True runs capture, inference and actuation as separate stages
+    (see _run_pipelined) and prints per-stage latency periodically.
+    record: optional .npy path; per-frame landmarks, handedness and timestamps
+            are saved there for landmark_stream.replay().
+    roi=True crops detection to a padded box around the last detected hands
+            (see roi_tracker.RoiHandTracker), with periodic full-frame passes.
+    adaptive=True lowers detection resolution, detection rate and preview rate
+            whenever the loop exceeds target_latency seconds (see scheduler.py).
+    headless=True skips all drawing and windowing and never copies the frame.
+            Stop it with stop_event (threading/multiprocessing Event), SIGINT/SIGTERM
+            or stop_hotkey (e.g. "ctrl+alt+q", needs the `keyboard` package).
+    cursor_filter: filters.make_cursor_filter spec, e.g. "one_euro:beta=0.02"
+            (pick one with `python filters.py evaluate <recording>`).
+    heartbeat: supervisor.Heartbeat; beaten once per frame with the loop time,
+            and its stop event stops the loop (unless stop_event is given).
+    """
+    if source is None:
+        source = CameraSource(0, fps=30)  # increase camera FPS for faster detection
+    else:
+        source = open_source(source)
+    if not headless:
+        cv2.namedWindow("Virtual Mouse", cv2.WINDOW_NORMAL)
+    stop_event = stop_event or (heartbeat.stop_event if heartbeat is not None else threading.Event())
+    remove_triggers = _install_stop_triggers(stop_event, stop_hotkey) if headless else None
+
+    recorder = LandmarkRecorder(record) if record else None
+    tracker = make_roi_tracker() if roi else None
+    scheduler = AdaptiveScheduler(target_latency) if adaptive else None
+    actuator = ThreadedActuator(PyAutoGuiBackend())
+    machine = GestureStateMachine(actuator, cursor_filter=cursor_filter)
+    loop = MouseLoop(machine, recorder, tracker, scheduler,
+                     headless=headless, stop_event=stop_event, heartbeat=heartbeat)
+    start = time.perf_counter()
+    processed = 0
+    try:
+        if pipelined:
+            processed = _run_pipelined(source, loop)
+        else:
+            processed = _run_sequential(source, loop)
+    finally:
+        source.release()
+        actuator.close()
+        if remove_triggers is not None:
+            remove_triggers()
+        else:
+            cv2.destroyAllWindows()
+        if recorder is not None:
+            recorder.close()
+            print(f"[INFO] Saved {recorder.count} landmark frames to {record}")
+    elapsed = time.perf_counter() - start
+    print(f"[INFO] Processed {processed} frames in {elapsed:.1f}s "
+          f"({processed / max(elapsed, 1e-9):.1f} FPS).")
+    if tracker is not None:
+        st = tracker.stats()
+        print(f"[INFO] ROI tracking: {st['roi_passes']} ROI / {st['full_passes']} full-frame passes "
+              f"({100 * st['roi_ratio']:.0f}% cropped).")
+    st = actuator.stats()
+    print(f"[INFO] Mouse events: {st['enqueued']} queued, {st['applied']} applied, "
+          f"{st['merged']} merged, {st['dropped']} dropped, {st['errors']} failed.")
+    if scheduler is not None:
+        print(f"[INFO] Scheduler: {scheduler.changes} level changes, final " + scheduler.describe())
+
 
-    cap.release()
-    cv2.destroyAllWindows()
+def prepare():
+    """
+    Warm start for warm_start.WarmWorker: runs one detection on a blank frame
+    (Mediapipe builds its graph on the first call) and loads pyautogui, then
+    returns virtual_mouse.
+    """
+    blank = np.zeros((480, 640, 3), dtype=np.uint8)
+    hands.process(blank)
+    import pyautogui  # loaded now so the first cursor move is not delayed
+    return virtual_mouse
 
 
 # -----------------------------
 # Run standalone
 # -----------------------------
 if __name__ == "__main__":
-    virtual_mouse()
+    import argparse
+    parser = argparse.ArgumentParser(description="Dual-hand virtual mouse")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="run capture/inference/actuation on separate threads")
+    parser.add_argument("--source", default=None,
+                        help="camera index, video file, image directory, synthetic[:WxH[:N]] or shm[:NAME]")
+    parser.add_argument("--realtime", action="store_true",
+                        help="pace file/synthetic sources at their FPS instead of full speed")
+    parser.add_argument("--record", default=None,
+                        help="save the landmark stream to this .npy file for replay")
+    parser.add_argument("--roi", action="store_true",
+                        help="track hands in a cropped region instead of the full frame")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="trade detection resolution/rate and preview for loop latency")
+    parser.add_argument("--target-ms", type=float, default=40.0,
+                        help="loop latency budget for --adaptive (milliseconds)")
+    parser.add_argument("--headless", action="store_true",
+                        help="no preview window; stop with Ctrl+C, SIGTERM or --stop-hotkey")
+    parser.add_argument("--stop-hotkey", default=None,
+                        help="global hotkey that stops a headless run, e.g. ctrl+alt+q")
+    parser.add_argument("--filter", default="exponential:smooth_factor=0.5",
+                        help="cursor filter spec: exponential, one_euro, kalman, predictive[:key=value,...]")
+    parser.add_argument("--metrics", default=None,
+                        help="write gesture.prom (Prometheus text) and gesture.trace.json to this directory")
+    args = parser.parse_args()
+    if args.metrics:
+        metrics.enable_in(args.metrics, "gesture")
+    source = open_source(args.source, realtime=args.realtime) if args.source else None
+    virtual_mouse(source=source, pipelined=args.pipelined, record=args.record, roi=args.roi,
+                  adaptive=args.adaptive, target_latency=args.target_ms / 1000.0,
+                  headless=args.headless, stop_hotkey=args.stop_hotkey, cursor_filter=args.filter)
+    metrics.disable()
@@ -0,0 +1,147 @@
+# gesture_state.py
+"""
+Gesture decision logic for the virtual mouse, independent of Mediapipe,
+OpenCV and the wall clock. Hands come in as a landmarks.HandFrame, time comes
+from an injectable clock and actions go to an actuator (see actuator.py), so the
+same code runs live in gesture.py and against recorded streams in landmark_stream.py.
+"""
+
+import time
+
+from filters import make_cursor_filter
+from landmarks import HAND_LEFT, HAND_RIGHT, INDEX_TIP
+
+
+class ReplayClock:
+    """Clock whose time is set explicitly (e.g. to recorded frame timestamps)."""
+    def __init__(self, t=0.0):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+
+# -----------------------------
+# State machine
+# -----------------------------
+class GestureStateMachine:
+    """
+    Right hand: cursor, pinch -> left/double click, 3 fingers -> scroll.
+    Left hand: pinch -> right click (with cooldown).
+    update() reads the clock once per frame and returns the annotations the
+    caller may draw: a list of (text, (x, y), bgr_color).
+    cursor_filter: a filters.CursorFilter or spec string (default: the original
+    fixed 0.5 blend).
+    """
+
+    def __init__(self, actuator, clock=time.time, cursor_filter="exponential:smooth_factor=0.5"):
+        self.actuator = actuator
+        self.clock = clock
+        self.cursor_filter = make_cursor_filter(cursor_filter)
+        self.screen_w, self.screen_h = actuator.screen_size()
+
+        self.last_left_click_time = 0
+        self.last_right_click_time = 0
+        self.click_cooldown = 0.3   # faster click cooldown
+        self.pinch_state = False
+        self.pinch_start_time = 0
+
+        self.cam_margin = 40
+
+        self.now = 0.0
+        self.frames = 0
+        self.actions = 0
+
+    def cursor_target(self, hands):
+        """Unfiltered screen position for the index tip (prefer right hand, else left), or None."""
+        right = hands.index_of(HAND_RIGHT)
+        hand = right if right >= 0 else hands.index_of(HAND_LEFT)
+        if hand < 0:
+            return None
+        x, y = hands.point(hand, INDEX_TIP)
+        cam_margin = self.cam_margin
+        # avoid division by zero and clamp margins
+        usable_w = max(1, (hands.w - 2 * cam_margin))
+        usable_h = max(1, (hands.h - 2 * cam_margin))
+        rel_x = (x - cam_margin) / usable_w
+        rel_y = (y - cam_margin) / usable_h
+        rel_x = max(0.0, min(1.0, rel_x))
+        rel_y = max(0.0, min(1.0, rel_y))
+
+        screen_x = int(self.screen_w * rel_x)
+        screen_y = int(self.screen_h * rel_y)
+        screen_x = max(0, min(self.screen_w-1, screen_x))
+        screen_y = max(0, min(self.screen_h-1, screen_y))
+        return screen_x, screen_y
+
+    def update(self, hands):
+        """hands: landmarks.HandFrame for the current frame."""
+        now = self.now = self.clock()
+        self.frames += 1
+        act = self.actuator
+        notes = []
+        right = hands.index_of(HAND_RIGHT)
+        left = hands.index_of(HAND_LEFT)
+
+        # -----------------------------
+        # Cursor movement (prefer right hand, else left)
+        # -----------------------------
+        if right >= 0:
+            x, y = hands.point(right, INDEX_TIP)
+        elif left >= 0:
+            x, y = hands.point(left, INDEX_TIP)
+        else:
+            x = y = None
+
+        target = self.cursor_target(hands)
+        if target is not None:
+            fx, fy = self.cursor_filter(target[0], target[1], now)
+            screen_x = max(0, min(self.screen_w-1, int(fx)))
+            screen_y = max(0, min(self.screen_h-1, int(fy)))
+            act.move_to(screen_x, screen_y)
+            self.actions += 1
+
+        # -----------------------------
+        # Right hand -> left click
+        # -----------------------------
+        if right >= 0:
+            if hands.pinch[right] < 40:  # slightly higher threshold for faster detection
+                if not self.pinch_state:
+                    self.pinch_state = True
+                    self.pinch_start_time = now
+            else:
+                if self.pinch_state:
+                    pinch_duration = now - self.pinch_start_time
+                    if pinch_duration < 0.5:
+                        act.click()
+                        notes.append(("Left Click!", (x+10, y-10), (0,255,0)))
+                    else:
+                        act.double_click()
+                        notes.append(("Double Click!", (x+10, y-10), (0,200,0)))
+                    self.actions += 1
+                    self.last_left_click_time = now
+                    self.pinch_state = False
+
+            # Scroll up/down with 3 fingers (index+middle+ring)
+            index_up, middle_up, ring_up = hands.fingers[right, 1:4].tolist()
+            if index_up and middle_up and ring_up:
+                act.scroll(60)  # faster scrolling
+                self.actions += 1
+                notes.append(("Scroll Up", (x+10, y-30), (255,0,0)))
+            elif not index_up and not middle_up and not ring_up:
+                act.scroll(-60)  # faster scrolling
+                self.actions += 1
+                notes.append(("Scroll Down", (x+10, y-30), (255,0,0)))
+
+        # -----------------------------
+        # Left hand -> right click
+        # -----------------------------
+        if left >= 0 and now - self.last_right_click_time > self.click_cooldown:
+            if hands.pinch[left] < 40:  # faster detection
+                act.right_click()
+                self.actions += 1
+                self.last_right_click_time = now
+                lx, ly = hands.point(left, INDEX_TIP)
+                notes.append(("Right Click!", (lx+10, ly-10), (0,0,255)))
+
+        return notes
@@ -1,8 +1,12 @@
 # gui.py
 """
 Phase-2 Upgraded GUI for Virtual World (all Phase-2 features applied)
-Single central button: "LAUNCH"
-Click detection: Thumb + Index finger
+Launch menu: the buttons of a menu.Menu (launch all / gesture only / voice
+only by default), laid out from the menu's data and drawn by MenuRenderer
+Click detection: Thumb + Index finger on a button
+Benchmark-only: draw_frosted_panel, draw_gradient_round_button and
+launch_button_rect draw the old single LAUNCH button immediate-mode; run_gui
+no longer calls them, benchmark.py keeps them as the uncached reference
 """
 
 import cv2
@@ -12,6 +16,13 @@ import time
 import math
 from collections import deque
 
+import metrics
+from frame_source import CameraSource, open_source
+from gui_layers import (AllocationCounter, LayerCache, OverlayLayer, Sprite, SpriteCanvas, WorkBuffers,
+                        falloff_mask, gradient_ramp)
+from landmarks import INDEX_TIP, HandFrame, LandmarkExtractor
+from menu import Menu
+
 # Optional sound: winsound works on Windows. Fallback to no sound.
 try:
     import winsound
@@ -26,88 +37,165 @@ mpHands = mp.solutions.hands
 hands = mpHands.Hands(max_num_hands=1,
                       min_detection_confidence=0.6,
                       min_tracking_confidence=0.6)
-mpDraw = mp.solutions.drawing_utils
+extractor = LandmarkExtractor(max_hands=1)
+hand_connections = np.array(sorted(mpHands.HAND_CONNECTIONS), dtype=np.int32)
+
+# Metrics (no-ops unless metrics.enable() was called)
+FRAMES = metrics.counter("gui_frames_total", "Launch menu frames shown")
+READ_FAILURES = metrics.counter("gui_read_failures_total", "Frame reads that returned nothing")
+DETECT_ERRORS = metrics.counter("gui_detect_errors_total", "Exceptions from hand detection in the menu")
+FRAME_SPAN = metrics.span("gui_frame_seconds", "Menu frame time, read to imshow")
+DETECT_SPAN = metrics.span("gui_detect_seconds", "Menu hand detection time (0 with a detecting broker)")
+RENDER_SPAN = metrics.span("gui_render_seconds", "Menu drawing time per frame")
+MAX_READ_FAILURES = 3  # consecutive failed reads before the menu gives up on the source
+
+# Static menu layers (grid, title, button, meter), rendered once per resolution
+layers = LayerCache(max_items=1024)
+GRID_STEP = 60
+GRID_COLOR = (80, 60, 120)
+BUTTON_PALETTE = ((15, 80, 150), (60, 140, 220), (120, 80, 180))    # top, middle, bottom
+NEON_PALETTE = ((20, 80, 160), (120, 80, 200))
+GLOW_COLOR = (120, 200, 255)
+GLOW_RADIUS = 12
 
 # --------- Utility functions ----------
 def dist(a, b):
     return math.hypot(a[0] - b[0], a[1] - b[1])
 
-def lerp(a, b, t):
-    return a + (b - a) * t
-
-def color_lerp(c1, c2, t):
-    return tuple(int(lerp(c1[i], c2[i], t)) for i in range(3))
 
 # --------- Visual effect helpers ----------
 def draw_frosted_panel(img, x1, y1, x2, y2, radius=8, alpha=0.55):
+    """
+    Tints the panel rectangle toward white in place, touching only that
+    sub-rectangle. (The old version blurred the region first, but the filled
+    rectangle drawn over it hid the blur completely, so only the tint showed.)
+    Benchmark-only: the menu draws the cached _panel_sprite instead.
+    """
     h, w = img.shape[:2]
     x1c, y1c = max(0, x1), max(0, y1)
-    x2c, y2c = min(w, x2), min(h, y2)
+    x2c, y2c = min(w - 1, x2), min(h - 1, y2)
     if x2c <= x1c or y2c <= y1c:
         return img
-    region = img[y1c:y2c, x1c:x2c]
-    if region.size == 0:
-        return img
-    blurred = cv2.GaussianBlur(region, (21, 21), 0)
-    overlay = img.copy()
-    overlay[y1c:y2c, x1c:x2c] = blurred
-    cv2.rectangle(overlay, (x1, y1), (x2, y2), (255, 255, 255), -1)
-    res = cv2.addWeighted(overlay, alpha, img, 1 - alpha, 0)
-    return res
-
-def draw_gradient_round_button(img, x1, y1, x2, y2, text, glow=0.0, scale=1.0):
+    roi = img[y1c:y2c + 1, x1c:x2c + 1]
+    cv2.convertScaleAbs(roi, dst=roi, alpha=1 - alpha, beta=255 * alpha)
+    return img
+
+def _clip_rect(img, x1, y1, x2, y2):
     h, w = img.shape[:2]
-    overlay = img.copy()
-    x1c, y1c = int(max(0, x1)), int(max(0, y1))
-    x2c, y2c = int(min(w - 1, x2)), int(min(h - 1, y2))
-    if x2c <= x1c or y2c <= y1c:
-        return img
+    return int(max(0, x1)), int(max(0, y1)), int(min(w - 1, x2)), int(min(h - 1, y2))
 
-    top, mid, bot = (15, 80, 150), (60, 140, 220), (120, 80, 180)
+def _button_body_sprite(rect):
+    x1c, y1c, x2c, y2c = rect
     height = y2c - y1c
-    for i in range(y1c, y2c):
-        t = (i - y1c) / max(1, height)
-        if t < 0.5:
-            c = color_lerp(top, mid, t * 2)
-        else:
-            c = color_lerp(mid, bot, (t - 0.5) * 2)
-        cv2.line(overlay, (x1c, i), (x2c, i), c, 1)
-
-    cv2.rectangle(overlay, (x1c, y1c), (x2c, y2c), (255, 255, 255), 1, cv2.LINE_AA)
-
-    glow_amount = int(12 * glow)
-    for i in range(glow_amount):
-        cv2.rectangle(overlay, (x1c - i, y1c - i), (x2c + i, y2c + i), (120, 200, 255), 1, cv2.LINE_AA)
-        overlay = cv2.addWeighted(overlay, 1.0, img, 0.0, 0)
-
-    img = cv2.addWeighted(overlay, 0.85, img, 0.15, 0)
-
+    canvas = SpriteCanvas(x2c - x1c + 3, height + 3, x1c - 1, y1c - 1)
+    # canvas row r is frame row y1c - 1 + r; rows outside the button reuse the end colours
+    ramp = gradient_ramp(height, BUTTON_PALETTE)
+    rows = np.clip(np.arange(canvas.h) - 1, 0, height - 1)
+    ramp = ramp[rows][:, None, :]
+
+    def body(mask, o):
+        mask[1:1 + height, 1:2 + x2c - x1c] = 255
+
+    def border(mask, o):
+        cv2.rectangle(mask, (x1c + o[0], y1c + o[1]), (x2c + o[0], y2c + o[1]), 255, 1, cv2.LINE_AA)
+
+    canvas.paint(body, ramp).paint(border, (255, 255, 255))
+    return canvas.opacity(0.85).sprite()
+
+def _button_glow_sprite(rect):
+    x1c, y1c, x2c, y2c = rect
+    pad = GLOW_RADIUS + 1
+    x0, y0 = x1c - pad, y1c - pad
+    w, h = x2c - x1c + 2 * pad + 1, y2c - y1c + 2 * pad + 1
+    mask = falloff_mask(w, h, (pad, pad, pad + x2c - x1c, pad + y2c - y1c), GLOW_RADIUS)
+    bgra = np.empty((h, w, 4), np.uint8)
+    bgra[..., :3] = GLOW_COLOR
+    bgra[..., 3] = np.rint(mask * (0.85 * 255))
+    return Sprite(bgra, x0, y0)
+
+def _button_label_sprite(rect, text, scale):
+    x1c, y1c, x2c, y2c = rect
     font = cv2.FONT_HERSHEY_SIMPLEX
     font_scale = 0.9 * scale
     thickness = 2
-    text_size = cv2.getTextSize(text, font, font_scale, thickness)[0]
+    (tw, th), base = cv2.getTextSize(text, font, font_scale, thickness + 1)
     cx, cy = (x1c + x2c) // 2, (y1c + y2c) // 2
-    text_x = cx - text_size[0] // 2
-    text_y = cy + text_size[1] // 2
-    cv2.putText(img, text, (text_x, text_y), font, font_scale, (255, 255, 255), thickness + 1, cv2.LINE_AA)
+    text_x = cx - tw // 2
+    text_y = cy + th // 2
+    pad = 4
+    canvas = SpriteCanvas(tw + 2 * pad, th + base + 2 * pad, text_x - pad, text_y - th - pad)
 
+    def label(mask, o):
+        cv2.putText(mask, text, (text_x + o[0], text_y + o[1]), font, font_scale, 255, thickness + 1, cv2.LINE_AA)
+
+    return canvas.paint(label, (255, 255, 255)).sprite()
+
+def _button_shine_sprite(rect):
+    x1c, y1c, x2c, y2c = rect
     shine_h = int((y2c - y1c) * 0.25)
-    shine = img.copy()
-    cv2.rectangle(shine, (x1c + 5, y1c + 5), (x2c - 5, y1c + 5 + shine_h), (255, 255, 255), -1)
-    img[y1c + 5:y1c + 5 + shine_h, x1c + 5:x2c - 5] = cv2.addWeighted(
-        shine[y1c + 5:y1c + 5 + shine_h, x1c + 5:x2c - 5], 0.08,
-        img[y1c + 5:y1c + 5 + shine_h, x1c + 5:x2c - 5], 0.92, 0
-    )
+    canvas = SpriteCanvas(max(1, x2c - x1c - 10), max(1, shine_h), x1c + 5, y1c + 5)
+
+    def shine(mask, o):
+        mask[:] = 255
+
+    return canvas.paint(shine, (255, 255, 255), 0.08).sprite()
+
+def draw_gradient_round_button(img, x1, y1, x2, y2, text, glow=0.0, scale=1.0, work=None):
+    """
+    Draws the button in place from cached sprites: body (gradient + border),
+    glow (one falloff mask, faded by `glow`), label and shine. Each is rendered
+    once per rectangle / label scale and only blended afterwards.
+    work: optional WorkBuffers for the blend temporaries.
+    Benchmark-only: MenuRenderer composes the same sprites into its layer.
+    """
+    rect = _clip_rect(img, x1, y1, x2, y2)
+    if rect[2] <= rect[0] or rect[3] <= rect[1]:
+        return img
+
+    layers.get(("button", rect), lambda: _button_body_sprite(rect)).draw(img, work)
+    if glow > 0:
+        layers.get(("glow", rect), lambda: _button_glow_sprite(rect)).draw(img, work, opacity=glow)
+    scale = round(scale, 2)
+    layers.get(("label", rect, text, scale), lambda: _button_label_sprite(rect, text, scale)).draw(img, work)
+    layers.get(("shine", rect), lambda: _button_shine_sprite(rect)).draw(img, work)
     return img
 
 def draw_neon_border(img, intensity=0.5):
     h, w = img.shape[:2]
     t = (math.sin(time.time() * 2) + 1) / 2
-    outer_color = color_lerp((20, 80, 160), (120, 80, 200), t)
+    outer_color = tuple(int(c) for c in gradient_ramp(256, NEON_PALETTE)[int(t * 255)])
     thickness = int(6 * (0.5 + intensity))
     cv2.rectangle(img, (3, 3), (w - 4, h - 4), outer_color, thickness, cv2.LINE_AA)
     return img
 
+def draw_trail(img, trail, now):
+    """
+    Fading fingertip trail. Segments are grouped by thickness (age) and each
+    group goes out as one cv2.polylines call, so at most 7 draw calls per frame.
+    trail: (x, y, t) points, newest first.
+    """
+    if len(trail) < 2:
+        return img
+    pts = np.array(trail, np.float64)
+    alpha = np.clip(1.0 - (now - pts[:-1, 2]) * 1.2, 0.0, 1.0)
+    levels = (6 * alpha).astype(np.int32)
+    xy = pts[:, :2].astype(np.int32)
+    segments = np.stack([xy[:-1], xy[1:]], axis=1)
+    for level in np.unique(levels):
+        group = levels == level
+        a = float(alpha[group].mean())
+        col = (int(120 * a + 10), int(200 * a + 10), int(255 * a + 10))
+        cv2.polylines(img, list(segments[group]), False, col, int(level) + 1, cv2.LINE_AA)
+    return img
+
+def draw_hand_skeleton(img, hand_frame, hand=0):
+    """One hand's skeleton from pixel landmarks, in the menu's teal/blue style."""
+    px = hand_frame.px[hand]
+    cv2.polylines(img, list(px[hand_connections]), False, (80, 140, 220), 1)
+    for x, y in px.tolist():
+        cv2.circle(img, (x, y), 2, (80, 220, 180), 1)
+    return img
+
 def show_loading(frame_func, mode_text, duration=1.4):
     start = time.time()
     while time.time() - start < duration:
@@ -124,10 +212,190 @@ def show_loading(frame_func, mode_text, duration=1.4):
         if cv2.waitKey(1) & 0xFF == ord('q'):
             break
 
+def _grid_sprite(w, h):
+    def grid(mask, o):
+        mask[:, ::GRID_STEP] = 255
+        mask[::GRID_STEP, :] = 255
+
+    return SpriteCanvas(w, h).paint(grid, GRID_COLOR, 0.16).sprite()
+
+def _title_sprite(w, h, thickness):
+    title = "Virtual World"
+    t_size = cv2.getTextSize(title, cv2.FONT_HERSHEY_SCRIPT_COMPLEX, 2.2, 6)[0]
+    tx = (w - t_size[0]) // 2
+    ty = int(h * 0.18)
+    shadow_col = (30, 40, 80)
+    canvas = SpriteCanvas(w, min(h, ty + 40))
+
+    def shadow(mask, o):
+        cv2.putText(mask, title, (tx + 6, ty + 6), cv2.FONT_HERSHEY_SCRIPT_COMPLEX, 2.2, 255, 6, cv2.LINE_AA)
+
+    def text(mask, o):
+        cv2.putText(mask, title, (tx, ty), cv2.FONT_HERSHEY_SCRIPT_COMPLEX, 2.2, 255, thickness, cv2.LINE_AA)
+
+    return canvas.paint(shadow, shadow_col).paint(text, (255, 255, 255)).sprite()
+
+def draw_backdrop(frame, work=None):
+    """
+    Blurred camera background with the cached grid and glowing title layers.
+    Returns a new frame, or work's "backdrop" buffer when work is given.
+    """
+    h, w = frame.shape[:2]
+    out = work.get("backdrop", frame.shape) if work is not None else None
+    frame = cv2.GaussianBlur(frame, (9, 9), 8, dst=out)
+    layers.get(("grid", w, h), lambda: _grid_sprite(w, h)).draw(frame)
+
+    # one sprite per stroke thickness the glow can reach (2..5), built together
+    titles = layers.get(("title", w, h), lambda: [_title_sprite(w, h, t) for t in range(2, 6)])
+    glow = abs(math.sin(time.time() * 1.6))
+    titles[int(3 * glow)].draw(frame, work)
+    return frame
+
+def launch_button_rect(w, h):
+    """Returns (center, (x1, y1, x2, y2)) of the old central LAUNCH button (benchmark-only)."""
+    center_btn = (w // 2, int(h * 0.57))
+    b_w = int(w * 0.32)
+    b_h = int(h * 0.12)
+    bx1 = center_btn[0] - b_w // 2
+    by1 = center_btn[1] - b_h // 2
+    bx2 = center_btn[0] + b_w // 2
+    by2 = center_btn[1] + b_h // 2
+    return center_btn, (bx1, by1, bx2, by2)
+
+def _meter_geometry(w, h):
+    meter_x, meter_y = int(w * 0.86), int(h * 0.90)
+    meter_w, meter_h = int(w * 0.10), int(h * 0.03)
+    return meter_x, meter_y, meter_w, meter_h
+
+def _meter_sprite(w, h):
+    meter_x, meter_y, meter_w, meter_h = _meter_geometry(w, h)
+    x0, y0 = meter_x - 64, meter_y - 20
+    canvas = SpriteCanvas(meter_w + 68, meter_h + 28, x0, y0)
+
+    def frame_rect(mask, o):
+        cv2.rectangle(mask, (meter_x + o[0], meter_y + o[1]), (meter_x + meter_w + o[0], meter_y + meter_h + o[1]),
+                      255, -1, cv2.LINE_AA)
+
+    def label(mask, o):
+        cv2.putText(mask, "Hand", (meter_x - 60 + o[0], meter_y + meter_h + o[1]), cv2.FONT_HERSHEY_SIMPLEX, 0.55,
+                    255, 1, cv2.LINE_AA)
+
+    return canvas.paint(frame_rect, (30, 30, 40)).paint(label, (220, 220, 220)).sprite()
+
+def draw_hand_meter(frame, hand_confidence, work=None):
+    """Hand confidence meter: cached frame and label, fill drawn per frame."""
+    h, w = frame.shape[:2]
+    layers.get(("meter", w, h), lambda: _meter_sprite(w, h)).draw(frame, work)
+    meter_x, meter_y, meter_w, meter_h = _meter_geometry(w, h)
+    fill_w = int(meter_w * hand_confidence)
+    biz_color = (50, 200, 120) if hand_confidence > 0.6 else (50, 180, 230) if hand_confidence > 0.3 else (200, 80, 80)
+    cv2.rectangle(frame, (meter_x, meter_y), (meter_x + fill_w, meter_y + meter_h), biz_color, -1, cv2.LINE_AA)
+    return frame
+
+def _panel_sprite(rect, alpha=0.36):
+    """The frosted panel behind a button: white at `alpha` over rect grown by 8 px."""
+    x1, y1, x2, y2 = rect
+    canvas = SpriteCanvas(x2 - x1 + 17, y2 - y1 + 17, x1 - 8, y1 - 8)
+
+    def panel(mask, o):
+        mask[:] = 255
+
+    return canvas.paint(panel, (255, 255, 255), alpha).sprite()
+
+def _label_fit(rect, text):
+    """Label scale factor that keeps the text within 80% of the button width."""
+    tw = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.9 * 1.08, 3)[0][0]
+    return min(1.0, 0.8 * (rect[2] - rect[0]) / max(1, tw))
+
+class MenuRenderer:
+    """
+    Keeps a whole menu.Menu pre-composited in one OverlayLayer. update() only
+    re-renders the items whose hover level (quantized to LEVELS steps) changed,
+    plus whatever overlaps their region; draw() is one banded blend, so the
+    per-frame cost does not grow with the number of buttons.
+    """
+
+    LEVELS = 12
+    PAD = GLOW_RADIUS + 4     # glow, panel and label overhang around an item's rect
+
+    def __init__(self, menu, w, h):
+        self.menu = menu.layout(w, h)
+        self.size = (w, h)
+        self.levels = {}        # key -> quantized hover level, 0 omitted
+        self.redraws = 0
+        self.fit = {item.key: _label_fit(item.rect, item.label) for item in menu.items}
+        extents = [self._extent(item) for item in menu.items]
+        x1, y1 = max(0, min(e[0] for e in extents)), max(0, min(e[1] for e in extents))
+        x2, y2 = min(w, max(e[2] for e in extents)), min(h, max(e[3] for e in extents))
+        self.layer = OverlayLayer(x2 - x1, y2 - y1, x1, y1)
+        self._render(self.layer.bounds())
+
+    def _extent(self, item):
+        x1, y1, x2, y2 = item.rect
+        return x1 - self.PAD, y1 - self.PAD, x2 + self.PAD + 1, y2 + self.PAD + 1
+
+    def _render(self, region):
+        pad = self.PAD
+        nearby = self.menu.grid.query((region[0] - pad, region[1] - pad, region[2] + pad, region[3] + pad))
+        self.layer.clear(region)
+        for item in sorted(nearby, key=lambda it: it.z):
+            self._paint(item, region)
+        self.layer.commit(region)
+        self.redraws += 1
+
+    def _paint(self, item, region):
+        w, h = self.size
+        x1, y1, x2, y2 = item.rect
+        rect = (int(max(0, x1)), int(max(0, y1)), int(min(w - 1, x2)), int(min(h - 1, y2)))
+        if rect[2] <= rect[0] or rect[3] <= rect[1]:
+            return
+        hover = self.levels.get(item.key, 0) / self.LEVELS
+        scale = round((1.0 + hover * 0.08) * self.fit[item.key], 2)
+        add = self.layer.add
+        add(layers.get(("panel", item.rect), lambda: _panel_sprite(item.rect)), region)
+        add(layers.get(("button", rect), lambda: _button_body_sprite(rect)), region)
+        if hover > 0:
+            add(layers.get(("glow", rect), lambda: _button_glow_sprite(rect)), region, opacity=hover)
+        add(layers.get(("label", rect, item.label, scale), lambda: _button_label_sprite(rect, item.label, scale)),
+            region)
+        add(layers.get(("shine", rect), lambda: _button_shine_sprite(rect)), region)
+
+    def update(self, hover):
+        """hover: {key: level in [0, 1]} as from Menu.hover. Returns how many items were re-rendered."""
+        levels = {}
+        for key, level in hover.items():
+            q = int(round(level * self.LEVELS))
+            if q:
+                levels[key] = q
+        changed = [key for key in set(levels) | set(self.levels) if levels.get(key) != self.levels.get(key)]
+        self.levels = levels
+        for key in changed:
+            self._render(self._extent(self.menu[key]))
+        return len(changed)
+
+    def draw(self, frame, work=None):
+        return self.layer.draw(frame, work)
+
+def _report_allocations(counter, work):
+    if counter is None:
+        return
+    counter.stop()
+    print(f"[INFO] Full-frame allocations: {counter.summary()}; work buffer allocations: {work.allocations}")
+
 # --------- Main run function ----------
-def run_gui():
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
+def run_gui(source=None, count_allocations=False, menu=None):
+    """
+    Shows the launch menu until a button is pinched (returns that item's result,
+    e.g. "LAUNCH"), 'q' is pressed or the source runs out (None).
+    source: a frame_source.FrameSource or spec string; defaults to the webcam.
+    With "shm[:NAME]" frames (and landmarks, if it detects) come from a running
+    camera_broker, which keeps the camera open after the menu closes.
+    menu: a menu.Menu; defaults to Menu() (launch all / gesture only / voice only).
+    count_allocations: track per-frame allocations with tracemalloc and print how
+    many frames allocated a full frame's worth of memory (slows the loop down).
+    """
+    cap = CameraSource(0) if source is None else open_source(source)
+    if not cap.is_opened():
         print("Camera not accessible")
         return None
 
@@ -137,116 +405,105 @@ def run_gui():
     except Exception:
         pass
 
+    menu = menu or Menu()
+    renderer = None
     trail = deque()
     trail_max_len = 18
     last_click_time = 0
 
+    # Every per-frame array lives in `work`; nothing frame-sized is allocated per frame
+    work = WorkBuffers()
+    raw = None
+    counter = None
+    read_failures = 0
+    detect_errors = 0
+
     while True:
-        success, frame = cap.read()
+        if counter is not None:
+            counter.frame_begin()
+        t_frame = FRAME_SPAN.start()
+        success, frame_read = cap.read(raw)
         if not success:
-            break
-        frame = cv2.flip(frame, 1)
-        h, w = frame.shape[:2]
-
-        # Background blur + grid
-        bg = cv2.GaussianBlur(frame, (9, 9), 8)
-        grid = bg.copy()
-        step = 60
-        for gx in range(0, w, step):
-            cv2.line(grid, (gx, 0), (gx, h), (80, 60, 120), 1)
-        for gy in range(0, h, step):
-            cv2.line(grid, (0, gy), (w, gy), (80, 60, 120), 1)
-        frame = cv2.addWeighted(bg, 0.84, grid, 0.16, 0)
-
-        # Title
-        title_y = int(h * 0.18)
-        title = "Virtual World"
-        glow = abs(math.sin(time.time() * 1.6))
-        t_size = cv2.getTextSize(title, cv2.FONT_HERSHEY_SCRIPT_COMPLEX, 2.2, 6)[0]
-        tx = (w - t_size[0]) // 2
-        ty = title_y
-        shadow_col = (30, 40, 80)
-        cv2.putText(frame, title, (tx + 6, ty + 6), cv2.FONT_HERSHEY_SCRIPT_COMPLEX, 2.2, shadow_col, 6, cv2.LINE_AA)
-        cv2.putText(frame, title, (tx, ty), cv2.FONT_HERSHEY_SCRIPT_COMPLEX, 2.2, (255, 255, 255), int(2 + 3 * glow), cv2.LINE_AA)
-
-        # Single central LAUNCH button
-        center_btn = (w // 2, int(h * 0.57))
-        b_w = int(w * 0.32)
-        b_h = int(h * 0.12)
-        bx1 = center_btn[0] - b_w // 2
-        by1 = center_btn[1] - b_h // 2
-        bx2 = center_btn[0] + b_w // 2
-        by2 = center_btn[1] + b_h // 2
-
-        frame = draw_frosted_panel(frame, bx1 - 8, by1 - 8, bx2 + 8, by2 + 8, alpha=0.36)
-
-        # Hand detection
-        try:
-            img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = hands.process(img_rgb)
-        except Exception:
-            results = None
-
-        hover_btn = 0.0
+            # a broker that is restarting times out a read or two; a camera that is gone keeps failing
+            READ_FAILURES.inc()
+            read_failures += 1
+            if cap.eof or read_failures >= MAX_READ_FAILURES:
+                break
+            continue
+        raw = frame_read
+        read_failures = 0
+        h, w = raw.shape[:2]
+        flipped = cv2.flip(raw, 1, dst=work.get("flipped", raw.shape))
+        frame = draw_backdrop(flipped, work)
+        if renderer is None or renderer.size != (w, h):
+            renderer = MenuRenderer(menu, w, h)
+
+        # Hand detection (skipped when a camera broker already published landmarks)
+        hand_frame = cap.hand_frame()
+        if hand_frame is None:
+            t_detect = DETECT_SPAN.start()
+            try:
+                img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=work.get("rgb", frame.shape))
+                handedness, scores, lms = extractor.extract(hands.process(img_rgb))
+                hand_frame = HandFrame(handedness, lms, w, h, scores)
+            except Exception as e:
+                DETECT_ERRORS.inc()
+                detect_errors += 1
+                if detect_errors == 1:
+                    print(f"[WARNING] Hand detection failed: {e}")
+                hand_frame = None
+            DETECT_SPAN.stop(t_detect)
+        t_render = RENDER_SPAN.start()
+
+        hover = {}
         finger_dist = None
         cursor_pos = None
         hand_confidence = 0.0
 
-        if results and getattr(results, "multi_hand_landmarks", None):
-            hand = results.multi_hand_landmarks[0]
-            landmarks = [(int(lm.x * w), int(lm.y * h)) for lm in hand.landmark]
-
+        if hand_frame is not None and len(hand_frame):
             # Thumb + Index for click
-            p_index, p_thumb = landmarks[8], landmarks[4]
+            p_index = hand_frame.point(0, INDEX_TIP)
             cursor_pos = p_index
-            finger_dist = dist(p_index, p_thumb)
+            finger_dist = float(hand_frame.pinch[0])
             hand_confidence = 1.0
             trail.appendleft((p_index[0], p_index[1], time.time()))
             if len(trail) > trail_max_len:
                 trail.pop()
 
-            db = dist(p_index, center_btn)
-            hover_btn = max(0.0, min(1.0, (260 - db) / 200))
+            hover = menu.hover(*p_index)
 
             joined = finger_dist is not None and finger_dist < 40
             now = time.time()
             if joined and now - last_click_time > 0.45:
                 last_click_time = now
-                x, y = p_index
-                if bx1 < x < bx2 and by1 < y < by2:
+                item = menu.hit(*p_index)
+                if item is not None:
                     play_click_sound()
 
                     def frame_func():
-                        ret, f = cap.read()
+                        ret, f = cap.read(raw)
                         if not ret:
                             return frame
-                        f = cv2.flip(f, 1)
-                        f = cv2.GaussianBlur(f, (9, 9), 8)
-                        f = cv2.addWeighted(f, 0.9, frame, 0.1, 0)
-                        return f
+                        cv2.flip(f, 1, dst=flipped)
+                        loading = work.get("loading", frame.shape)
+                        cv2.GaussianBlur(flipped, (9, 9), 8, dst=loading)
+                        cv2.addWeighted(loading, 0.9, frame, 0.1, 0, dst=loading)
+                        return loading
 
                     show_loading(frame_func, "Launching...", duration=1.2)
                     cap.release()
                     cv2.destroyAllWindows()
-                    return "LAUNCH"
+                    _report_allocations(counter, work)
+                    return item.result
 
-            mpDraw.draw_landmarks(frame, hand, mpHands.HAND_CONNECTIONS,
-                                  mpDraw.DrawingSpec(color=(80, 220, 180), thickness=1, circle_radius=2),
-                                  mpDraw.DrawingSpec(color=(80, 140, 220), thickness=1))
+            draw_hand_skeleton(frame, hand_frame)
 
         # hand trail
-        if len(trail) > 1:
-            for i in range(len(trail) - 1):
-                x1t, y1t, t1 = trail[i]
-                x2t, y2t, t2 = trail[i + 1]
-                age = time.time() - t1
-                alpha = max(0.0, 1.0 - age * 1.2)
-                col = (int(120 * alpha + 10), int(200 * alpha + 10), int(255 * alpha + 10))
-                thickness = int(6 * alpha) + 1
-                cv2.line(frame, (x1t, y1t), (x2t, y2t), col, thickness, cv2.LINE_AA)
-
-        scale = 1.0 + hover_btn * 0.08
-        frame = draw_gradient_round_button(frame, bx1, by1, bx2, by2, "LAUNCH", glow=hover_btn, scale=scale)
+        draw_trail(frame, trail, time.time())
+
+        # menu buttons: re-render only those whose hover changed, then one blend
+        renderer.update(hover)
+        renderer.draw(frame, work)
 
         if finger_dist is not None and cursor_pos is not None:
             px, py = cursor_pos
@@ -258,24 +515,43 @@ def run_gui():
                             cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 180, 120), 2, cv2.LINE_AA)
 
         # hand confidence meter
-        meter_x, meter_y = int(w * 0.86), int(h * 0.90)
-        meter_w, meter_h = int(w * 0.10), int(h * 0.03)
-        cv2.rectangle(frame, (meter_x, meter_y), (meter_x + meter_w, meter_y + meter_h), (30, 30, 40), -1, cv2.LINE_AA)
-        fill_w = int(meter_w * hand_confidence)
-        biz_color = (50, 200, 120) if hand_confidence > 0.6 else (50, 180, 230) if hand_confidence > 0.3 else (200, 80, 80)
-        cv2.rectangle(frame, (meter_x, meter_y), (meter_x + fill_w, meter_y + meter_h), biz_color, -1, cv2.LINE_AA)
-        cv2.putText(frame, "Hand", (meter_x - 60, meter_y + meter_h), cv2.FONT_HERSHEY_SIMPLEX, 0.55,
-                    (220, 220, 220), 1, cv2.LINE_AA)
-
-        frame = draw_neon_border(frame, intensity=0.6)
+        draw_hand_meter(frame, hand_confidence, work)
+
+        draw_neon_border(frame, intensity=0.6)
+        RENDER_SPAN.stop(t_render)
         cv2.imshow("Main Menu - Gesture Controlled", frame)
+        FRAMES.inc()
+        FRAME_SPAN.stop(t_frame)
+        if counter is not None:
+            counter.frame_end()
+        elif count_allocations:
+            # start after the first frame, which allocates the work buffers
+            counter = AllocationCounter(raw.nbytes).start()
         if cv2.waitKey(1) & 0xFF == ord('q'):
             break
 
     cap.release()
     cv2.destroyAllWindows()
+    _report_allocations(counter, work)
+    if detect_errors:
+        print(f"[WARNING] Hand detection failed on {detect_errors} frames.")
     return None
 
 if __name__ == "__main__":
-    choice = run_gui()
+    import argparse
+    parser = argparse.ArgumentParser(description="Virtual World launch menu")
+    parser.add_argument("--source", default=None,
+                        help="camera index, video file, image directory, synthetic[:WxH[:N]] or shm[:NAME]")
+    parser.add_argument("--realtime", action="store_true",
+                        help="pace file/synthetic sources at their FPS instead of full speed")
+    parser.add_argument("--count-allocs", action="store_true",
+                        help="report frames that allocated a full frame (tracemalloc)")
+    parser.add_argument("--metrics", default=None,
+                        help="write gui.prom (Prometheus text) and gui.trace.json to this directory")
+    args = parser.parse_args()
+    if args.metrics:
+        metrics.enable_in(args.metrics, "gui")
+    choice = run_gui(open_source(args.source, realtime=args.realtime) if args.source else None,
+                     count_allocations=args.count_allocs)
+    metrics.disable()
     print("User selected:", choice)
\ No newline at end of file
@@ -0,0 +1,430 @@
+# gui_layers.py
+"""
+Pre-rendered layers for the launch menu.
+
+Static parts of the menu (grid, title, button body, meter frame) are painted
+once per resolution into a SpriteCanvas and frozen as a Sprite: a BGRA image
+stored premultiplied, cropped to its visible pixels. Per frame a sprite is
+composited onto the camera frame with one integer blend over its bounding box,
+or over just its pixels when it is sparse (e.g. grid lines), instead of being
+redrawn with cv2 calls and full-frame addWeighted passes.
+
+LayerCache keeps built sprites keyed by whatever determines their pixels
+(resolution, rectangle, text, ...), evicting the least recently used.
+gradient_ramp() and falloff_mask() build colour ramps and glow alpha masks as
+arrays in one go; a glow sprite is faded per frame through draw(opacity=...).
+OverlayLayer pre-composites many sprites (a whole menu) into one layer that
+is only re-rendered where something changed.
+
+WorkBuffers holds the per-frame arrays (flipped frame, backdrop, RGB copy,
+blend scratch) so the menu loop reuses them instead of allocating new frames;
+AllocationCounter checks that with tracemalloc.
+"""
+
+import tracemalloc
+from collections import OrderedDict
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+SPARSE_COVERAGE = 0.25     # sprites covering less of their bounding box than this are drawn per pixel
+
+
+# -----------------------------
+# Sprite
+# -----------------------------
+class Sprite:
+    """A BGRA image at (x, y) in frame coordinates, ready to alpha-blend onto BGR frames."""
+
+    def __init__(self, bgra, x=0, y=0):
+        alpha = bgra[..., 3]
+        ys, xs = np.nonzero(alpha)
+        self.empty = len(ys) == 0
+        if self.empty:
+            self.x, self.y, self.w, self.h = x, y, 0, 0
+            self.sparse = False
+            return
+        y0, y1, x0, x1 = ys.min(), ys.max() + 1, xs.min(), xs.max() + 1
+        self.x, self.y = x + int(x0), y + int(y0)
+        self.w, self.h = int(x1 - x0), int(y1 - y0)
+
+        a = alpha.astype(np.uint16)
+        c = bgra[..., :3].astype(np.uint16)
+        self.sparse = len(ys) < SPARSE_COVERAGE * self.w * self.h
+        if self.sparse:
+            # per pixel: out = (dst * (255 - a) + color * a + 127) // 255 in uint16
+            self.ys = (ys + y).astype(np.intp)
+            self.xs = (xs + x).astype(np.intp)
+            a, c = a[ys, xs][:, None], c[ys, xs]
+            self.inv = 255 - a
+            self.pm = c * a + 127
+        else:
+            # dense: out = dst * inv / 255 + pm with saturating uint8 cv2 arithmetic
+            a, c = a[y0:y1, x0:x1][..., None], c[y0:y1, x0:x1]
+            self.inv = np.repeat(255 - a, 3, axis=2).astype(np.uint8)
+            self.pm = ((c * a + 127) // 255).astype(np.uint8)
+        self.alpha, self.color = a, c
+
+    def draw(self, frame, work=None, opacity=1.0):
+        """
+        Blends the sprite onto a BGR uint8 frame in place; returns the frame.
+        work: optional WorkBuffers whose scratch space holds the blend temporaries.
+        opacity: scales the sprite's alpha for this draw (e.g. a pulsing glow).
+        """
+        if self.empty or opacity <= 0:
+            return frame
+        fh, fw = frame.shape[:2]
+        level = min(256, int(opacity * 256))
+        if self.sparse:
+            ys, xs = self.ys, self.xs
+            inside = slice(None)
+            if self.x < 0 or self.y < 0 or self.x + self.w > fw or self.y + self.h > fh:
+                inside = (ys >= 0) & (ys < fh) & (xs >= 0) & (xs < fw)
+                ys, xs = ys[inside], xs[inside]
+            px = frame[ys, xs].astype(np.uint16)
+            if level >= 256:
+                frame[ys, xs] = (px * self.inv[inside] + self.pm[inside]) // 255
+            else:
+                a = (self.alpha[inside] * level) >> 8
+                frame[ys, xs] = (px * (255 - a) + self.color[inside] * a + 127) // 255
+            return frame
+        x0, y0 = max(0, self.x), max(0, self.y)
+        x1, y1 = min(fw, self.x + self.w), min(fh, self.y + self.h)
+        if x1 <= x0 or y1 <= y0:
+            return frame
+        rows = slice(y0 - self.y, y1 - self.y)
+        cols = slice(x0 - self.x, x1 - self.x)
+        roi = frame[y0:y1, x0:x1]
+        if level >= 256:
+            _blend(roi, self.inv[rows, cols], self.pm[rows, cols], work)
+            return frame
+        alpha, color = self.alpha[rows, cols], self.color[rows, cols]
+        if work is None:
+            a = (alpha * level) >> 8
+            inv = np.repeat(255 - a, 3, axis=2).astype(np.uint8)
+            pm = ((color * a + 127) // 255).astype(np.uint8)
+        else:
+            a = work.scratch(alpha.shape, np.uint16, slot="alpha")
+            np.multiply(alpha, level, out=a)
+            np.right_shift(a, 8, out=a)
+            wide = work.scratch(roi.shape, np.uint16, slot="color")
+            np.multiply(color, a, out=wide)
+            np.add(wide, 127, out=wide)
+            np.floor_divide(wide, 255, out=wide)
+            pm = work.scratch(roi.shape, np.uint8, slot="pm")
+            pm[...] = wide
+            np.subtract(255, a, out=a)
+            inv = work.scratch(roi.shape, np.uint8, slot="inv")
+            inv[...] = a
+        _blend(roi, inv, pm, work)
+        return frame
+
+    def dense(self):
+        """(alpha (h, w, 1), color (h, w, 3)) uint16 arrays over the bounding box."""
+        if not self.sparse:
+            return self.alpha, self.color
+        alpha = np.zeros((self.h, self.w, 1), np.uint16)
+        color = np.zeros((self.h, self.w, 3), np.uint16)
+        alpha[self.ys - self.y, self.xs - self.x] = self.alpha
+        color[self.ys - self.y, self.xs - self.x] = self.color
+        return alpha, color
+
+
+def _blend(roi, inv, pm, work=None):
+    """roi = roi * inv / 255 + pm in place (uint8, 3 channels), using work's scratch space if given."""
+    tmp = work.scratch(roi.shape, np.uint8) if work is not None else None
+    tmp = cv2.multiply(roi, inv, dst=tmp, scale=1 / 255.0)
+    cv2.add(tmp, pm, dst=roi)
+
+
+# -----------------------------
+# Building sprites
+# -----------------------------
+@lru_cache(maxsize=64)
+def gradient_ramp(length, palette):
+    """
+    Lookup table of `length` BGR colours (uint8, read-only) running through the
+    palette's colours at even spacing; cached per (length, palette). Values are
+    truncated like int(lerp(...)).
+    """
+    stops = np.linspace(0.0, 1.0, len(palette))
+    t = np.linspace(0.0, 1.0, length)
+    colors = np.asarray(palette, np.float64)
+    ramp = np.stack([np.interp(t, stops, colors[:, k]) for k in range(3)], axis=1).astype(np.uint8)
+    ramp.flags.writeable = False
+    return ramp
+
+
+def falloff_mask(w, h, rect, radius):
+    """
+    float32 (h, w) alpha in [0, 1] that fades linearly from 1 at the edge of
+    rect = (x1, y1, x2, y2) to 0 at `radius` pixels outside it; 0 inside.
+    """
+    x1, y1, x2, y2 = rect
+    outside = np.full((h, w), 255, np.uint8)
+    outside[max(0, y1):y2 + 1, max(0, x1):x2 + 1] = 0
+    distance = cv2.distanceTransform(outside, cv2.DIST_L2, 5)
+    mask = np.clip(1.0 - distance / (radius + 1.0), 0.0, 1.0)
+    mask[outside == 0] = 0.0
+    return mask
+
+
+class SpriteCanvas:
+    """
+    Transparent float canvas covering (x, y, w, h) of the frame. Shapes are
+    drawn as 8-bit coverage masks and composited "over" what is already there,
+    so anti-aliased cv2 drawing turns into partial alpha.
+    """
+
+    def __init__(self, w, h, x=0, y=0):
+        self.x, self.y, self.w, self.h = x, y, w, h
+        self.color = np.zeros((h, w, 3), np.float32)
+        self.alpha = np.zeros((h, w), np.float32)
+
+    def paint(self, draw, color, opacity=1.0):
+        """
+        draw(mask, offset) draws with value 255 into a uint8 (h, w) mask; offset is
+        (-x, -y) for converting frame coordinates. color is a BGR tuple or an
+        (h, w, 3) array (for gradients).
+        """
+        mask = np.zeros((self.h, self.w), np.uint8)
+        draw(mask, (-self.x, -self.y))
+        a = mask.astype(np.float32) * (opacity / 255.0)
+        keep = self.alpha * (1.0 - a)
+        out_alpha = a + keep
+        color = np.broadcast_to(np.asarray(color, np.float32), self.color.shape)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            blended = (color * a[..., None] + self.color * keep[..., None]) / out_alpha[..., None]
+        self.color = np.where(out_alpha[..., None] > 0, blended, 0.0).astype(np.float32)
+        self.alpha = out_alpha
+        return self
+
+    def opacity(self, factor):
+        """Scales the whole canvas' alpha (group opacity)."""
+        self.alpha *= factor
+        return self
+
+    def sprite(self):
+        bgra = np.empty((self.h, self.w, 4), np.uint8)
+        bgra[..., :3] = np.clip(np.rint(self.color), 0, 255)
+        bgra[..., 3] = np.clip(np.rint(self.alpha * 255), 0, 255)
+        return Sprite(bgra, self.x, self.y)
+
+
+# -----------------------------
+# Pre-composited overlay
+# -----------------------------
+def _intersect(a, b):
+    """Intersection of half-open rects (x1, y1, x2, y2), or None."""
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    if x2 <= x1 or y2 <= y1:
+        return None
+    return x1, y1, x2, y2
+
+
+class OverlayLayer:
+    """
+    Many sprites composited ahead of time into one premultiplied layer covering
+    (x, y, w, h) of the frame. A changed region is re-rendered with clear(rect),
+    add(sprite, rect, opacity) for each sprite overlapping it, then commit(rect).
+    draw() blends the layer in horizontal bands, each limited to the columns
+    that have content, so its per-frame cost depends on the covered area and not
+    on how many sprites went into it. Rects are half-open, in frame coordinates.
+    """
+
+    def __init__(self, w, h, x=0, y=0, band=64):
+        self.x, self.y, self.w, self.h = x, y, w, h
+        self.band = band
+        self.alpha = np.zeros((h, w), np.float32)
+        self.premul = np.zeros((h, w, 3), np.float32)
+        self.inv = np.full((h, w, 3), 255, np.uint8)
+        self.pm = np.zeros((h, w, 3), np.uint8)
+        self.spans = [[] for _ in range((h + band - 1) // band)]     # per band: [(x1, x2)] column runs with content
+
+    def bounds(self):
+        return self.x, self.y, self.x + self.w, self.y + self.h
+
+    def _local(self, rect):
+        r = _intersect(rect, self.bounds())
+        if r is None:
+            return None
+        return r[0] - self.x, r[1] - self.y, r[2] - self.x, r[3] - self.y
+
+    def clear(self, rect):
+        r = self._local(rect)
+        if r is not None:
+            x1, y1, x2, y2 = r
+            self.alpha[y1:y2, x1:x2] = 0
+            self.premul[y1:y2, x1:x2] = 0
+
+    def add(self, sprite, rect, opacity=1.0):
+        """Composites sprite "over" the layer, limited to rect."""
+        if sprite.empty or opacity <= 0:
+            return
+        r = _intersect(rect, (sprite.x, sprite.y, sprite.x + sprite.w, sprite.y + sprite.h))
+        r = r and self._local(r)
+        if r is None:
+            return
+        x1, y1, x2, y2 = r
+        sx, sy = x1 + self.x - sprite.x, y1 + self.y - sprite.y
+        alpha, color = sprite.dense()
+        a = np.multiply(alpha[sy:sy + y2 - y1, sx:sx + x2 - x1], opacity / 255.0, dtype=np.float32)
+        c = color[sy:sy + y2 - y1, sx:sx + x2 - x1]
+        premul, layer_alpha = self.premul[y1:y2, x1:x2], self.alpha[y1:y2, x1:x2, None]
+        keep = 1.0 - a
+        premul *= keep
+        premul += c * a
+        layer_alpha *= keep
+        layer_alpha += a
+
+    def commit(self, rect):
+        """Refreshes the integer blend arrays and band spans under rect."""
+        r = self._local(rect)
+        if r is None:
+            return
+        x1, y1, x2, y2 = r
+        coverage = np.rint(self.alpha[y1:y2, x1:x2, None] * 255)
+        np.subtract(255, coverage, out=self.inv[y1:y2, x1:x2], casting="unsafe")
+        np.rint(self.premul[y1:y2, x1:x2], out=self.pm[y1:y2, x1:x2], casting="unsafe")
+        for b in range(y1 // self.band, (y2 - 1) // self.band + 1):
+            self.spans[b] = _runs(self.inv[b * self.band:(b + 1) * self.band, :, 0].min(axis=0) < 255, self.band)
+
+    def draw(self, frame, work=None):
+        fh, fw = frame.shape[:2]
+        for b, spans in enumerate(self.spans):
+            y1 = self.y + b * self.band
+            y2 = min(y1 + self.band, self.y + self.h)
+            for sx1, sx2 in spans:
+                r = _intersect((self.x + sx1, y1, self.x + sx2, y2), (0, 0, fw, fh))
+                if r is None:
+                    continue
+                fx1, fy1, fx2, fy2 = r
+                lx1, ly1 = fx1 - self.x, fy1 - self.y
+                rows, cols = slice(ly1, ly1 + fy2 - fy1), slice(lx1, lx1 + fx2 - fx1)
+                _blend(frame[fy1:fy2, fx1:fx2], self.inv[rows, cols], self.pm[rows, cols], work)
+        return frame
+
+
+def _runs(mask, min_gap):
+    """[(start, stop)] runs of True in a 1-D mask, merging runs separated by fewer than min_gap."""
+    idx = np.flatnonzero(mask)
+    if not len(idx):
+        return []
+    breaks = np.flatnonzero(np.diff(idx) > min_gap)
+    starts = np.concatenate(([idx[0]], idx[breaks + 1]))
+    stops = np.concatenate((idx[breaks], [idx[-1]])) + 1
+    return list(zip(starts.tolist(), stops.tolist()))
+
+
+# -----------------------------
+# Cache
+# -----------------------------
+class LayerCache:
+    """LRU of built layers: get(key, build) calls build() only on a miss."""
+
+    def __init__(self, max_items=64):
+        self.max_items = max_items
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+
+    def get(self, key, build):
+        item = self._items.get(key)
+        if item is not None:
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item
+        self.misses += 1
+        item = build()
+        self._items[key] = item
+        if len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+        return item
+
+    def clear(self):
+        self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+# -----------------------------
+# Reusable buffers
+# -----------------------------
+class WorkBuffers:
+    """
+    Named arrays reused across frames. get() allocates only when a name is new
+    or its shape / dtype changed (e.g. a resolution switch); `allocations`
+    counts those.
+    """
+
+    def __init__(self):
+        self.allocations = 0
+        self._arrays = {}
+
+    def get(self, name, shape, dtype=np.uint8):
+        arr = self._arrays.get(name)
+        if arr is None or arr.shape != shape or arr.dtype != dtype:
+            arr = np.empty(shape, dtype)
+            self._arrays[name] = arr
+            self.allocations += 1
+        return arr
+
+    def scratch(self, shape, dtype, slot="blend"):
+        """
+        A view of a growable flat buffer, for temporaries that die within one call.
+        Views from the same slot alias each other; use distinct slots for values
+        needed at the same time.
+        """
+        n = int(np.prod(shape))
+        key = ("scratch", slot, np.dtype(dtype).str)
+        buf = self._arrays.get(key)
+        if buf is None or buf.size < n:
+            buf = np.empty(n, dtype)
+            self._arrays[key] = buf
+            self.allocations += 1
+        return buf[:n].reshape(shape)
+
+
+class AllocationCounter:
+    """
+    Counts frames that allocated at least `threshold` bytes at once (numpy and
+    cv2 arrays are visible to tracemalloc). Wrap each frame in frame_begin() /
+    frame_end(); with threshold = frame.nbytes this counts full-frame allocations.
+    """
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.frames = 0
+        self.frames_over = 0
+        self.max_bytes = 0
+        self._base = 0
+        self._owns = False
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns = True
+        return self
+
+    def frame_begin(self):
+        tracemalloc.reset_peak()
+        self._base = tracemalloc.get_traced_memory()[0]
+
+    def frame_end(self):
+        peak = tracemalloc.get_traced_memory()[1] - self._base
+        self.frames += 1
+        self.max_bytes = max(self.max_bytes, peak)
+        if peak >= self.threshold:
+            self.frames_over += 1
+
+    def stop(self):
+        if self._owns:
+            tracemalloc.stop()
+            self._owns = False
+
+    def summary(self):
+        return (f"{self.frames_over}/{self.frames} frames allocated >= {self.threshold} bytes "
+                f"(largest per-frame peak {self.max_bytes} bytes)")
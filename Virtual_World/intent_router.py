@@ -0,0 +1,219 @@
+# intent_router.py
+"""
+Declarative command table for the voice assistant, compiled into a token trie.
+
+Every intent is registered with one or more patterns of literal words and
+{slots}:
+
+    router = IntentRouter(slot_types={"number": ("word", parse_number)})
+    router.add("click", ["click number {number}"], handler)
+    router.add("open_app", ["open app {app}"], handler)
+    router.dispatch("please click number four", controller)   # handler(controller, number=4)
+
+Patterns share one trie, so matching an utterance costs a dict lookup per
+spoken word whatever the number of intents; adding commands does not make
+every utterance scan a longer if-chain. A slot type is ("word", convert) for
+one token or ("rest", convert) for everything up to the end of the
+utterance (the default, joined with spaces); convert returns None to reject
+a value. Misheard literals within one edit of a command word ("minimise",
+"maximise", "refesh") still match, at a lower score.
+
+When several patterns match, the best is the one that
+  1. skips the fewest words around it (at most max_skip; "please", "now"),
+  2. matches the most literal words (so "close window" beats "close {app}"),
+  3. needs the fewest fuzzy matches,
+  4. was registered first.
+
+If nothing matches that way and `loose` is on, words may also be skipped
+between a pattern's words, any number of them ("could you minimize the
+window", "enumerate the files please"). Then the match with the most literal
+words wins, and fewer skipped words, fewer fuzzy matches and registration
+order break ties.
+"""
+
+# Fuzzy matching: one edit, only for words at least this long
+FUZZY_MIN_LENGTH = 5
+FUZZY_CACHE_SIZE = 4096
+
+
+class Intent:
+    def __init__(self, name, patterns, handler, priority):
+        self.name = name
+        self.patterns = patterns
+        self.handler = handler
+        self.priority = priority
+
+    def __repr__(self):
+        return f"Intent({self.name!r})"
+
+
+class Match:
+    """A matched intent with its converted slot values."""
+
+    def __init__(self, intent, slots, skipped, literals, fuzzy):
+        self.intent = intent
+        self.slots = slots
+        self.skipped = skipped
+        self.literals = literals
+        self.fuzzy = fuzzy
+
+    def key(self):
+        return (self.skipped, -self.literals, self.fuzzy, self.intent.priority)
+
+    def loose_key(self):
+        return (-self.literals, self.skipped, self.fuzzy, self.intent.priority)
+
+    def __repr__(self):
+        return f"Match({self.intent.name!r}, {self.slots})"
+
+
+class _Node:
+    __slots__ = ("children", "slots", "rest", "ends")
+
+    def __init__(self):
+        self.children = {}   # literal word -> _Node
+        self.slots = {}      # one-word slot name -> _Node
+        self.rest = []       # (slot name, Intent, literal count): slot takes the remaining words
+        self.ends = []       # (Intent, literal count) for patterns ending here
+
+
+def _deletions(word):
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+class IntentRouter:
+    """
+    Compiled command table. slot_types: {slot name: ("word" | "rest", convert)};
+    unlisted slots take the rest of the utterance as a string. max_skip: how
+    many unmatched words before and after a pattern are tolerated. loose:
+    fall back to skipping words anywhere when nothing matches.
+    """
+
+    def __init__(self, slot_types=None, max_skip=2, fuzzy=True, loose=True):
+        self.slot_types = dict(slot_types or {})
+        self.max_skip = max_skip
+        self.fuzzy = fuzzy
+        self.loose = loose
+        self.intents = []
+        self._root = _Node()
+        self._vocabulary = set()
+        self._deleted = {}           # word with one letter deleted -> command words
+        self._fuzzy_cache = {}
+
+    def add(self, name, patterns, handler=None):
+        """Registers an intent; earlier intents win ties."""
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        intent = Intent(name, tuple(patterns), handler, len(self.intents))
+        for pattern in intent.patterns:
+            self._insert(intent, pattern)
+        self.intents.append(intent)
+        return intent
+
+    def _slot_type(self, slot):
+        return self.slot_types.get(slot, ("rest", " ".join))
+
+    def _insert(self, intent, pattern):
+        node = self._root
+        literals = 0
+        words = pattern.lower().split()
+        for i, word in enumerate(words):
+            if word.startswith("{") and word.endswith("}"):
+                slot = word[1:-1]
+                kind, _ = self._slot_type(slot)
+                if kind == "rest":
+                    if i != len(words) - 1:
+                        raise ValueError(f"{pattern!r}: slot {{{slot}}} takes the rest and must come last")
+                    node.rest.append((slot, intent, literals))
+                    return
+                node = node.slots.setdefault(slot, _Node())
+            else:
+                node = node.children.setdefault(word, _Node())
+                literals += 1
+                self._add_word(word)
+        node.ends.append((intent, literals))
+
+    def _add_word(self, word):
+        if word in self._vocabulary:
+            return
+        self._vocabulary.add(word)
+        self._fuzzy_cache.clear()
+        if len(word) >= FUZZY_MIN_LENGTH:
+            for d in _deletions(word):
+                self._deleted.setdefault(d, set()).add(word)
+
+    def similar(self, word):
+        """Command words one edit (insert, delete, substitute) away from `word`."""
+        found = self._fuzzy_cache.get(word)
+        if found is not None:
+            return found
+        found = set()
+        if len(word) >= FUZZY_MIN_LENGTH - 1:
+            found.update(self._deleted.get(word, ()))          # a letter missing
+            for d in _deletions(word):
+                if d in self._vocabulary and len(d) >= FUZZY_MIN_LENGTH:
+                    found.add(d)                               # a letter too many
+                found.update(self._deleted.get(d, ()))         # a letter wrong
+        found.discard(word)
+        found = tuple(sorted(found))
+        if len(self._fuzzy_cache) >= FUZZY_CACHE_SIZE:
+            self._fuzzy_cache.clear()
+        self._fuzzy_cache[word] = found
+        return found
+
+    # -----------------------------
+    # Matching
+    # -----------------------------
+    def match(self, text):
+        """Best Match for `text`, or None."""
+        words = text.lower().split()
+        best = None
+        for start in range(min(len(words), self.max_skip + 1)):
+            for match in self._walk(self._root, words, start, start, {}, 0, 0, False):
+                if best is None or match.key() < best.key():
+                    best = match
+        if best is None and self.loose:
+            for start in range(len(words)):
+                for match in self._walk(self._root, words, start, start, {}, 0, 0, True):
+                    if best is None or match.loose_key() < best.loose_key():
+                        best = match
+        return best
+
+    def _walk(self, node, words, start, i, slots, fuzzy, gaps, loose):
+        # gaps: words skipped between pattern words (loose matching only)
+        n = len(words)
+        skipped = start + gaps + n - i
+        if loose or skipped <= self.max_skip:
+            for intent, literals in node.ends:
+                yield Match(intent, dict(slots), skipped, literals, fuzzy)
+        if i >= n:
+            return
+        for j in range(i, n if loose and node is not self._root else i + 1):
+            word = words[j]
+            child = node.children.get(word)
+            if child is not None:
+                yield from self._walk(child, words, start, j + 1, slots, fuzzy, gaps + j - i, loose)
+            elif self.fuzzy and word not in self._vocabulary:
+                for alternative in self.similar(word):
+                    child = node.children.get(alternative)
+                    if child is not None:
+                        yield from self._walk(child, words, start, j + 1, slots, fuzzy + 1, gaps + j - i, loose)
+        word = words[i]
+        for slot, child in node.slots.items():
+            value = self._slot_type(slot)[1](word)
+            if value is not None:
+                yield from self._walk(child, words, start, i + 1, {**slots, slot: value}, fuzzy, gaps, loose)
+        for slot, intent, literals in node.rest:
+            value = self._slot_type(slot)[1](words[i:])
+            if value is not None:
+                yield Match(intent, {**slots, slot: value}, start + gaps, literals, fuzzy)
+
+    def dispatch(self, text, *args):
+        """
+        Calls the best intent's handler(*args, **slots) and returns
+        (match, handler result), or (None, None) if nothing matched.
+        """
+        match = self.match(text)
+        if match is None:
+            return None, None
+        return match, match.intent.handler(*args, **match.slots)
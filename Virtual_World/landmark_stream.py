@@ -0,0 +1,149 @@
+# landmark_stream.py
+"""
+Compact recording format for per-frame hand landmarks and a deterministic
+replay engine for the gesture state machine.
+
+A recording is a .npy file holding a NumPy structured array with one record
+per frame (see FRAME_DTYPE). Landmarks are stored normalized, exactly as
+Mediapipe reports them, so replay reproduces the live pixel conversion.
+Recordings are opened memory-mapped, so hours of data replay without loading
+everything into RAM.
+
+    python landmark_stream.py replay session.npy --history replay_history.jsonl
+"""
+
+import json
+import time
+
+import numpy as np
+
+from actuator import NullActuator
+from gesture_state import GestureStateMachine, ReplayClock
+from landmarks import MAX_HANDS, NUM_LANDMARKS, HandFrame
+
+FRAME_DTYPE = np.dtype([
+    ("t", "<f8"),                                            # clock value seen by the state machine
+    ("width", "<u2"),
+    ("height", "<u2"),
+    ("n_hands", "u1"),
+    ("handedness", "u1", (MAX_HANDS,)),                      # landmarks.HAND_* code per slot
+    ("score", "<f4", (MAX_HANDS,)),                          # handedness confidence
+    ("landmarks", "<f4", (MAX_HANDS, NUM_LANDMARKS, 3)),     # normalized x, y, z
+])
+
+
+# -----------------------------
+# Recording
+# -----------------------------
+class LandmarkRecorder:
+    """Buffers frames in fixed-size structured-array chunks and writes one .npy on close()."""
+
+    def __init__(self, path, chunk_size=4096):
+        self.path = path
+        self.chunk_size = chunk_size
+        self._chunks = []
+        self._chunk = np.zeros(chunk_size, dtype=FRAME_DTYPE)
+        self._pos = 0
+        self.count = 0
+
+    def add(self, t, hands):
+        """Records one frame from a landmarks.HandFrame."""
+        rec = self._next_record()
+        rec["t"] = t
+        rec["width"] = hands.w
+        rec["height"] = hands.h
+        n = min(len(hands), MAX_HANDS)
+        rec["n_hands"] = n
+        rec["handedness"][:n] = hands.handedness[:n]
+        rec["score"][:n] = hands.scores[:n]
+        rec["landmarks"][:n] = hands.landmarks[:n]
+
+    def _next_record(self):
+        if self._pos == self.chunk_size:
+            self._chunks.append(self._chunk)
+            self._chunk = np.zeros(self.chunk_size, dtype=FRAME_DTYPE)
+            self._pos = 0
+        rec = self._chunk[self._pos]
+        self._pos += 1
+        self.count += 1
+        return rec
+
+    def close(self):
+        frames = np.concatenate(self._chunks + [self._chunk[:self._pos]])
+        np.save(self.path, frames)
+        self._chunks = []
+        self._pos = 0
+        return frames
+
+
+def open_recording(path):
+    """Opens a recording memory-mapped (read-only)."""
+    frames = np.load(path, mmap_mode="r")
+    if frames.dtype != FRAME_DTYPE:
+        raise ValueError(f"{path} is not a landmark recording (dtype {frames.dtype})")
+    return frames
+
+
+def to_hand_frame(rec):
+    """Builds the landmarks.HandFrame for one record, as gesture.detect_hands does live."""
+    n = int(rec["n_hands"])
+    return HandFrame(rec["handedness"][:n], rec["landmarks"][:n],
+                     int(rec["width"]), int(rec["height"]), rec["score"][:n])
+
+
+# -----------------------------
+# Replay
+# -----------------------------
+def replay(frames, actuator=None, machine=None):
+    """
+    Runs every recorded frame through the gesture state machine as fast as
+    possible, with the clock driven by the recorded timestamps.
+    Returns a stats dict (frames, actions, elapsed, decisions_per_sec, speedup).
+    """
+    if isinstance(frames, str):
+        frames = open_recording(frames)
+    clock = ReplayClock()
+    if machine is None:
+        machine = GestureStateMachine(actuator or NullActuator(), clock=clock)
+    else:
+        machine.clock = clock
+
+    start = time.perf_counter()
+    for rec in frames:
+        clock.t = float(rec["t"])
+        machine.update(to_hand_frame(rec))
+    elapsed = time.perf_counter() - start
+
+    n = len(frames)
+    recorded = float(frames[-1]["t"] - frames[0]["t"]) if n > 1 else 0.0
+    return {
+        "frames": n,
+        "actions": machine.actions,
+        "recorded_seconds": recorded,
+        "elapsed": elapsed,
+        "decisions_per_sec": n / elapsed if elapsed > 0 else 0.0,
+        "speedup": recorded / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def _main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Replay landmark recordings through the gesture state machine")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_replay = sub.add_parser("replay")
+    p_replay.add_argument("recording")
+    p_replay.add_argument("--history", default=None,
+                          help="append the result as a JSON line to this file")
+    args = parser.parse_args()
+
+    stats = replay(args.recording)
+    stats["recording"] = args.recording
+    stats["timestamp"] = time.time()
+    print(json.dumps(stats))
+    if args.history:
+        with open(args.history, "a") as f:
+            f.write(json.dumps(stats) + "\n")
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,114 @@
+# landmarks.py
+"""
+Vectorized hand-landmark representation.
+Mediapipe results are copied in one step into a preallocated
+(hands x 21 x 3) float32 array; finger states, pinch distances and bounding
+boxes are then computed for all hands at once with NumPy.
+"""
+
+from itertools import chain
+
+import numpy as np
+
+MAX_HANDS = 2
+NUM_LANDMARKS = 21
+
+# handedness codes
+HAND_NONE = 0
+HAND_RIGHT = 1
+HAND_LEFT = 2
+
+THUMB_TIP, THUMB_IP, INDEX_TIP = 4, 3, 8
+TIP_IDS = np.array([8, 12, 16, 20])
+PIP_IDS = np.array([6, 10, 14, 18])
+
+
+# -----------------------------
+# Extraction
+# -----------------------------
+class LandmarkExtractor:
+    """Reusable buffers for copying Mediapipe Hands results into arrays."""
+
+    def __init__(self, max_hands=MAX_HANDS):
+        self.max_hands = max_hands
+        self.landmarks = np.zeros((max_hands, NUM_LANDMARKS, 3), dtype=np.float32)
+        self.handedness = np.zeros(max_hands, dtype=np.uint8)
+        self.scores = np.zeros(max_hands, dtype=np.float32)
+        self._flat = self.landmarks.reshape(-1)
+
+    def extract(self, result):
+        """
+        Returns (handedness, scores, landmarks) views over the first n hands,
+        with normalized x, y, z. The views are overwritten by the next call.
+        """
+        hands = []
+        if result is not None and result.multi_hand_landmarks and result.multi_handedness:
+            hands = list(zip(result.multi_hand_landmarks, result.multi_handedness))[:self.max_hands]
+        n = len(hands)
+        if n:
+            self._flat[:n * NUM_LANDMARKS * 3] = np.fromiter(
+                chain.from_iterable((lm.x, lm.y, lm.z) for hand, _ in hands for lm in hand.landmark),
+                dtype=np.float32, count=n * NUM_LANDMARKS * 3)
+            for i, (_, info) in enumerate(hands):
+                cls = info.classification[0]
+                self.handedness[i] = HAND_RIGHT if cls.label == "Right" else HAND_LEFT
+                self.scores[i] = cls.score
+        return self.handedness[:n], self.scores[:n], self.landmarks[:n]
+
+
+# -----------------------------
+# Per-frame analysis
+# -----------------------------
+class HandFrame:
+    """
+    Pixel-space view of all hands in one frame. Owns copies of its inputs, so
+    it can be handed to another thread while the extractor buffers are reused.
+      handedness (n,) HAND_* codes
+      scores     (n,) handedness confidence
+      landmarks  (n, 21, 3) normalized float32 landmarks
+      px         (n, 21, 2) int32 pixel coordinates (truncated like int(lm.x * w))
+      fingers    (n, 5) bool   [thumb, index, middle, ring, pinky] up
+      pinch      (n,) float    thumb tip to index tip distance in pixels
+      boxes      (n, 4) int32  x1, y1, x2, y2 bounding box
+    """
+
+    def __init__(self, handedness, landmarks, w, h, scores=None):
+        self.w, self.h = w, h
+        self.handedness = np.array(handedness, dtype=np.uint8)
+        self.landmarks = np.array(landmarks, dtype=np.float32)
+        self.scores = (np.ones(len(self.handedness), dtype=np.float32) if scores is None
+                       else np.array(scores, dtype=np.float32))
+        self.px = (self.landmarks[:, :, :2] * np.array([w, h], dtype=np.float32)).astype(np.int32)
+        self.fingers = fingers_up_batch(self.px)
+        self.pinch = pinch_distance(self.px)
+        self.boxes = bounding_boxes(self.px)
+
+    def __len__(self):
+        return len(self.handedness)
+
+    def index_of(self, code):
+        """Index of the last hand with this handedness code, or -1 (matches the old per-hand loop)."""
+        idx = np.flatnonzero(self.handedness == code)
+        return int(idx[-1]) if len(idx) else -1
+
+    def point(self, hand, landmark_id):
+        x, y = self.px[hand, landmark_id]
+        return int(x), int(y)
+
+
+def fingers_up_batch(px):
+    """(n, 21, 2) pixel landmarks -> (n, 5) bool: [thumb, index, middle, ring, pinky] up."""
+    fingers = np.empty((len(px), 5), dtype=bool)
+    # Thumb: basic heuristic (works for many cases)
+    fingers[:, 0] = px[:, THUMB_TIP, 0] < px[:, THUMB_IP, 0]
+    fingers[:, 1:] = px[:, TIP_IDS, 1] < px[:, PIP_IDS, 1]
+    return fingers
+
+
+def pinch_distance(px, a=THUMB_TIP, b=INDEX_TIP):
+    d = (px[:, b] - px[:, a]).astype(np.float32)
+    return np.hypot(d[:, 0], d[:, 1])
+
+
+def bounding_boxes(px):
+    return np.concatenate([px.min(axis=1), px.max(axis=1)], axis=1)
@@ -1,70 +1,175 @@
 # main.py
-from multiprocessing import Process
-import time
-from gesture import virtual_mouse           # gesture.py function
-from voice_os import main as start_voice    # voice module main function
-from gui import run_gui                      # GUI run function
+from multiprocessing import Event, Process
+import metrics                                       # off unless VIRTUALNOVA_METRICS is set
+from camera_broker import DEFAULT_NAME, run_broker   # shared camera capture
+from supervisor import Heartbeat, HealthSlot, Supervisor   # health checks and restarts
+from warm_start import StartupTimer, WarmWorker      # pre-warmed module processes
 
-def launch_gesture():
+# gesture, voice_os and gui are imported where they are used: the module
+# processes import them themselves, and spawned children re-import this file
+
+CAMERA_SOURCE = f"shm:{DEFAULT_NAME}"
+MODULES = {"Gesture": "gesture", "Voice": "voice_os"}
+
+# Supervisor settings per process. Frame loops beat every frame, so a few
+# hundred ms without a beat is already worth a warning; the voice module
+# announces its blocking listen/recognize calls with heartbeat.expect().
+HEALTH = {
+    "Camera": dict(hang_timeout=2.0, stale_after=0.25, min_fps=10.0),
+    "Gesture": dict(hang_timeout=3.0, stale_after=0.3, min_fps=10.0, max_p99_ms=150.0),
+    "Voice": dict(hang_timeout=5.0, stale_after=None),
+}
+
+def _heartbeat(slot):
+    return Heartbeat(slot) if slot is not None else None
+
+def launch_camera(ready_event=None, slot=None):
+    """
+    Runs the camera broker: captures the webcam once and publishes frames and
+    hand landmarks to shared memory for the GUI and gesture module.
+    """
+    metrics.enable_from_env("camera")
+    try:
+        run_broker(name=DEFAULT_NAME, ready_event=ready_event, heartbeat=_heartbeat(slot))
+    except Exception as e:
+        print(f"[ERROR] Camera broker crashed: {e}")
+    finally:
+        metrics.disable()
+
+def start_camera(slot=None, timeout=10.0):
+    """
+    Starts the camera broker process and waits for its first frame.
+    Returns the process, or None if it did not come up (consumers then open
+    the camera themselves).
+    """
+    ready = Event()
+    process = Process(target=launch_camera, args=(ready, slot))
+    process.start()
+    if ready.wait(timeout):
+        return process
+    print("[WARNING] Camera broker did not start; modules will open the camera directly.")
+    process.terminate()
+    process.join()
+    return None
+
+def launch_gesture(source=None, slot=None):
     """
     Starts the gesture control module (Virtual Mouse).
     """
+    metrics.enable_from_env("gesture")
     try:
+        from gesture import virtual_mouse
         print("[INFO] Gesture module started.")
-        virtual_mouse()
+        virtual_mouse(source=source, heartbeat=_heartbeat(slot))
     except Exception as e:
         print(f"[ERROR] Gesture module crashed: {e}")
+    finally:
+        metrics.disable()
 
-def launch_voice():
+def launch_voice(slot=None):
     """
     Starts the voice control module.
     """
+    metrics.enable_from_env("voice")
     try:
+        from voice_os import main as start_voice
         print("[INFO] Voice module started.")
-        start_voice()
+        start_voice(heartbeat=_heartbeat(slot))
     except Exception as e:
         print(f"[ERROR] Voice module crashed: {e}")
+    finally:
+        metrics.disable()
 
-def launch_all_modules():
+def start_workers(slots=None):
+    """Starts a warm worker per module; they load while the menu is showing."""
+    slots = slots or {}
+    return {name: WarmWorker(name, module, slots.get(name)) for name, module in MODULES.items()}
+
+def launch_all_modules(gesture=True, voice=True, camera=None, workers=None, slots=None):
     """
-    Launch both gesture and voice modules in separate processes.
+    Launch the selected modules (gesture and voice by default) in separate
+    processes and supervise them until Ctrl+C (see supervisor.Supervisor).
+    camera: the running camera broker process (see start_camera); the gesture
+    module then reads from it instead of opening the webcam, and it is
+    supervised with the other processes.
+    workers: warm workers from start_workers(); a selected module whose worker
+    warmed up only gets "go", the others are started cold. Workers of modules
+    that were not selected are stopped.
+    slots: {name: HealthSlot} shared with the camera and the workers.
     """
-    print("[INFO] Launching Gesture and Voice modules...")
+    workers = workers or {}
+    slots = dict(slots or {})
+    source = CAMERA_SOURCE if camera is not None else None
+    targets = {}
+    kwargs = {}
+    if gesture:
+        targets["Gesture"] = lambda slot: Process(target=launch_gesture, args=(source, slot))
+        kwargs["Gesture"] = {"source": source}
+    if voice:
+        targets["Voice"] = lambda slot: Process(target=launch_voice, args=(slot,))
+        kwargs["Voice"] = {}
+    print(f"[INFO] Launching {' and '.join(targets)} module(s)...")
+    for name, worker in workers.items():
+        if name not in targets:
+            worker.stop()
 
-    # Create separate processes for gesture and voice
-    gesture_process = Process(target=launch_gesture)
-    voice_process = Process(target=launch_voice)
+    supervisor = Supervisor()
+    if camera is not None:
+        supervisor.add("Camera", lambda slot: Process(target=launch_camera, args=(None, slot)),
+                       slots.get("Camera"), process=camera, **HEALTH["Camera"])
 
-    # Start both processes
-    gesture_process.start()
-    voice_process.start()
+    # Send "go" to warm workers; create and start a separate process for the rest
+    for name, start in targets.items():
+        worker = workers.get(name)
+        slot = slots.get(name) or HealthSlot()
+        if worker is not None and worker.go(**kwargs[name]):
+            supervisor.add(name, start, slot, process=worker.process, **HEALTH[name])
+        else:
+            supervisor.add(name, start, slot, **HEALTH[name])
 
-    # Keep the main program running, handle graceful exit
-    try:
-        while True:
-            time.sleep(1)
-            # Optionally, restart if a process crashes
-            if not gesture_process.is_alive():
-                print("[WARNING] Gesture process stopped unexpectedly. Restarting...")
-                gesture_process = Process(target=launch_gesture)
-                gesture_process.start()
-            if not voice_process.is_alive():
-                print("[WARNING] Voice process stopped unexpectedly. Restarting...")
-                voice_process = Process(target=launch_voice)
-                voice_process.start()
-
-    except KeyboardInterrupt:
-        print("\n[INFO] Exiting program...")
-        gesture_process.terminate()
-        voice_process.terminate()
-        gesture_process.join()
-        voice_process.join()
-        print("[INFO] All processes terminated successfully.")
+    # Keep the main program running until Ctrl+C; restarts crashed or hung processes
+    supervisor.run()
+
+def stop_camera(camera, slot=None):
+    if camera is not None:
+        if slot is not None:
+            slot.stop.set()
+            camera.join(2.0)
+        if camera.is_alive():
+            camera.terminate()
+        camera.join()
 
 if __name__ == "__main__":
+    timer = StartupTimer("Main")
+    # VIRTUALNOVA_METRICS=<dir> / VIRTUALNOVA_METRICS_PORT=<port> turn on metrics in every process
+    metrics.enable_from_env("main")
+    slots = {name: HealthSlot() for name in HEALTH}
+    # Module workers import and load their models while the menu is up
+    workers = start_workers(slots)
+    timer.mark("start workers")
+    # One capture for everything: the broker keeps the camera open from the
+    # menu through to the gesture module
+    camera = start_camera(slots["Camera"])
+    timer.mark("camera")
+    from gui import run_gui                  # GUI run function
+    timer.mark("import gui")
+    timer.report()
+
     # Run GUI first
-    choice = run_gui()
+    choice = run_gui(source=CAMERA_SOURCE if camera is not None else None)
+    for name, worker in workers.items():
+        if worker.poll() != "ready":
+            print(f"[INFO] {name} worker still {worker.state} when the menu closed.")
     if choice == "LAUNCH":
-        launch_all_modules()
+        launch_all_modules(camera=camera, workers=workers, slots=slots)
+    elif choice == "GESTURE":
+        launch_all_modules(voice=False, camera=camera, workers=workers, slots=slots)
+    elif choice == "VOICE":
+        stop_camera(camera, slots["Camera"])
+        launch_all_modules(gesture=False, workers=workers, slots=slots)
     else:
-        print("[INFO] GUI closed without launching modules.")
\ No newline at end of file
+        stop_camera(camera, slots["Camera"])
+        for worker in workers.values():
+            worker.stop()
+        print("[INFO] GUI closed without launching modules.")
+    metrics.disable()
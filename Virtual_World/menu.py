@@ -0,0 +1,127 @@
+# menu.py
+"""
+Declarative launch-menu model with spatial hit-testing.
+
+A menu is a list of MenuItems whose boxes are given as fractions of the frame
+(centre x, centre y, width, height), so the same menu lays out at any camera
+resolution. After layout(w, h) every item has a pixel rect and sits in a
+SpatialGrid of fixed-size buckets, so hover and hit tests only look at the
+items in the buckets around the fingertip instead of scanning the whole menu.
+"""
+
+import math
+from collections import defaultdict
+
+
+class MenuItem:
+    def __init__(self, key, label, box, result=None):
+        """
+        key: unique id; label: button text; box: (cx, cy, w, h) as fractions of
+        the frame; result: what run_gui returns when the item is pinched
+        (defaults to key).
+        """
+        self.key = key
+        self.label = label
+        self.box = box
+        self.result = result if result is not None else key
+        self.rect = None      # (x1, y1, x2, y2) in pixels, set by Menu.layout
+        self.center = None
+        self.z = 0            # draw order, set by Menu.layout
+
+    def __repr__(self):
+        return f"MenuItem({self.key!r}, rect={self.rect})"
+
+
+# (key, label, (cx, cy, w, h), result)
+DEFAULT_ITEMS = [
+    ("launch", "LAUNCH", (0.5, 0.57, 0.32, 0.12), "LAUNCH"),
+    ("gesture", "GESTURE ONLY", (0.31, 0.78, 0.22, 0.08), "GESTURE"),
+    ("voice", "VOICE ONLY", (0.69, 0.78, 0.22, 0.08), "VOICE"),
+]
+
+
+class SpatialGrid:
+    """Uniform grid of buckets; each rect is registered in every cell it touches."""
+
+    def __init__(self, cell=64):
+        self.cell = cell
+        self.buckets = defaultdict(list)
+
+    def _cells(self, x1, y1, x2, y2):
+        c = self.cell
+        for cy in range(int(y1) // c, int(y2) // c + 1):
+            for cx in range(int(x1) // c, int(x2) // c + 1):
+                yield cx, cy
+
+    def insert(self, item, rect):
+        for cell in self._cells(*rect):
+            self.buckets[cell].append(item)
+
+    def at(self, x, y):
+        return self.buckets.get((int(x) // self.cell, int(y) // self.cell), ())
+
+    def query(self, rect):
+        """Items whose cells overlap rect (a superset of the items intersecting it)."""
+        found = {}
+        for cell in self._cells(*rect):
+            for item in self.buckets.get(cell, ()):
+                found[item.key] = item
+        return list(found.values())
+
+
+class Menu:
+    def __init__(self, items=None, cell=64, hover_radius=260, hover_fade=200):
+        """
+        items: MenuItems or (key, label, box[, result]) tuples; DEFAULT_ITEMS if None.
+        hover_radius / hover_fade: an item's hover level is
+        clamp((hover_radius - distance to its centre) / hover_fade, 0, 1).
+        """
+        self.items = [item if isinstance(item, MenuItem) else MenuItem(*item)
+                      for item in (items or DEFAULT_ITEMS)]
+        self.by_key = {item.key: item for item in self.items}
+        if len(self.by_key) != len(self.items):
+            raise ValueError(f"Duplicate menu item keys: {[item.key for item in self.items]}")
+        self.cell = cell
+        self.hover_radius = hover_radius
+        self.hover_fade = hover_fade
+        self.size = None
+        self.grid = SpatialGrid(cell)
+
+    def layout(self, w, h):
+        """Computes pixel rects for a w x h frame and rebuilds the spatial index."""
+        if self.size == (w, h):
+            return self
+        self.size = (w, h)
+        self.grid = SpatialGrid(self.cell)
+        for z, item in enumerate(self.items):
+            cx, cy, bw, bh = item.box
+            center = (int(w * cx), int(h * cy))
+            half_w, half_h = int(w * bw) // 2, int(h * bh) // 2
+            item.rect = (center[0] - half_w, center[1] - half_h, center[0] + half_w, center[1] + half_h)
+            item.center = center
+            item.z = z
+            self.grid.insert(item, item.rect)
+        return self
+
+    def hit(self, x, y):
+        """Topmost item whose rect strictly contains (x, y), or None."""
+        best = None
+        for item in self.grid.at(x, y):
+            x1, y1, x2, y2 = item.rect
+            if x1 < x < x2 and y1 < y < y2 and (best is None or item.z > best.z):
+                best = item
+        return best
+
+    def hover(self, x, y):
+        """{key: level} for the items within hover_radius of (x, y); all others are 0."""
+        r = self.hover_radius
+        levels = {}
+        for item in self.grid.query((x - r, y - r, x + r, y + r)):
+            d = math.hypot(x - item.center[0], y - item.center[1])
+            level = max(0.0, min(1.0, (r - d) / self.hover_fade))
+            if level > 0:
+                levels[item.key] = level
+        return levels
+
+    def __getitem__(self, key):
+        return self.by_key[key]
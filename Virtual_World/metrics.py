@@ -0,0 +1,454 @@
+# metrics.py
+"""
+Counters, gauges, histograms and span timers for finding latency spikes in
+the running modules.
+
+Modules declare their instruments once at import time:
+
+    FRAMES = metrics.counter("gesture_frames_total", "Frames processed")
+    INFER = metrics.span("gesture_infer_seconds", "Detection time per frame")
+
+and use them in their loops:
+
+    FRAMES.inc()
+    t0 = INFER.start()
+    ...
+    INFER.stop(t0)
+
+Everything is off until enable() is called; until then every update returns
+after one global flag check, so instrumented loops cost the same as before.
+When enabled, histograms count into fixed buckets and also keep their last
+`window` samples in a preallocated ring (for p50/p99), and spans additionally
+append (span, start, duration, thread) to one preallocated trace ring.
+
+Export is Prometheus text format, to a file rewritten every few seconds
+and/or over HTTP (GET /metrics); the trace ring can be written as a Chrome
+trace (open it in chrome://tracing or Perfetto). Each process has its own
+registry; enable_from_env() lets child processes pick up the settings of
+main.py from the environment:
+
+    VIRTUALNOVA_METRICS=metrics_dir  one <name>.prom and <name>.trace.json per process
+    VIRTUALNOVA_METRICS_PORT=9464    Prometheus endpoint (main process only)
+"""
+
+import json
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+import numpy as np
+
+_enabled = False
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.02, 0.033, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# -----------------------------
+# Instruments
+# -----------------------------
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help="", labelnames=(), labels=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.label_values = tuple(labels)
+        self._children = {}
+
+    def labels(self, *values):
+        """The child metric for one combination of label values (created on first use)."""
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._child(values)
+        return child
+
+    def _child(self, values):
+        return type(self)(self.name, self.help, self.labelnames, values)
+
+    def _series(self):
+        return [self] if not self.labelnames else list(self._children.values())
+
+    def reset(self):
+        self._children = {}
+
+    def _label_text(self, extra=()):
+        pairs = list(zip(self.labelnames, self.label_values)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help="", labelnames=(), labels=()):
+        super().__init__(name, help, labelnames, labels)
+        self.value = 0
+
+    def inc(self, n=1):
+        if _enabled:
+            self.value += n
+
+    def reset(self):
+        super().reset()
+        self.value = 0
+
+    def _lines(self):
+        return [f"{self.name}{self._label_text()} {self.value}"]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, help="", labelnames=(), labels=()):
+        super().__init__(name, help, labelnames, labels)
+        self.value = 0.0
+
+    def set(self, value):
+        if _enabled:
+            self.value = value
+
+    def reset(self):
+        super().reset()
+        self.value = 0.0
+
+    def _lines(self):
+        return [f"{self.name}{self._label_text()} {self.value:g}"]
+
+
+class Histogram(_Metric):
+    """Bucketed counts plus the last `window` samples in a ring, for quantiles."""
+    kind = "histogram"
+
+    def __init__(self, name, help="", buckets=LATENCY_BUCKETS, window=1024, labelnames=(), labels=()):
+        super().__init__(name, help, labelnames, labels)
+        self.buckets = tuple(sorted(buckets))
+        self.window = window
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.samples = array("d", bytes(8 * window))
+        self._pos = 0
+
+    def _child(self, values):
+        return Histogram(self.name, self.help, self.buckets, self.window, self.labelnames, values)
+
+    def observe(self, value):
+        if not _enabled:
+            return
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.samples[self._pos] = value
+        self._pos = (self._pos + 1) % self.window
+
+    def reset(self):
+        super().reset()
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._pos = 0
+
+    def quantiles(self, qs=(0.5, 0.99)):
+        """Quantiles over the samples still in the ring (zeros if empty)."""
+        n = min(self.count, self.window)
+        if not n:
+            return [0.0 for _ in qs]
+        recent = np.frombuffer(self.samples, dtype=np.float64)[:n]
+        return [float(v) for v in np.quantile(recent, qs)]
+
+    def _lines(self):
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += n
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            lines.append(f"{self.name}_bucket{self._label_text([('le', le)])} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_text()} {self.sum:g}")
+        lines.append(f"{self.name}_count{self._label_text()} {self.count}")
+        p50, p99 = self.quantiles()
+        lines.append(f"{self.name}_recent{self._label_text([('quantile', '0.5')])} {p50:g}")
+        lines.append(f"{self.name}_recent{self._label_text([('quantile', '0.99')])} {p99:g}")
+        return lines
+
+
+class Span(Histogram):
+    """
+    Timer for one named section: t0 = span.start(); ...; span.stop(t0).
+    Durations go to the histogram and, with the start time, to the trace ring.
+    """
+
+    def __init__(self, name, help="", registry=None, buckets=LATENCY_BUCKETS, window=1024):
+        super().__init__(name, help, buckets, window)
+        self.registry = registry
+        self.index = 0
+
+    def start(self):
+        return time.perf_counter() if _enabled else 0.0
+
+    def stop(self, t0):
+        if not _enabled or not t0:
+            return 0.0
+        duration = time.perf_counter() - t0
+        self.observe(duration)
+        self.registry._trace(self.index, t0, duration)
+        return duration
+
+    def record(self, t0, duration):
+        """Records a section timed elsewhere (perf_counter start, seconds)."""
+        if _enabled:
+            self.observe(duration)
+            self.registry._trace(self.index, t0, duration)
+
+    def measure(self):
+        """Context manager form, for code that is not per frame."""
+        return _Timed(self)
+
+
+class _Timed:
+    __slots__ = ("span", "t0")
+
+    def __init__(self, span):
+        self.span = span
+
+    def __enter__(self):
+        self.t0 = self.span.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.span.stop(self.t0)
+
+
+# -----------------------------
+# Registry and export
+# -----------------------------
+class Registry:
+    def __init__(self, trace_size=8192):
+        self.metrics = {}
+        self.spans = []
+        # trace ring: one preallocated column per field
+        self.trace_size = trace_size
+        self.trace_span = array("H", bytes(2 * trace_size))      # index into self.spans
+        self.trace_thread = array("Q", bytes(8 * trace_size))    # threading.get_ident()
+        self.trace_start = array("d", bytes(8 * trace_size))     # perf_counter seconds
+        self.trace_duration = array("d", bytes(8 * trace_size))  # seconds
+        self.trace_pos = 0
+        self.trace_count = 0
+        self._lock = threading.Lock()
+        self._exporters = []
+
+    def _register(self, metric):
+        existing = self.metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric):
+                raise ValueError(f"Metric {metric.name} already registered as {existing.kind}")
+            return existing
+        self.metrics[metric.name] = metric
+        if isinstance(metric, Span):
+            metric.index = len(self.spans)
+            self.spans.append(metric)
+        return metric
+
+    def _trace(self, index, t0, duration):
+        with self._lock:
+            i = self.trace_pos
+            self.trace_span[i] = index
+            self.trace_thread[i] = threading.get_ident()
+            self.trace_start[i] = t0
+            self.trace_duration[i] = duration
+            self.trace_pos = (i + 1) % self.trace_size
+            self.trace_count += 1
+
+    def reset(self):
+        """Zeroes every metric and empties the trace ring."""
+        for metric in self.metrics.values():
+            metric.reset()
+        self.trace_pos = 0
+        self.trace_count = 0
+
+    def exposition(self):
+        """All metrics in Prometheus text format."""
+        lines = []
+        for metric in list(self.metrics.values()):
+            if metric.help:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for series in metric._series():
+                lines.extend(series._lines())
+        return "\n".join(lines) + "\n"
+
+    def trace_events(self):
+        """The trace ring, oldest first, as Chrome trace events."""
+        with self._lock:
+            n = min(self.trace_count, self.trace_size)
+            first = (self.trace_pos - n) % self.trace_size
+            order = [(first + k) % self.trace_size for k in range(n)]
+            rows = [(self.trace_span[i], self.trace_thread[i], self.trace_start[i], self.trace_duration[i])
+                    for i in order]
+        pid = os.getpid()
+        return [{"name": self.spans[span].name, "ph": "X", "pid": pid, "tid": thread,
+                 "ts": start * 1e6, "dur": duration * 1e6} for span, thread, start, duration in rows]
+
+    def write(self, path):
+        """Atomically replaces `path` with the current exposition."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.exposition())
+        os.replace(tmp, path)
+
+    def write_trace(self, path):
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}, f)
+
+
+registry = Registry()
+
+
+def _after_fork():
+    # a forked child starts off with its own, empty and disabled registry;
+    # the parent's exporter threads and sockets are not its to flush or close
+    global _enabled
+    _enabled = False
+    registry._exporters = []
+    registry._lock = threading.Lock()
+    registry.reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+def counter(name, help="", labelnames=()):
+    return registry._register(Counter(name, help, labelnames))
+
+
+def gauge(name, help="", labelnames=()):
+    return registry._register(Gauge(name, help, labelnames))
+
+
+def histogram(name, help="", buckets=LATENCY_BUCKETS, window=1024, labelnames=()):
+    return registry._register(Histogram(name, help, buckets, window, labelnames))
+
+
+def span(name, help="", buckets=LATENCY_BUCKETS, window=1024):
+    return registry._register(Span(name, help, registry, buckets, window))
+
+
+def is_enabled():
+    return _enabled
+
+
+class _FileExporter(threading.Thread):
+    def __init__(self, path, trace_path, interval):
+        super().__init__(name="metrics-export", daemon=True)
+        self.path = path
+        self.trace_path = trace_path
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        if not self.path:
+            return
+        try:
+            registry.write(self.path)
+        except OSError as e:
+            print(f"[WARNING] Could not write metrics to {self.path}: {e}")
+
+    def close(self):
+        self.stopped.set()
+        self.flush()
+        if self.trace_path:
+            try:
+                registry.write_trace(self.trace_path)
+            except OSError as e:
+                print(f"[WARNING] Could not write trace to {self.trace_path}: {e}")
+
+
+class _HttpExporter:
+    def __init__(self, port, host="127.0.0.1"):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.exposition().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def enable(path=None, port=None, trace_path=None, interval=5.0):
+    """
+    Turns recording on. path: Prometheus text file rewritten every `interval`
+    seconds and on disable(); port: serve GET /metrics on 127.0.0.1 (0 picks a
+    free port); trace_path: Chrome trace JSON written on disable().
+    """
+    global _enabled
+    _enabled = True
+    if path or trace_path:
+        exporter = _FileExporter(path, trace_path, interval)
+        if path:
+            exporter.start()
+        registry._exporters.append(exporter)
+        print(f"[INFO] Metrics: writing {', '.join(p for p in (path, trace_path) if p)}")
+    if port is not None:
+        try:
+            exporter = _HttpExporter(port)
+            registry._exporters.append(exporter)
+            print(f"[INFO] Metrics: serving http://127.0.0.1:{exporter.port}/metrics")
+        except OSError as e:
+            print(f"[WARNING] Metrics endpoint on port {port} unavailable: {e}")
+    return registry
+
+
+def enable_in(directory, name, port=None):
+    """enable() writing <directory>/<name>.prom and <name>.trace.json."""
+    path = trace_path = None
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{name}.prom")
+        trace_path = os.path.join(directory, f"{name}.trace.json")
+    return enable(path, port, trace_path)
+
+
+def enable_from_env(name, environ=None):
+    """enable_in() from VIRTUALNOVA_METRICS / VIRTUALNOVA_METRICS_PORT; no-op if unset."""
+    environ = os.environ if environ is None else environ
+    directory = environ.get("VIRTUALNOVA_METRICS")
+    port = environ.get("VIRTUALNOVA_METRICS_PORT")
+    if not directory and not port:
+        return False
+    enable_in(directory, name, int(port) if port and name == "main" else None)
+    return True
+
+
+def disable():
+    """Flushes and stops all exporters and turns recording off."""
+    global _enabled
+    for exporter in registry._exporters:
+        exporter.close()
+    registry._exporters = []
+    _enabled = False
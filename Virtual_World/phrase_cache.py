@@ -0,0 +1,266 @@
+# phrase_cache.py
+"""
+On-disk cache of synthesized speech.
+
+The assistant says the same few dozen sentences over and over ("Refreshed.",
+"Window closed.", "Sorry, I didn't understand..."), and pyttsx3 used to
+synthesize every one of them again each time. PhraseCache keeps the rendered
+WAV of every phrase in a directory, bounded to max_bytes: the least recently
+played files are deleted first (a file's mtime is its last use, so the order
+survives restarts).
+
+Responses with a variable part are declared as templates:
+
+    cache = PhraseCache(templates=["Clicked number {n}", "Page {page} of {pages}."])
+    cache.split("Clicked number 14")   # ['Clicked number', '14']
+
+The fragments are rendered and cached on their own, and the sentence is
+joined from their audio (join_wavs), so "Clicked number 14" only needs "14"
+synthesized once, not every sentence that contains it.
+
+speech_out.CachedEngine plays from the cache; `python phrase_cache.py`
+prints what is cached.
+"""
+
+import hashlib
+import os
+import re
+import threading
+import wave
+from collections import OrderedDict
+
+import numpy as np
+
+import metrics
+
+CACHE_DIR = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.expanduser(os.path.join("~", ".cache")),
+                         "VirtualNova", "speech")
+MAX_BYTES = 32 * 1024 * 1024
+
+# Joining fragments: silence below SILENCE_LEVEL is trimmed off both ends of
+# every fragment, leaving EDGE_MS, and GAP_MS of silence goes between them
+SILENCE_LEVEL = 300
+EDGE_MS = 20
+GAP_MS = 80
+
+LOOKUPS = metrics.counter("speech_cache_lookups_total", "Phrase cache lookups", labelnames=("result",))
+EVICTIONS = metrics.counter("speech_cache_evictions_total", "Phrases deleted to stay under the size limit")
+CACHE_BYTES = metrics.gauge("speech_cache_bytes", "Size of the phrase cache on disk")
+
+_KEY = re.compile(r"^[0-9a-f]{40}\.wav$")
+
+
+def _compile(template):
+    """'Page {page} of {pages}.' -> regex with one lazy group per slot."""
+    pattern = ""
+    for literal, slot in re.findall(r"([^{]*)(\{\w+\})?", template):
+        pattern += re.escape(literal)
+        if slot:
+            pattern += r"(.*?)"
+    return re.compile("^" + pattern + "$")
+
+
+def _pieces(template):
+    """The literal parts and slot names of a template, in order."""
+    return [p for p in re.split(r"(\{\w+\})", template) if p]
+
+
+def template_fragments(templates):
+    """The fixed fragments of `templates` as PhraseCache.split() cuts them out (to render ahead of time)."""
+    return [p.strip() for t in templates for p in _pieces(t)
+            if not p.startswith("{") and any(c.isalnum() for c in p)]
+
+
+def join_wavs(paths, out_path, gap_ms=GAP_MS):
+    """
+    Writes the audio of `paths` one after another to out_path, each trimmed
+    of leading / trailing silence and separated by gap_ms. The files must
+    share one format (16-bit PCM); ValueError otherwise.
+    """
+    params = None
+    parts = []
+    for path in paths:
+        with wave.open(path, "rb") as w:
+            if params is None:
+                params = w.getparams()
+            elif w.getparams()[:3] != params[:3]:
+                raise ValueError(f"{path}: format differs from {paths[0]}")
+            if w.getsampwidth() != 2:
+                raise ValueError(f"{path}: not 16-bit PCM")
+            samples = np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
+        channels, rate = params.nchannels, params.framerate
+        frames = samples.reshape(-1, channels)
+        loud = np.flatnonzero(np.abs(frames).max(axis=1) >= SILENCE_LEVEL)
+        if len(loud):
+            edge = rate * EDGE_MS // 1000
+            frames = frames[max(0, loud[0] - edge):loud[-1] + 1 + edge]
+        parts.append(frames)
+    if params is None:
+        raise ValueError("nothing to join")
+    gap = np.zeros((params.framerate * gap_ms // 1000, params.nchannels), dtype=np.int16)
+    joined = [parts[0]]
+    for frames in parts[1:]:
+        joined += [gap, frames]
+    with wave.open(out_path, "wb") as w:
+        w.setnchannels(params.nchannels)
+        w.setsampwidth(2)
+        w.setframerate(params.framerate)
+        w.writeframes(np.concatenate(joined).tobytes())
+
+
+def duration(path):
+    """Length of a WAV file in seconds."""
+    with wave.open(path, "rb") as w:
+        return w.getnframes() / float(w.getframerate())
+
+
+class PhraseCache:
+    """
+    Size-bounded LRU of rendered phrases in `directory`. `voice` is part of
+    every key (e.g. the TTS voice and rate), so changing it does not play
+    stale audio. Thread-safe.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES, templates=(), voice=""):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.voice = voice
+        self.templates = [(_compile(t), _pieces(t)) for t in templates]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._files = OrderedDict()   # file name -> bytes, least recently used first
+        self.bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if not _KEY.match(name):
+                if ".part." in name:
+                    os.remove(path)   # left over from an interrupted render
+                continue
+            st = os.stat(path)
+            entries.append((st.st_mtime, name, st.st_size))
+        for _, name, size in sorted(entries):
+            self._files[name] = size
+            self.bytes += size
+        self._evict()
+
+    def _name(self, text):
+        return hashlib.sha1(f"{self.voice}\n{text}".encode("utf-8")).hexdigest() + ".wav"
+
+    def __len__(self):
+        return len(self._files)
+
+    def __contains__(self, text):
+        return self._name(text) in self._files
+
+    def split(self, text):
+        """
+        The fragments `text` is spoken from: the literal and slot parts of the
+        first template it matches, or [text]. Parts without letters or digits
+        (punctuation, empty slots) are left out.
+        """
+        for regex, pieces in self.templates:
+            m = regex.match(text)
+            if m is None:
+                continue
+            values = iter(m.groups())
+            parts = [next(values) if p.startswith("{") else p for p in pieces]
+            return [p.strip() for p in parts if any(c.isalnum() for c in p)]
+        return [text]
+
+    def get(self, text):
+        """Path of the cached audio for `text` (now the most recently used), or None."""
+        name = self._name(text)
+        with self._lock:
+            if name not in self._files:
+                self.misses += 1
+                LOOKUPS.labels("miss").inc()
+                return None
+            self._files.move_to_end(name)
+            self.hits += 1
+        LOOKUPS.labels("hit").inc()
+        path = os.path.join(self.directory, name)
+        try:
+            os.utime(path)
+        except OSError:
+            # deleted behind our back
+            with self._lock:
+                self.bytes -= self._files.pop(name, 0)
+            return None
+        return path
+
+    def put(self, text, render):
+        """
+        render(path) writes the audio for `text` to path; the result is added
+        to the cache and its path returned. Least recently used phrases are
+        deleted until the cache fits in max_bytes again.
+        """
+        name = self._name(text)
+        path = os.path.join(self.directory, name)
+        part = path[:-len(".wav")] + f".{threading.get_ident()}.part.wav"
+        try:
+            render(part)
+            size = os.path.getsize(part)
+            if size <= 44:   # a bare WAV header: the renderer produced nothing
+                raise RuntimeError(f"no audio rendered for {text!r}")
+            os.replace(part, path)
+        finally:
+            if os.path.exists(part):
+                os.remove(part)
+        with self._lock:
+            self.bytes += size - self._files.pop(name, 0)
+            self._files[name] = size
+            self._evict(keep=name)
+        return path
+
+    def _evict(self, keep=None):
+        # caller holds the lock (or is __init__)
+        while self.bytes > self.max_bytes and len(self._files) > 1:
+            name, size = next(iter(self._files.items()))
+            if name == keep:
+                break
+            del self._files[name]
+            self.bytes -= size
+            self.evictions += 1
+            EVICTIONS.inc()
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+        CACHE_BYTES.set(self.bytes)
+
+    def clear(self):
+        with self._lock:
+            names, self._files = list(self._files), OrderedDict()
+            self.bytes = 0
+        for name in names:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+        CACHE_BYTES.set(0)
+
+
+# -----------------------------
+# Inspect the cache
+# -----------------------------
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Show or clear the synthesized phrase cache")
+    parser.add_argument("--dir", default=CACHE_DIR, help="cache directory")
+    parser.add_argument("--clear", action="store_true", help="delete every cached phrase")
+    args = parser.parse_args()
+
+    cache = PhraseCache(args.dir, max_bytes=float("inf"))
+    if args.clear:
+        cache.clear()
+        print(f"[INFO] Cleared {args.dir}")
+    else:
+        seconds = sum(duration(os.path.join(args.dir, name)) for name in cache._files)
+        print(f"[INFO] {len(cache)} phrases, {cache.bytes / 1e6:.1f} MB, {seconds:.0f}s of audio in {args.dir}")
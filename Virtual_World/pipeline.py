@@ -0,0 +1,91 @@
+# pipeline.py
+"""
+Threading helpers for the capture -> inference -> actuation pipeline.
+Queues are bounded and drop the oldest item when full, so every stage
+always works on the newest frame instead of a backlog.
+"""
+
+import threading
+from collections import deque
+
+
+# -----------------------------
+# Drop-oldest queue
+# -----------------------------
+class LatestQueue:
+    """Bounded queue whose put() never blocks: when full, the oldest item is dropped."""
+
+    def __init__(self, maxsize=1):
+        self.maxsize = max(1, maxsize)
+        self.dropped = 0
+        self.closed = False
+        self._items = deque()
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Returns the oldest queued item, or None on timeout / after close()."""
+        with self._cond:
+            if not self._items and not self.closed:
+                self._cond.wait(timeout)
+            if self._items:
+                return self._items.popleft()
+            return None
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+
+# -----------------------------
+# Per-stage latency
+# -----------------------------
+class StageStats:
+    """Rolling latency samples (seconds) for one pipeline stage."""
+
+    def __init__(self, name, window=240):
+        self.name = name
+        self.count = 0
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+
+    def summary(self):
+        """Returns dict with count, mean/p50/p95/max in milliseconds."""
+        with self._lock:
+            samples = sorted(self._samples)
+            count = self.count
+        if not samples:
+            return {"count": count, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        n = len(samples)
+        return {
+            "count": count,
+            "mean_ms": 1000.0 * sum(samples) / n,
+            "p50_ms": 1000.0 * samples[n // 2],
+            "p95_ms": 1000.0 * samples[min(n - 1, int(n * 0.95))],
+            "max_ms": 1000.0 * samples[-1],
+        }
+
+
+def format_stats(stats_list):
+    parts = []
+    for st in stats_list:
+        s = st.summary()
+        parts.append(f"{st.name} p50={s['p50_ms']:.1f}ms p95={s['p95_ms']:.1f}ms")
+    return " | ".join(parts)
@@ -0,0 +1,137 @@
+# roi_tracker.py
+"""
+Region-of-interest hand tracking.
+After a full-frame detection, following frames are cropped to a padded box
+around the detected hands and only the crop is sent to Mediapipe. The crop is
+sticky: it only moves when a hand gets close to its edge, so the ROI model's
+own frame-to-frame tracking stays valid. Full-frame detection runs again when
+
+  * the crop loses a hand or handedness confidence drops below min_score,
+  * a hand touches the crop border (it is leaving the box), or
+  * redetect_every frames have passed since the last full-frame pass, or
+  * the input size changed (e.g. the adaptive scheduler rescaled detection).
+
+Landmarks from the crop are mapped back to full-frame normalized coordinates,
+so callers see exactly what a full-frame detection would report.
+"""
+
+import numpy as np
+
+from landmarks import LandmarkExtractor
+
+
+class RoiHandTracker:
+    def __init__(self, full_model, roi_model=None, max_hands=2, pad=0.6, min_size=0.25,
+                 max_area=0.7, edge_margin=0.08, min_score=0.8, redetect_every=30):
+        """
+        full_model / roi_model: Mediapipe Hands instances (anything with .process(rgb)).
+            A separate roi_model keeps crop tracking state apart from full frames.
+        pad: padding around the hands' box, as a fraction of the box's larger side.
+        min_size: smallest crop side as a fraction of the frame's shorter side.
+        max_area: crops larger than this fraction of the frame are not worth it.
+        edge_margin: a landmark this close to the crop border (fraction of crop) forces a full pass.
+        """
+        self.full_model = full_model
+        self.roi_model = roi_model or full_model
+        self.pad = pad
+        self.min_size = min_size
+        self.max_area = max_area
+        self.edge_margin = edge_margin
+        self.min_score = min_score
+        self.redetect_every = redetect_every
+        self.extractor = LandmarkExtractor(max_hands)
+
+        self.roi = None            # (x1, y1, x2, y2) in pixels
+        self.roi_size = None       # (w, h) of the frame the ROI was computed for
+        self.expected_hands = 0
+        self.frames_since_full = 0
+        self.full_passes = 0
+        self.roi_passes = 0
+        self.last_mode = None
+
+    def reset(self):
+        self.roi = None
+        self.frames_since_full = 0
+
+    def process(self, rgb):
+        """
+        Detects hands in an RGB frame.
+        Returns (handedness, scores, landmarks) as landmarks.LandmarkExtractor.extract does,
+        with landmarks normalized to the full frame.
+        """
+        h, w = rgb.shape[:2]
+        roi = self.roi
+        if (roi is not None and self.roi_size == (w, h)
+                and self.frames_since_full < self.redetect_every):
+            out = self._process_roi(rgb, roi, w, h)
+            if out is not None:
+                self.frames_since_full += 1
+                return out
+        return self._process_full(rgb, w, h)
+
+    # -----------------------------
+    # Detection passes
+    # -----------------------------
+    def _process_full(self, rgb, w, h):
+        self.full_passes += 1
+        self.last_mode = "full"
+        self.frames_since_full = 0
+        handedness, scores, landmarks = self.extractor.extract(self.full_model.process(rgb))
+        self.expected_hands = len(handedness)
+        self.roi = self._roi_around(landmarks, w, h)
+        self.roi_size = (w, h)
+        return handedness, scores, landmarks
+
+    def _process_roi(self, rgb, roi, w, h):
+        x1, y1, x2, y2 = roi
+        crop = np.ascontiguousarray(rgb[y1:y2, x1:x2])
+        handedness, scores, landmarks = self.extractor.extract(self.roi_model.process(crop))
+        n = len(handedness)
+        if n < self.expected_hands or n == 0 or scores.min() < self.min_score:
+            return None
+        # a hand near a crop side that is not also the frame border is leaving the box
+        m = self.edge_margin
+        xs, ys = landmarks[:, :, 0], landmarks[:, :, 1]
+        if ((x1 > 0 and xs.min() < m) or (x2 < w and xs.max() > 1.0 - m)
+                or (y1 > 0 and ys.min() < m) or (y2 < h and ys.max() > 1.0 - m)):
+            return None
+
+        # crop-normalized -> full-frame normalized
+        cw, ch = x2 - x1, y2 - y1
+        landmarks[:, :, 0] = (x1 + landmarks[:, :, 0] * cw) / w
+        landmarks[:, :, 1] = (y1 + landmarks[:, :, 1] * ch) / h
+        landmarks[:, :, 2] *= cw / w
+        self.roi_passes += 1
+        self.last_mode = "roi"
+        return handedness, scores, landmarks
+
+    def _roi_around(self, landmarks, w, h):
+        """Padded pixel box around all hands, or None when cropping would not pay off."""
+        if not len(landmarks):
+            return None
+        xs = landmarks[:, :, 0] * w
+        ys = landmarks[:, :, 1] * h
+        bx1, bx2 = float(xs.min()), float(xs.max())
+        by1, by2 = float(ys.min()), float(ys.max())
+        side = max(bx2 - bx1, by2 - by1, self.min_size * min(w, h))
+        pad = self.pad * side
+        cx, cy = (bx1 + bx2) / 2, (by1 + by2) / 2
+        half_w = (bx2 - bx1) / 2 + pad
+        half_h = (by2 - by1) / 2 + pad
+        half_w = max(half_w, side / 2)
+        half_h = max(half_h, side / 2)
+        x1, x2 = int(max(0, cx - half_w)), int(min(w, cx + half_w))
+        y1, y2 = int(max(0, cy - half_h)), int(min(h, cy + half_h))
+        if x2 - x1 < 16 or y2 - y1 < 16:
+            return None
+        if (x2 - x1) * (y2 - y1) > self.max_area * w * h:
+            return None
+        return x1, y1, x2, y2
+
+    def stats(self):
+        total = self.full_passes + self.roi_passes
+        return {
+            "full_passes": self.full_passes,
+            "roi_passes": self.roi_passes,
+            "roi_ratio": self.roi_passes / total if total else 0.0,
+        }
@@ -0,0 +1,128 @@
+# scheduler.py
+"""
+Adaptive quality scheduler for the gesture loop.
+Measures end-to-end loop time against a latency budget and walks a ladder of
+quality levels: first the detection input is downscaled, then detection runs
+only every Nth frame (landmarks are predicted in between), then the preview
+is rendered less often. Levels change with hysteresis so the loop does not
+oscillate, and it climbs back up when the machine has headroom again.
+"""
+
+import numpy as np
+
+from landmarks import NUM_LANDMARKS, HandFrame
+
+# (detection scale, detect every N frames, render preview every N frames; 0 = never)
+DEFAULT_LEVELS = [
+    (1.0, 1, 1),
+    (0.75, 1, 1),
+    (0.5, 1, 1),
+    (0.5, 2, 2),
+    (0.5, 3, 3),
+    (0.4, 3, 0),
+]
+
+
+class FramePlan:
+    __slots__ = ("detect", "scale", "render")
+
+    def __init__(self, detect, scale, render):
+        self.detect = detect
+        self.scale = scale
+        self.render = render
+
+
+class AdaptiveScheduler:
+    def __init__(self, target_latency=0.040, levels=None, smoothing=0.1,
+                 degrade_after=15, upgrade_after=90, headroom=0.7):
+        """
+        target_latency: loop time budget in seconds.
+        degrade_after / upgrade_after: consecutive frames over budget / under
+            headroom * budget before moving one level down / up.
+        """
+        self.target_latency = target_latency
+        self.levels = levels or DEFAULT_LEVELS
+        self.smoothing = smoothing
+        self.degrade_after = degrade_after
+        self.upgrade_after = upgrade_after
+        self.headroom = headroom
+
+        self.level = 0
+        self.loop_time = None      # EWMA of recorded loop times (seconds)
+        self.frame = 0
+        self.changes = 0
+        self._over = 0
+        self._under = 0
+
+    def plan(self):
+        """Decides what to do for the next frame."""
+        scale, detect_every, render_every = self.levels[self.level]
+        n = self.frame
+        self.frame += 1
+        return FramePlan(detect=n % detect_every == 0,
+                         scale=scale,
+                         render=render_every > 0 and n % render_every == 0)
+
+    def record(self, seconds):
+        """Feeds one measured loop time; returns True if the level changed."""
+        if self.loop_time is None:
+            self.loop_time = seconds
+        else:
+            self.loop_time += (seconds - self.loop_time) * self.smoothing
+
+        if self.loop_time > self.target_latency:
+            self._over += 1
+            self._under = 0
+        elif self.loop_time < self.target_latency * self.headroom:
+            self._under += 1
+            self._over = 0
+        else:
+            self._over = self._under = 0
+
+        if self._over >= self.degrade_after and self.level < len(self.levels) - 1:
+            return self._set_level(self.level + 1)
+        if self._under >= self.upgrade_after and self.level > 0:
+            return self._set_level(self.level - 1)
+        return False
+
+    def _set_level(self, level):
+        self.level = level
+        self.changes += 1
+        self._over = self._under = 0
+        return True
+
+    def describe(self):
+        scale, detect_every, render_every = self.levels[self.level]
+        preview = "off" if not render_every else f"1/{render_every}"
+        return (f"level {self.level} (detect {int(scale * 100)}% every {detect_every}, preview {preview}), "
+                f"loop {1000 * (self.loop_time or 0):.1f}ms / {1000 * self.target_latency:.0f}ms")
+
+
+class LandmarkPredictor:
+    """
+    Fills frames where detection was skipped. Extrapolates each hand at constant
+    velocity from the last two detections (interpolating would need the next
+    detection and add a frame of latency), capped at max_horizon seconds.
+    """
+
+    def __init__(self, max_horizon=0.15):
+        self.max_horizon = max_horizon
+        self._prev = None
+        self._last = None
+
+    def update(self, t, hand_frame):
+        self._prev = self._last
+        self._last = (t, hand_frame)
+
+    def predict(self, t, w, h):
+        if self._last is None:
+            return HandFrame(np.zeros(0, dtype=np.uint8),
+                             np.zeros((0, NUM_LANDMARKS, 3), dtype=np.float32), w, h)
+        t1, last = self._last
+        landmarks = last.landmarks
+        if self._prev is not None:
+            t0, prev = self._prev
+            if t1 > t0 and np.array_equal(prev.handedness, last.handedness):
+                dt = min(t - t1, self.max_horizon)
+                landmarks = landmarks + (landmarks - prev.landmarks) * (dt / (t1 - t0))
+        return HandFrame(last.handedness, landmarks, w, h, last.scores)
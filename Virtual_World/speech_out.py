@@ -0,0 +1,430 @@
+# speech_out.py
+"""
+Non-blocking speech output for the voice assistant.
+
+speak() used to call engine.runAndWait(), so every confirmation ("Window
+minimized.", the long help list) kept the assistant from listening until it
+had been read out. SpeechQueue owns the TTS engine on a dedicated thread:
+
+  - say(text) returns at once; utterances wait in a priority queue
+    (URGENT < NORMAL < CONFIRM), first come first served within a priority;
+  - new speech barges in: whatever is playing is cut off (barge_in=False
+    queues behind it instead);
+  - stale confirmations are dropped: an utterance with a `key` replaces a
+    queued one with the same key (merged), and one that waited longer than
+    its `ttl` is skipped (stale);
+  - `history` keeps the (start, end) perf_counter times of recent
+    playback (end None while playing), for telling our own voice apart from
+    the user's.
+
+Engines implement start(text), poll() -> still speaking, stop(), close():
+  Pyttsx3Engine  pyttsx3 driven by its external loop (startLoop(False)/iterate) so it can be stopped
+  NullEngine     plays nothing; an utterance "lasts" as long as it would take to say
+  WavEngine      NullEngine that also writes each utterance, as played, to a WAV file (tests)
+  CachedEngine   plays WAV files from a phrase_cache.PhraseCache, synthesizing (render(text, path))
+                 only what is not cached yet; prepare(texts) fills the cache while nothing is said
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+import wave
+from collections import deque
+
+import numpy as np
+
+import metrics
+from phrase_cache import duration, join_wavs
+
+# Optional: WAV playback (Windows)
+try:
+    import winsound
+except ImportError:
+    winsound = None
+
+URGENT, NORMAL, CONFIRM = 0, 1, 2
+
+QUEUE_DEPTH = metrics.gauge("speech_queue_depth", "Utterances waiting to be spoken")
+DROPPED = metrics.counter("speech_dropped_total", "Utterances not spoken", labelnames=("reason",))
+INTERRUPTED = metrics.counter("speech_interrupted_total", "Utterances cut off by newer speech")
+SPEECH_WAIT = metrics.span("speech_wait_seconds", "say() -> playback start")
+
+
+# -----------------------------
+# Engines
+# -----------------------------
+class Pyttsx3Engine:
+    def __init__(self, rate=160):
+        import pyttsx3
+        self.engine = pyttsx3.init()
+        self.engine.setProperty('rate', rate)
+        self.engine.connect('finished-utterance', self._finished)
+        self.engine.startLoop(False)
+        self.speaking = False
+
+    def _finished(self, name, completed):
+        self.speaking = False
+
+    def start(self, text):
+        self.speaking = True
+        self.engine.say(text)
+
+    def poll(self):
+        self.engine.iterate()
+        return self.speaking
+
+    def stop(self):
+        self.engine.stop()
+        self.speaking = False
+
+    def render(self, text, path, timeout=10.0):
+        """Synthesizes `text` into the WAV file `path` instead of the speakers."""
+        self.speaking = True
+        self.engine.save_to_file(text, path)
+        deadline = time.perf_counter() + timeout
+        while self.speaking and time.perf_counter() < deadline:
+            self.engine.iterate()
+            time.sleep(0.005)
+
+    def close(self):
+        self.engine.endLoop()
+
+
+class NullEngine:
+    """Speaks silently at `words_per_minute`; `spoken` lists (text, seconds played, completed)."""
+
+    def __init__(self, words_per_minute=160):
+        self.seconds_per_char = 60.0 / (words_per_minute * 6)   # ~6 characters per word with the space
+        self.spoken = []
+        self._text = None
+        self._started = 0.0
+        self._duration = 0.0
+
+    def start(self, text):
+        self._text = text
+        self._started = time.perf_counter()
+        self._duration = len(text) * self.seconds_per_char
+
+    def poll(self):
+        if self._text is not None and time.perf_counter() - self._started >= self._duration:
+            self._end(self._duration, True)
+        return self._text is not None
+
+    def stop(self):
+        if self._text is not None:
+            self._end(min(self._duration, time.perf_counter() - self._started), False)
+
+    def _end(self, seconds, completed):
+        self.spoken.append((self._text, seconds, completed))
+        self._text = None
+
+    def render(self, text, path):
+        """A tone as long as `text` would take to say, as a WAV file."""
+        write_tone(path, len(text) * self.seconds_per_char)
+
+    def close(self):
+        pass
+
+
+class WavEngine(NullEngine):
+    """NullEngine that writes NNN.wav per utterance into `directory` (a tone as long as what was played)."""
+
+    def __init__(self, directory, words_per_minute=160, sample_rate=16000):
+        super().__init__(words_per_minute)
+        self.directory = directory
+        self.sample_rate = sample_rate
+        os.makedirs(directory, exist_ok=True)
+
+    def _end(self, seconds, completed):
+        write_tone(os.path.join(self.directory, f"{len(self.spoken):03d}.wav"), seconds, self.sample_rate)
+        super()._end(seconds, completed)
+
+
+def write_tone(path, seconds, sample_rate=16000):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    samples = (3000 * np.sin(2 * np.pi * 220 * t)).astype(np.int16)
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(samples.tobytes())
+
+
+class WavPlayer:
+    """
+    Plays WAV files asynchronously with winsound; silent (or without
+    winsound) it only keeps time. `played` lists the recent paths.
+    """
+
+    def __init__(self, silent=False):
+        self.silent = silent or winsound is None
+        self.played = deque(maxlen=64)
+        self._until = 0.0
+
+    @staticmethod
+    def available():
+        return winsound is not None
+
+    def play(self, path):
+        seconds = duration(path)
+        if not self.silent:
+            winsound.PlaySound(path, winsound.SND_FILENAME | winsound.SND_ASYNC | winsound.SND_NODEFAULT)
+        self.played.append(path)
+        self._until = time.perf_counter() + seconds
+
+    def playing(self):
+        return time.perf_counter() < self._until
+
+    def stop(self):
+        if not self.silent and self.playing():
+            winsound.PlaySound(None, 0)
+        self._until = 0.0
+
+
+class CachedEngine:
+    """
+    Speaks from `cache` (a phrase_cache.PhraseCache). A phrase is synthesized
+    to WAV by synthesizer_factory()'s render() the first time, and played
+    from disk by `player` after that; a sentence matching one of the cache's
+    templates is joined from its cached fragments. If the cache fails, the
+    text is spoken by the synthesizer directly.
+    """
+
+    def __init__(self, cache, synthesizer_factory=Pyttsx3Engine, player=None):
+        self.cache = cache
+        self.synthesizer = synthesizer_factory()
+        self.player = player or WavPlayer()
+        self._live = False
+
+    def _render(self, text):
+        return self.cache.put(text, lambda path: self.synthesizer.render(text, path))
+
+    def audio(self, text):
+        """Path of the WAV for `text`, rendering or joining it first if it is not cached."""
+        path = self.cache.get(text)
+        if path is not None:
+            return path
+        parts = self.cache.split(text)
+        if parts == [text]:
+            return self._render(text)
+        paths = [self.cache.get(part) or self._render(part) for part in parts]
+        try:
+            return self.cache.put(text, lambda path: join_wavs(paths, path))
+        except ValueError:
+            # fragments in different formats: render the sentence as a whole
+            return self._render(text)
+
+    def prepare(self, text):
+        self.audio(text)
+
+    def start(self, text):
+        try:
+            path = self.audio(text)
+        except Exception as e:
+            print(f"[WARNING] Phrase cache failed ({e}); speaking directly.")
+            self._live = True
+            self.synthesizer.start(text)
+            return
+        self._live = False
+        self.player.play(path)
+
+    def poll(self):
+        if self._live:
+            return self.synthesizer.poll()
+        return self.player.playing()
+
+    def stop(self):
+        if self._live:
+            self.synthesizer.stop()
+        else:
+            self.player.stop()
+
+    def close(self):
+        self.player.stop()
+        self.synthesizer.close()
+
+
+# -----------------------------
+# Queue
+# -----------------------------
+class Utterance:
+    def __init__(self, text, priority, key, ttl, seq):
+        self.text = text
+        self.priority = priority
+        self.key = key
+        self.ttl = ttl
+        self.seq = seq
+        self.queued_at = time.perf_counter()
+        self.dropped = False
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class SpeechQueue:
+    """
+    Speech output thread. engine_factory() is called on that thread (TTS
+    engines generally must be used from the thread that created them).
+    """
+
+    def __init__(self, engine_factory=Pyttsx3Engine, poll=0.02, history=8):
+        self.engine_factory = engine_factory
+        self.poll = poll
+        self.history = deque(maxlen=history)
+        self.engine = None
+        self._heap = []
+        self._keys = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._interrupt = False
+        self._closing = False
+        self._drain = False
+        self._prepare = deque()   # texts for engine.prepare() while nothing is to be said
+        self.current = None
+        self._thread = threading.Thread(target=self._run, name="speech", daemon=True)
+        self._thread.start()
+
+    def say(self, text, priority=NORMAL, key=None, ttl=None, barge_in=True):
+        with self._cond:
+            if self._closing:
+                return
+            utterance = Utterance(text, priority, key, ttl, next(self._seq))
+            if key is not None:
+                older = self._keys.get(key)
+                if older is not None and not older.dropped:
+                    older.dropped = True
+                    DROPPED.labels("merged").inc()
+                self._keys[key] = utterance
+            heapq.heappush(self._heap, utterance)
+            if barge_in and self.current is not None:
+                self._interrupt = True
+            QUEUE_DEPTH.set(self.depth)
+            self._cond.notify()
+
+    def prepare(self, texts):
+        """Lets an engine with prepare(text) (CachedEngine) get `texts` ready while idle."""
+        with self._cond:
+            self._prepare.extend(texts)
+            self._cond.notify()
+
+    def interrupt(self):
+        """Cuts off what is playing now (the queue is kept)."""
+        with self._cond:
+            if self.current is not None:
+                self._interrupt = True
+
+    def clear(self):
+        """Drops everything queued and cuts off what is playing."""
+        with self._cond:
+            for utterance in self._heap:
+                utterance.dropped = True
+            self._heap.clear()
+            self._keys.clear()
+            self.interrupt()
+            QUEUE_DEPTH.set(0)
+
+    @property
+    def depth(self):
+        return sum(1 for u in self._heap if not u.dropped)
+
+    @property
+    def speaking(self):
+        return self.current is not None
+
+    def wait(self, timeout=None):
+        """Blocks until everything queued has been spoken; False on timeout."""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        with self._cond:
+            while self.current is not None or self.depth:
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(min(self.poll, remaining) if remaining is not None else self.poll)
+        return True
+
+    def _next(self):
+        """Pops the next utterance to speak (caller holds the lock), skipping dropped and stale ones."""
+        now = time.perf_counter()
+        while self._heap:
+            utterance = heapq.heappop(self._heap)
+            if utterance.dropped:
+                continue
+            if self._keys.get(utterance.key) is utterance:
+                del self._keys[utterance.key]
+            if utterance.ttl is not None and now - utterance.queued_at > utterance.ttl:
+                DROPPED.labels("stale").inc()
+                continue
+            return utterance
+        return None
+
+    def _run(self):
+        try:
+            self.engine = self.engine_factory()
+        except Exception as e:
+            print(f"[ERROR] Speech output unavailable: {e}")
+            with self._cond:
+                self._closing = True
+                self._heap.clear()
+                self._cond.notify_all()
+            return
+        prepare = getattr(self.engine, "prepare", None)
+        while True:
+            with self._cond:
+                utterance = self._next()
+                while utterance is None and not self._closing and not (prepare and self._prepare):
+                    self._cond.wait()
+                    utterance = self._next()
+                if self._closing and (utterance is None or not self._drain):
+                    break
+                if utterance is None:
+                    text = self._prepare.popleft()
+                else:
+                    self.current = utterance
+                    self._interrupt = False
+                    QUEUE_DEPTH.set(self.depth)
+            if utterance is None:
+                try:
+                    prepare(text)
+                except Exception as e:
+                    print(f"[WARNING] Could not prepare '{text}': {e}")
+                continue
+            self._play(utterance)
+            with self._cond:
+                self.current = None
+                self._cond.notify_all()
+        try:
+            self.engine.close()
+        except Exception:
+            pass
+
+    def _play(self, utterance):
+        started = time.perf_counter()
+        SPEECH_WAIT.record(utterance.queued_at, started - utterance.queued_at)
+        interval = [started, None]
+        self.history.append(interval)
+        try:
+            self.engine.start(utterance.text)
+            while self.engine.poll():
+                if self._interrupt or (self._closing and not self._drain):
+                    self.engine.stop()
+                    if self._interrupt:
+                        INTERRUPTED.inc()
+                    break
+                time.sleep(self.poll)
+        except Exception as e:
+            print("TTS error:", e)
+        interval[1] = time.perf_counter()
+
+    def close(self, drain=True, timeout=5.0):
+        """Stops the thread; drain=True speaks what is queued first (up to `timeout`)."""
+        with self._cond:
+            self._closing = True
+            self._drain = drain
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            with self._cond:
+                self._drain = False
+            self._thread.join(1.0)
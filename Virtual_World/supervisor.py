@@ -0,0 +1,303 @@
+# supervisor.py
+"""
+Health monitoring and restarts for the module processes started by main.py.
+
+Every supervised process gets a HealthSlot: a few doubles in shared memory
+plus a stop event. Inside the process a Heartbeat writes its last beat time,
+loop FPS, p50/p99 loop latency and last recognition latency into the slot
+(plain stores, no syscalls, so it can be called every frame). The Supervisor
+polls all slots every few tens of milliseconds and
+  - warns when a worker's beats are late or its FPS / p99 latency are out of
+    bounds (degraded), and again when it recovers;
+  - restarts a worker that crashed, or hung (no beat for hang_timeout and no
+    announced long operation pending), with exponential backoff;
+  - on shutdown sets every stop event, waits, and only then terminates.
+
+A worker that blocks on purpose (e.g. listening for speech) announces it with
+heartbeat.expect(seconds), so it is not mistaken for a hung one.
+"""
+
+import time
+from multiprocessing import Event, RawArray
+
+import numpy as np
+
+import metrics
+
+# HealthSlot.values layout
+BEAT, DEADLINE, FPS, P50_MS, P99_MS, RECOGNITION_MS, COUNT = range(7)
+SLOT_FIELDS = 7
+
+
+class HealthSlot:
+    """Shared heartbeat values and stop event for one worker (pass it to the Process)."""
+
+    def __init__(self):
+        self.values = RawArray("d", SLOT_FIELDS)
+        self.stop = Event()
+
+    def reset(self):
+        for i in range(SLOT_FIELDS):
+            self.values[i] = 0.0
+        self.stop.clear()
+
+    def read(self):
+        v = self.values
+        return {"beat": v[BEAT], "deadline": v[DEADLINE], "fps": v[FPS], "p50_ms": v[P50_MS],
+                "p99_ms": v[P99_MS], "recognition_ms": v[RECOGNITION_MS], "count": int(v[COUNT])}
+
+
+# -----------------------------
+# Worker side
+# -----------------------------
+class Heartbeat:
+    """
+    Written by the worker. beat(loop_seconds) once per loop iteration; FPS and
+    latency percentiles over the last `window` iterations are published every
+    `publish_every` seconds.
+    """
+
+    def __init__(self, slot, window=128, publish_every=0.1):
+        self.values = slot.values
+        self.stop_event = slot.stop
+        self.publish_every = publish_every
+        self._latency = np.zeros(window, dtype=np.float64)
+        self._pos = 0
+        self._filled = 0
+        self.count = 0
+        self._published_at = time.time()
+        self._published_count = 0
+        self.values[BEAT] = self._published_at
+
+    def beat(self, loop_seconds=None):
+        now = time.time()
+        v = self.values
+        v[BEAT] = now
+        self.count += 1
+        if loop_seconds is not None:
+            self._latency[self._pos] = loop_seconds
+            self._pos = (self._pos + 1) % len(self._latency)
+            self._filled = min(self._filled + 1, len(self._latency))
+        if now - self._published_at >= self.publish_every:
+            self._publish(now)
+
+    def _publish(self, now):
+        v = self.values
+        v[FPS] = (self.count - self._published_count) / (now - self._published_at)
+        if self._filled:
+            p50, p99 = np.percentile(self._latency[:self._filled], (50, 99))
+            v[P50_MS] = 1000.0 * p50
+            v[P99_MS] = 1000.0 * p99
+        v[COUNT] = self.count
+        self._published_at = now
+        self._published_count = self.count
+
+    def expect(self, seconds):
+        """Announces a blocking call of up to `seconds` (not a hang while it lasts)."""
+        now = time.time()
+        self.values[BEAT] = now
+        self.values[DEADLINE] = now + seconds
+
+    def done(self):
+        """Ends an expect() early."""
+        self.values[DEADLINE] = 0.0
+        self.beat()
+
+    def recognition(self, seconds):
+        """Records one speech recognition latency."""
+        self.values[RECOGNITION_MS] = 1000.0 * seconds
+        self.beat()
+
+    def stopping(self):
+        return self.stop_event.is_set()
+
+
+# -----------------------------
+# Supervisor side
+# -----------------------------
+FAILURES = metrics.counter("supervisor_failures_total", "Worker crashes and hangs",
+                           labelnames=("worker", "reason"))
+RESTARTS = metrics.counter("supervisor_restarts_total", "Worker restarts", labelnames=("worker",))
+DEGRADED = metrics.gauge("worker_degraded", "1 while the worker is degraded", labelnames=("worker",))
+HEARTBEAT_AGE = metrics.gauge("worker_heartbeat_age_seconds", "Time since the last heartbeat",
+                              labelnames=("worker",))
+WORKER_FPS = metrics.gauge("worker_loop_fps", "Worker loop rate", labelnames=("worker",))
+WORKER_P50 = metrics.gauge("worker_loop_p50_ms", "Worker loop latency, median", labelnames=("worker",))
+WORKER_P99 = metrics.gauge("worker_loop_p99_ms", "Worker loop latency, 99th percentile", labelnames=("worker",))
+WORKER_RECOGNITION = metrics.gauge("worker_recognition_ms", "Last speech recognition latency",
+                                   labelnames=("worker",))
+
+class _Worker:
+    def __init__(self, name, start, slot, process, hang_timeout, stale_after,
+                 start_grace, min_fps, max_p99_ms):
+        self.name = name
+        self.start = start
+        self.slot = slot
+        self.process = process
+        self.hang_timeout = hang_timeout
+        self.stale_after = stale_after
+        self.start_grace = start_grace
+        self.min_fps = min_fps
+        self.max_p99_ms = max_p99_ms
+        self.started_at = time.time()
+        self.failures = 0
+        self.restarts = 0
+        self.restart_at = None
+        self.degraded = None
+
+
+class Supervisor:
+    """
+    Watches worker processes through their HealthSlots.
+    backoff: (first delay, max delay) in seconds; the delay doubles with each
+    consecutive failure and resets once a worker has run for stable_after seconds.
+    """
+
+    def __init__(self, poll=0.05, backoff=(0.5, 30.0), stable_after=30.0, report_every=10.0):
+        self.poll = poll
+        self.backoff = backoff
+        self.stable_after = stable_after
+        self.report_every = report_every
+        self.workers = {}
+
+    def add(self, name, start, slot=None, process=None, hang_timeout=5.0, stale_after=None,
+            start_grace=30.0, min_fps=None, max_p99_ms=None):
+        """
+        start: callable(slot) -> a new (not yet started) Process, used for the
+        first start (unless a running `process` is given) and every restart.
+        hang_timeout: seconds without a beat before the worker counts as hung
+        (None: crash detection only). stale_after: seconds without a beat before
+        it counts as degraded (default hang_timeout / 4). start_grace: time a
+        fresh process gets for its first beat. min_fps / max_p99_ms: optional
+        degradation bounds for the published metrics.
+        """
+        slot = slot or HealthSlot()
+        if process is None:
+            slot.reset()
+            process = start(slot)
+            process.start()
+        stale_after = stale_after if stale_after is not None else (
+            hang_timeout / 4 if hang_timeout else None)
+        self.workers[name] = _Worker(name, start, slot, process, hang_timeout, stale_after,
+                                     start_grace, min_fps, max_p99_ms)
+
+    def run(self, stop_event=None):
+        """Supervises until KeyboardInterrupt or stop_event, then shuts down."""
+        last_report = time.time()
+        try:
+            while stop_event is None or not stop_event.is_set():
+                time.sleep(self.poll)
+                now = time.time()
+                for worker in self.workers.values():
+                    self.check(worker, now)
+                if self.report_every and now - last_report >= self.report_every:
+                    last_report = now
+                    print("[INFO] Health: " + self.describe())
+        except KeyboardInterrupt:
+            print("\n[INFO] Exiting program...")
+        finally:
+            self.shutdown()
+
+    def check(self, worker, now):
+        """One health check: restart if due, crashed or hung; flag degradation."""
+        if worker.restart_at is not None:
+            if now >= worker.restart_at:
+                self._start(worker, now)
+            return
+        if not worker.process.is_alive():
+            FAILURES.labels(worker.name, "exit").inc()
+            self._failed(worker, now, f"exited with code {worker.process.exitcode}")
+            return
+        health = worker.slot.read()
+        if health["beat"]:
+            # an announced blocking call counts as a beat until its deadline
+            age = max(0.0, now - max(health["beat"], health["deadline"]))
+            limit = worker.hang_timeout
+        else:
+            age = now - worker.started_at
+            limit = worker.start_grace
+        if metrics.is_enabled():
+            self._export(worker, health, age)
+        if worker.hang_timeout and age > limit:
+            FAILURES.labels(worker.name, "hang").inc()
+            self._failed(worker, now, f"sent no heartbeat for {age:.1f}s")
+            return
+
+        problems = []
+        if worker.stale_after and health["beat"] and age > worker.stale_after:
+            problems.append(f"heartbeat {1000 * age:.0f} ms late")
+        if worker.min_fps and health["count"] and health["fps"] < worker.min_fps:
+            problems.append(f"{health['fps']:.1f} FPS")
+        if worker.max_p99_ms and health["count"] and health["p99_ms"] > worker.max_p99_ms:
+            problems.append(f"p99 {health['p99_ms']:.0f} ms")
+        degraded = ", ".join(problems) or None
+        if degraded and not worker.degraded:
+            print(f"[WARNING] {worker.name} degraded: {degraded}")
+        elif worker.degraded and not degraded:
+            print(f"[INFO] {worker.name} recovered.")
+        worker.degraded = degraded
+        DEGRADED.labels(worker.name).set(1 if degraded else 0)
+        if worker.failures and now - worker.started_at >= self.stable_after:
+            worker.failures = 0
+
+    def _export(self, worker, health, age):
+        name = worker.name
+        HEARTBEAT_AGE.labels(name).set(age)
+        WORKER_FPS.labels(name).set(health["fps"])
+        WORKER_P50.labels(name).set(health["p50_ms"])
+        WORKER_P99.labels(name).set(health["p99_ms"])
+        WORKER_RECOGNITION.labels(name).set(health["recognition_ms"])
+
+    def _failed(self, worker, now, reason):
+        if worker.process.is_alive():
+            worker.process.terminate()
+            worker.process.join(1.0)
+            if worker.process.is_alive():
+                worker.process.kill()
+                worker.process.join()
+        worker.failures += 1
+        first, limit = self.backoff
+        delay = min(limit, first * 2 ** (worker.failures - 1))
+        print(f"[WARNING] {worker.name} process {reason}. Restarting in {delay:.1f}s...")
+        worker.restart_at = now + delay
+        worker.degraded = None
+
+    def _start(self, worker, now):
+        worker.slot.reset()
+        worker.process = worker.start(worker.slot)
+        worker.process.start()
+        worker.started_at = now
+        worker.restart_at = None
+        worker.restarts += 1
+        RESTARTS.labels(worker.name).inc()
+
+    def describe(self):
+        parts = []
+        for worker in self.workers.values():
+            h = worker.slot.read()
+            if worker.restart_at is not None:
+                text = "restarting"
+            elif h["recognition_ms"]:
+                text = f"recognition {h['recognition_ms']:.0f} ms"
+            elif h["count"]:
+                text = f"{h['fps']:.1f} FPS p50 {h['p50_ms']:.1f} ms p99 {h['p99_ms']:.1f} ms"
+            else:
+                text = "starting" if not h["beat"] else "up"
+            if worker.restarts:
+                text += f" ({worker.restarts} restarts)"
+            parts.append(f"{worker.name} {text}")
+        return " | ".join(parts)
+
+    def shutdown(self, timeout=3.0):
+        """Asks every worker to stop, waits up to `timeout`, then terminates the rest."""
+        for worker in self.workers.values():
+            worker.slot.stop.set()
+        deadline = time.time() + timeout
+        for worker in self.workers.values():
+            worker.process.join(max(0.0, deadline - time.time()))
+        for worker in self.workers.values():
+            if worker.process.is_alive():
+                worker.process.terminate()
+        for worker in self.workers.values():
+            worker.process.join()
+        print("[INFO] All processes terminated successfully.")
@@ -0,0 +1,75 @@
+import threading
+
+from actuator import RecordingBackend, ThreadedActuator
+
+
+class BlockingBackend(RecordingBackend):
+    """RecordingBackend whose first action blocks until `release` is set (a stalled OS call)."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def apply(self, action, args):
+        self.started.set()
+        self.release.wait(5)
+        super().apply(action, args)
+
+
+def _stalled(max_pending):
+    backend = BlockingBackend()
+    actuator = ThreadedActuator(backend, max_pending=max_pending)
+    actuator.move_to(0, 0)
+    assert backend.started.wait(5)
+    return backend, actuator
+
+
+def test_pending_stays_bounded_while_backend_stalls():
+    backend, actuator = _stalled(max_pending=4)
+    for i in range(200):
+        actuator.move_to(i, i)
+        actuator.move_to(i + 1, i + 1)
+        actuator.click()
+        actuator.scroll(1)
+        assert len(actuator._pending) <= 4
+    assert actuator.counts["merged"] >= 200
+    assert actuator.counts["dropped"] > 0
+    backend.release.set()
+    assert actuator.flush(5)
+    actuator.close()
+
+
+def test_clicks_land_where_they_were_made():
+    backend, actuator = _stalled(max_pending=3)
+    for i in range(50):
+        actuator.move_to(i, 0)
+        actuator.move_to(i, 1)
+        actuator.click()
+        actuator.scroll(2)
+    backend.release.set()
+    assert actuator.flush(5)
+    actuator.close()
+    actions = [(action, args) for _, action, args in backend.actions]
+    clicks = [i for i, (action, _) in enumerate(actions) if action == "click"]
+    assert clicks
+    for i in clicks:
+        moves = [args for action, args in actions[:i] if action == "move_to"]
+        x, y = moves[-1]
+        assert y == 1                       # the move made just before that click
+    # the scroll of a dropped click's segment is carried forward, never lost
+    scrolled = sum(args[0] for action, args in actions if action == "scroll")
+    assert scrolled == 100
+
+
+def test_no_trim_under_limit():
+    backend = RecordingBackend()
+    actuator = ThreadedActuator(backend, max_pending=64)
+    actuator.move_to(1, 1)
+    actuator.click()
+    actuator.move_to(2, 2)
+    actuator.right_click()
+    assert actuator.flush(2)
+    actuator.close()
+    assert [a for _, a, _ in backend.actions] == ["move_to", "click", "move_to", "right_click"]
+    assert actuator.counts["dropped"] == 0
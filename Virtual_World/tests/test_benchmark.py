@@ -0,0 +1,16 @@
+import benchmark
+from voice_stream import EnergyVad
+
+
+def test_committed_asr_fixtures_load():
+    fixtures = benchmark.load_asr_fixtures(benchmark.ASR_FIXTURES)
+
+    assert len(fixtures) >= 5
+    for pcm, sample_rate, duration, expected in fixtures:
+        assert sample_rate == 16000
+        assert expected and expected == expected.strip()
+        assert 0.5 < duration < 5.0
+        vad = EnergyVad(sample_rate)
+        segments = vad.feed(pcm)
+        segments += [s for s in [vad.flush()] if s is not None]
+        assert len(segments) == 1   # one utterance per file, framed by silence
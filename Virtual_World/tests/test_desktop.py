@@ -0,0 +1,77 @@
+import random
+
+from desktop import SimulatedDesktop, WindowIndex
+
+
+def _scan(desktop, name):
+    """What a fresh EnumWindows pass would return for `name`."""
+    name = name.lower()
+    return sorted(hwnd for hwnd, w in desktop.windows.items()
+                  if name in w.title.lower() or name in w.class_name.lower())
+
+
+def test_find_windows_matches_title_or_class_case_insensitively():
+    desktop = SimulatedDesktop()
+    notepad = desktop.create_window("notes.txt - Notepad", "Notepad")
+    chrome = desktop.create_window("Inbox - Google Chrome", "Chrome_WidgetWin_1")
+    explorer = desktop.create_window("Downloads", "CabinetWClass")
+
+    assert desktop.find_windows("notepad") == [notepad]
+    assert desktop.find_windows("CHROME") == [chrome]
+    assert desktop.find_windows("cabinet") == [explorer]        # class name only
+    assert desktop.find_windows("down") == [explorer]           # substring of the title
+    assert sorted(desktop.find_windows("o")) == sorted([notepad, chrome, explorer])
+    assert desktop.find_windows("firefox") == []
+
+
+def test_cached_answers_follow_create_rename_and_destroy():
+    desktop = SimulatedDesktop()
+    first = desktop.create_window("a.txt - Notepad")
+    assert desktop.find_windows("notepad") == [first]   # now cached
+
+    second = desktop.create_window("b.txt - Notepad", "Notepad")
+    assert desktop.find_windows("notepad") == [first, second]
+
+    desktop.rename_window(first, "Untitled - Paint")
+    assert desktop.find_windows("paint") == [first]
+    assert desktop.find_windows("notepad") == [second]
+
+    desktop.rename_window(first, "a.txt - Notepad")
+    assert desktop.find_windows("paint") == []
+    assert sorted(desktop.find_windows("notepad")) == [first, second]
+
+    desktop.close(second)
+    assert desktop.find_windows("notepad") == [first]
+    desktop.destroy_window(first)
+    assert desktop.find_windows("notepad") == []
+    assert len(desktop.index) == 0
+
+
+def test_index_agrees_with_a_full_scan_under_random_changes():
+    rng = random.Random(7)
+    titles = ["Notepad", "Google Chrome", "Downloads", "Calculator", "Visual Studio Code"]
+    names = ["notepad", "chrome", "down", "calc", "code", "e", "missing"]
+    desktop = SimulatedDesktop()
+    desktop.index = WindowIndex(cached=3)   # small, so answers are evicted and rebuilt too
+    for _ in range(500):
+        op = rng.random()
+        if op < 0.4 or not desktop.windows:
+            desktop.create_window(f"doc {rng.randint(0, 9)} - {rng.choice(titles)}", rng.choice(["", "Cls"]))
+        elif op < 0.6:
+            desktop.rename_window(rng.choice(list(desktop.windows)), rng.choice(titles))
+        elif op < 0.75:
+            desktop.destroy_window(rng.choice(list(desktop.windows)))
+        name = rng.choice(names)
+        assert sorted(desktop.find_windows(name)) == _scan(desktop, name)
+
+
+def test_reset_replaces_the_table_and_forgets_answers():
+    index = WindowIndex()
+    index.created(1, "Notepad", "")
+    assert index.find("notepad") == [1]
+
+    index.reset([(2, "Untitled - Notepad", "Notepad"), (3, "Chrome", "")])
+    assert index.find("notepad") == [2]
+    assert len(index) == 2
+    index.renamed(99, "Notepad")   # unknown window: ignored
+    assert index.find("notepad") == [2]
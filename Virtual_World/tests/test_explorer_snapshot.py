@@ -0,0 +1,68 @@
+from desktop import SimElement, SimulatedDesktop
+from explorer_snapshot import ExplorerSnapshots
+
+
+def _item(i):
+    col, row = i % 10, i // 10
+    return SimElement(f"file{i}.txt", "ListItem", (100 * col, 20 * row, 100 * col + 90, 20 * row + 18))
+
+
+def _explorer(elements, title="Downloads"):
+    desktop = SimulatedDesktop()
+    hwnd = desktop.create_window(title, "CabinetWClass", elements)
+    return desktop, hwnd, ExplorerSnapshots(desktop)
+
+
+def _flat(items):
+    return [SimElement("Navigation", "Pane", children=[SimElement("Tree", "Tree")]),
+            SimElement("Shell", "Pane", children=[SimElement("Items View", "List", children=items)])]
+
+
+def test_grouped_view_items_in_order():
+    groups = [SimElement("Today", "Group", children=[_item(i) for i in range(3)]),
+              SimElement("Earlier this week", "Group", children=[_item(i) for i in range(3, 5)])]
+    desktop, _, explorer = _explorer(_flat(groups))
+    snapshot = explorer.get()
+    assert len(snapshot) == 5
+    assert [name for _, name, _ in snapshot.page(1)] == [f"file{i}.txt" for i in range(5)]
+    explorer.close()
+
+
+def test_paging_past_first_page():
+    desktop, _, explorer = _explorer(_flat([_item(i) for i in range(150)]))
+    snapshot = explorer.get()
+    assert len(snapshot) == 150 and snapshot.pages == 3
+    assert [n for n, _, _ in snapshot.page(2)] == list(range(61, 121))
+    assert [n for n, _, _ in snapshot.page(3)] == list(range(121, 151))
+    assert snapshot.item(75)[0] == "file74.txt"
+    assert snapshot.item(151) is None
+    explorer.close()
+
+
+def test_cached_until_event():
+    desktop, hwnd, explorer = _explorer(_flat([_item(i) for i in range(10)]))
+    first = explorer.get()
+    assert explorer.get() is first
+    for change in (lambda: desktop.focus(hwnd),
+                   lambda: desktop.scroll(hwnd, 20),
+                   lambda: desktop.set_content(hwnd, _flat([_item(i) for i in range(4)]))):
+        snapshot = explorer.get()
+        change()
+        assert not snapshot.valid
+        assert explorer.get() is not snapshot
+    assert len(explorer.get()) == 4
+    explorer.close()
+
+
+def test_click_number_reads_shown_snapshot():
+    items = [_item(i) for i in range(80)]
+    desktop, hwnd, explorer = _explorer(_flat(items))
+    explorer.shown = explorer.get()
+    explorer.shown.page(1)
+    calls = sum(e.calls for e in items)
+    name, (x, y) = explorer.current().item(7)
+    assert (name, x, y) == ("file6.txt", 645, 9)
+    assert sum(e.calls for e in items) == calls     # already resolved: no UI calls
+    desktop.scroll(hwnd, 20)
+    assert explorer.current() is not explorer.shown
+    explorer.close()
@@ -0,0 +1,69 @@
+import pytest
+
+from intent_router import IntentRouter
+from voice_grammar import COMMANDS, parse_keys, parse_number
+
+
+@pytest.fixture(scope="module")
+def router():
+    # the command table voice_os registers its handlers with
+    router = IntentRouter(slot_types={"number": ("word", parse_number), "keys": ("rest", parse_keys)})
+    for name, patterns in COMMANDS.items():
+        router.add(name, patterns)
+    return router
+
+
+def _intent(router, text):
+    match = router.match(text)
+    return None if match is None else (match.intent.name, match.slots)
+
+
+@pytest.mark.parametrize("text, name", [
+    ("minimize window", "minimize"),
+    ("please minimize this window now", "minimize"),
+    ("could you minimize the window", "minimize"),
+    ("enumerate the files please", "enumerate_files"),
+    ("please refresh the page", "refresh"),
+    ("go back please", "back"),
+    ("more items", "next_page"),
+    ("please minimise window", "minimize"),     # one edit off
+    ("refesh", "refresh"),
+])
+def test_phrasings(router, text, name):
+    assert _intent(router, text) == (name, {})
+
+
+def test_slots(router):
+    assert _intent(router, "click number four") == ("click_number", {"number": 4})
+    assert _intent(router, "please click on number 12") == ("click_number", {"number": 12})
+    assert _intent(router, "press alt f four") == ("press", {"keys": ["alt", "f4"]})
+    assert _intent(router, "type help me") == ("type", {"text": "help me"})
+    assert _intent(router, "open app chrome") == ("open_app", {"app": "chrome"})
+
+
+def test_more_literals_win(router):
+    assert _intent(router, "close window") == ("close_window", {})
+    assert _intent(router, "close notepad") == ("close_app", {"app": "notepad"})
+    assert _intent(router, "open downloads") == ("open_downloads", {})
+
+
+def test_no_match(router):
+    assert router.match("blah blah") is None
+    assert router.match("") is None
+
+
+def test_strict_skip_limit():
+    router = IntentRouter(loose=False)
+    router.add("refresh", ["refresh"])
+    assert router.match("please refresh now").skipped == 2
+    assert router.match("could you please refresh") is None
+    assert router.match("refresh the page now") is None
+
+
+def test_dispatch_and_registration_order():
+    router = IntentRouter()
+    router.add("first", ["stop"], lambda who: ("first", who))
+    router.add("second", ["stop"], lambda who: ("second", who))
+    match, result = router.dispatch("stop", "me")
+    assert match.intent.name == "first" and result == ("first", "me")
+    assert router.dispatch("go", "me") == (None, None)
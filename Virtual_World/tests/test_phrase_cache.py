@@ -0,0 +1,98 @@
+import os
+import wave
+
+import pytest
+
+from phrase_cache import PhraseCache, join_wavs, template_fragments
+from speech_out import NullEngine, write_tone
+
+ENGINE = NullEngine()
+WORDS = ["one", "two", "six", "ten"]   # same length: every rendered file has the same size
+
+
+def _render(text):
+    return lambda path: ENGINE.render(text, path)
+
+
+def _fill(cache, words):
+    return [cache.put(word, _render(word)) for word in words]
+
+
+@pytest.fixture
+def file_size(tmp_path):
+    path = str(tmp_path / "sample.wav")
+    ENGINE.render(WORDS[0], path)
+    return os.path.getsize(path)
+
+
+def test_least_recently_used_phrase_is_evicted_first(tmp_path, file_size):
+    cache = PhraseCache(str(tmp_path / "cache"), max_bytes=3 * file_size)
+    one, two, six = _fill(cache, WORDS[:3])
+    assert cache.get("one") == one        # "two" is now the least recently used
+
+    _fill(cache, ["ten"])
+    assert "two" not in cache and not os.path.exists(two)
+    assert all(word in cache for word in ["one", "six", "ten"])
+    assert cache.evictions == 1
+    assert cache.bytes == 3 * file_size
+    assert cache.get("two") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_use_order_survives_a_restart(tmp_path, file_size):
+    directory = str(tmp_path / "cache")
+    cache = PhraseCache(directory, max_bytes=10 * file_size)
+    paths = dict(zip(WORDS, _fill(cache, WORDS)))
+    # last used: six, one, ten, two (oldest first); mtime is the record of use
+    for age, word in enumerate(["two", "ten", "one", "six"]):
+        os.utime(paths[word], (1000.0 + age, 1000.0 + age))
+    open(os.path.join(directory, "0" * 40 + ".123.part.wav"), "wb").close()   # interrupted render
+
+    reloaded = PhraseCache(directory, max_bytes=2 * file_size)
+    assert [word for word in WORDS if word in reloaded] == ["one", "six"]
+    assert reloaded.evictions == 2
+    assert sorted(os.listdir(directory)) == sorted(os.path.basename(paths[w]) for w in ["one", "six"])
+
+
+def test_voice_is_part_of_the_key(tmp_path):
+    directory = str(tmp_path / "cache")
+    PhraseCache(directory, voice="zira").put("one", _render("one"))
+    assert "one" in PhraseCache(directory, voice="zira")
+    assert "one" not in PhraseCache(directory, voice="david")
+
+
+def test_failed_render_leaves_nothing_behind(tmp_path):
+    cache = PhraseCache(str(tmp_path / "cache"))
+    with pytest.raises(RuntimeError):
+        cache.put("silence", lambda path: write_tone(path, 0))
+    assert len(cache) == 0 and os.listdir(cache.directory) == []
+
+
+def test_split_cuts_templates_into_fragments(tmp_path):
+    templates = ["Clicked number {n}", "Page {page} of {pages}.", "Opened {app}"]
+    cache = PhraseCache(str(tmp_path), templates=templates)
+    assert cache.split("Clicked number 14") == ["Clicked number", "14"]
+    assert cache.split("Page 2 of 10.") == ["Page", "2", "of", "10"]
+    assert cache.split("Opened ") == ["Opened"]                   # empty slot left out
+    assert cache.split("Window closed.") == ["Window closed."]    # no template
+    assert template_fragments(templates) == ["Clicked number", "Page", "of", "Opened"]
+
+
+def test_join_wavs_trims_and_concatenates(tmp_path):
+    a, b, out = (str(tmp_path / n) for n in ["a.wav", "b.wav", "out.wav"])
+    write_tone(a, 0.5)
+    write_tone(b, 0.25)
+    join_wavs([a, b], out, gap_ms=100)
+    with wave.open(out, "rb") as w:
+        seconds = w.getnframes() / w.getframerate()
+    assert 0.8 <= seconds <= 0.9
+
+
+def test_join_wavs_rejects_mismatched_formats(tmp_path):
+    a, b = str(tmp_path / "a.wav"), str(tmp_path / "b.wav")
+    write_tone(a, 0.2, sample_rate=16000)
+    write_tone(b, 0.2, sample_rate=22050)
+    with pytest.raises(ValueError):
+        join_wavs([a, b], str(tmp_path / "out.wav"))
+    with pytest.raises(ValueError):
+        join_wavs([], str(tmp_path / "out.wav"))
@@ -0,0 +1,76 @@
+import os
+import time
+
+from speech_out import CONFIRM, NORMAL, URGENT, NullEngine, SpeechQueue, WavEngine
+
+
+def _queue(engine):
+    queue = SpeechQueue(lambda: engine, poll=0.005)
+    assert queue.wait(2)
+    return queue
+
+
+def _hold(queue):
+    """Starts a long utterance that nothing barges in on, so the next say() calls queue behind it."""
+    queue.say("hold " * 20, barge_in=False)
+    deadline = time.perf_counter() + 2
+    while not queue.speaking and time.perf_counter() < deadline:
+        time.sleep(0.002)
+
+
+def test_priority_order():
+    engine = NullEngine(words_per_minute=6000)
+    queue = _queue(engine)
+    _hold(queue)
+    queue.say("confirm", CONFIRM, barge_in=False)
+    queue.say("normal", NORMAL, barge_in=False)
+    queue.say("urgent", URGENT, barge_in=False)
+    queue.say("normal two", NORMAL, barge_in=False)
+    assert queue.wait(5)
+    queue.close()
+    assert [text for text, _, _ in engine.spoken][1:] == ["urgent", "normal", "normal two", "confirm"]
+
+
+def test_merge_by_key_and_ttl():
+    engine = NullEngine(words_per_minute=600)
+    queue = _queue(engine)
+    _hold(queue)
+    queue.say("Window minimized.", CONFIRM, key="confirm", barge_in=False)
+    queue.say("Window maximized.", CONFIRM, key="confirm", barge_in=False)
+    queue.say("too late", NORMAL, ttl=0.01, barge_in=False)
+    assert queue.depth == 2
+    assert queue.wait(10)
+    queue.close()
+    assert [text for text, _, _ in engine.spoken][1:] == ["Window maximized."]
+
+
+def test_barge_in_cuts_off_current():
+    engine = NullEngine(words_per_minute=600)
+    queue = _queue(engine)
+    queue.say("a long help text " * 10)
+    while not queue.speaking:
+        time.sleep(0.002)
+    time.sleep(0.05)
+    started = time.perf_counter()
+    queue.say("Refreshed.")
+    assert queue.wait(5)
+    queue.close()
+    (_, played, completed), (second, _, done) = engine.spoken
+    assert not completed and played < 1.0
+    assert second == "Refreshed." and done
+    assert time.perf_counter() - started < 1.0
+    assert all(end is not None for _, end in queue.history)
+
+
+def test_say_does_not_block_and_close_drains(tmp_path):
+    engine = WavEngine(str(tmp_path), words_per_minute=3000)
+    queue = SpeechQueue(lambda: engine, poll=0.005)
+    t0 = time.perf_counter()
+    for i in range(5):
+        queue.say(f"message {i}", barge_in=False)
+    assert time.perf_counter() - t0 < 0.05
+    queue.close(drain=True)
+    assert [text for text, _, _ in engine.spoken] == [f"message {i}" for i in range(5)]
+    assert sorted(os.listdir(tmp_path)) == [f"{i:03d}.wav" for i in range(5)]
+    queue.say("after close")
+    assert len(engine.spoken) == 5
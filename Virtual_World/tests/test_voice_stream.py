@@ -0,0 +1,88 @@
+import random
+import threading
+import time
+import wave
+
+import numpy as np
+
+from voice_stream import EnergyVad, StreamingRecognizer, WavStream
+
+RATE = 16000
+# (start, end) of every tone burst in the recording, in seconds
+PHRASES = [(0.51, 1.29), (2.49, 3.21), (4.5, 5.52)]
+LENGTH = 6.5
+
+
+def _write_wav(path, phrases=PHRASES, length=LENGTH):
+    """A recording standing in for the microphone: tone bursts over silence."""
+    samples = np.zeros(int(length * RATE), dtype=np.float32)
+    for start, end in phrases:
+        t = np.arange(int(start * RATE), int(end * RATE))
+        samples[t] = 8000 * np.sin(2 * np.pi * 440 * t / RATE)
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes(samples.astype("<i2").tobytes())
+    return str(path)
+
+
+def _recognizer(path, recognize, **kwargs):
+    source = WavStream(str(path))
+    return StreamingRecognizer(source, recognize, vad=EnergyVad(source.sample_rate), **kwargs).start()
+
+
+def test_segments_match_the_spoken_phrases(tmp_path):
+    recognizer = _recognizer(_write_wav(tmp_path / "phrases.wav"), lambda segment: "phrase")
+    results = list(recognizer.results())
+    recognizer.stop()
+
+    assert len(results) == len(PHRASES)
+    for result, (start, end) in zip(results, PHRASES):
+        segment = result.segment
+        # pre-roll reaches back up to 300 ms before the onset, the tail keeps 200 ms after it
+        assert start - 0.35 <= segment.start <= start
+        assert end <= segment.end <= end + 0.25
+        assert len(segment.pcm) == round(segment.duration * RATE) * 2
+        assert result.status == "recognized"
+
+
+def test_results_come_in_phrase_order_when_workers_finish_out_of_order(tmp_path):
+    path = _write_wav(tmp_path / "many.wav", [(0.5 + 1.5 * i, 1.1 + 1.5 * i) for i in range(8)], 13.0)
+    delays = [0.3, 0.0, 0.2, 0.05, 0.25, 0.0, 0.1, 0.0]
+    finished = []
+
+    def recognize(segment):
+        time.sleep(delays[segment.index] + random.uniform(0, 0.01))
+        finished.append(segment.index)
+        return f"phrase {segment.index}"
+
+    recognizer = _recognizer(path, recognize, workers=4)
+    results = list(recognizer.results())
+    recognizer.stop()
+
+    assert finished != sorted(finished)
+    assert [r.segment.index for r in results] == list(range(8))
+    assert [r.text for r in results] == [f"phrase {i}" for i in range(8)]
+    assert recognizer.dropped == 0
+
+
+def test_phrases_beyond_max_pending_are_dropped(tmp_path):
+    release = threading.Event()
+
+    def recognize(segment):
+        release.wait(5)
+        return "phrase"
+
+    recognizer = _recognizer(_write_wav(tmp_path / "phrases.wav"), recognize, workers=1, max_pending=1)
+    # capture never waits for recognition: every phrase is segmented while the first is stuck
+    deadline = time.time() + 5
+    while recognizer.vad.segments < len(PHRASES) and time.time() < deadline:
+        time.sleep(0.01)
+    release.set()
+    results = list(recognizer.results())
+    recognizer.stop()
+
+    assert recognizer.vad.segments == len(PHRASES)
+    assert recognizer.dropped == len(PHRASES) - 1
+    assert [r.segment.index for r in results] == [0]
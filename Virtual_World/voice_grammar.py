@@ -0,0 +1,266 @@
+# voice_grammar.py
+"""
+Command vocabulary and grammar-constrained offline speech recognition.
+
+The words the voice assistant reacts to (the command patterns, key names,
+number words, app names) are defined here and shared with voice_os.py.
+GrammarRecognizer decodes locally with Vosk, restricted to that vocabulary:
+with a few hundred words instead of an open dictionary, decoding is much
+faster and command words are no longer heard as similar-sounding ordinary
+words. Speech outside the grammar (the text after "type", unknown app or
+folder names) comes back as [unk]; such phrases are decoded a second time
+with the model's full vocabulary.
+
+Needs `pip install vosk` and a model such as vosk-model-small-en-us-0.15,
+unpacked into models/ or pointed to by VIRTUALNOVA_VOSK_MODEL.
+
+    python voice_grammar.py --words                 # print the grammar
+    python voice_grammar.py clip1.wav clip2.wav     # recognize, print real-time factor
+"""
+
+import json
+import os
+import threading
+import time
+
+# Optional: offline recognition
+try:
+    import vosk
+except ImportError:
+    vosk = None
+
+MODEL_PATH = os.environ.get(
+    "VIRTUALNOVA_VOSK_MODEL",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "vosk-model-small-en-us-0.15"))
+
+# Spoken key names -> pyautogui key names ("press control c")
+KEY_ALIASES = {
+    "enter": "enter",
+    "return": "enter",
+    "escape": "esc",
+    "esc": "esc",
+    "space": "space",
+    "spacebar": "space",
+    "tab": "tab",
+    "backspace": "backspace",
+    "delete": "delete",
+    "up": "up",
+    "down": "down",
+    "left": "left",
+    "right": "right",
+    "windows": "win",
+    "window": "win",
+    "win": "win",
+    "control": "ctrl",
+    "ctrl": "ctrl",
+    "alt": "alt",
+    "shift": "shift",
+    "f one": "f1",
+    "f two": "f2",
+    "f three": "f3",
+    "f four": "f4",
+    "f five": "f5",
+    "f six": "f6",
+    "f seven": "f7",
+    "f eight": "f8",
+    "f nine": "f9",
+    "f ten": "f10",
+    "f eleven": "f11",
+    "f twelve": "f12",
+}
+
+# Spoken numbers for "click number <n>" and picking an enumerated item
+NUMBER_WORDS = {
+    'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10,
+    'eleven': 11, 'twelve': 12, 'thirteen': 13, 'fourteen': 14, 'fifteen': 15, 'sixteen': 16, 'seventeen': 17,
+    'eighteen': 18, 'nineteen': 19, 'twenty': 20,
+}
+
+# App names in the grammar for "open app <name>" / "close app <name>"
+KNOWN_APPS = (
+    "chrome", "edge", "firefox", "notepad", "calculator", "paint", "word", "excel", "powerpoint",
+    "outlook", "teams", "zoom", "discord", "spotify", "settings", "terminal", "command prompt",
+    "file explorer", "visual studio code", "vlc",
+)
+
+# Every command's patterns, by intent name (intent_router syntax: literal
+# words and {slots}). voice_os registers each VoiceDesktopController handler
+# under its entry here, and the offline grammar is built from the literal
+# words, so the two cannot drift apart.
+COMMANDS = {
+    "help": ("help",),
+    "stop_assistant": ("stop assistant", "exit assistant", "quit assistant"),
+    "type": ("type {text}", "type"),
+    "press": ("press {keys}",),
+    "open_app": ("open app {app}", "open app"),
+    "open_explorer": ("open this pc", "open file explorer", "open explorer"),
+    "open_documents": ("open documents", "open my documents"),
+    "open_downloads": ("open downloads", "open download"),
+    "open_folder": ("open folder {path}",),
+    "open": ("open {target}",),
+    "enumerate_files": ("enumerate files", "list files", "show files", "enumerate"),
+    "next_page": ("next page", "more items"),
+    "previous_page": ("previous page",),
+    "click_number": ("click number {number}", "click number"),
+    "minimize": ("minimize window", "minimize"),
+    "maximize": ("maximize window", "maximize"),
+    "restore": ("restore window", "restore", "unmaximize window", "unmaximize"),
+    "close_window": ("close window",),
+    "close_app": ("close app {app}", "close {app}", "close app"),
+    "refresh": ("refresh",),
+    "back": ("back", "go back"),
+    "forward": ("forward", "go forward"),
+}
+
+# Slot holding free dictation: the words before it ("type") always send a
+# phrase to the full vocabulary
+DICTATION_SLOT = "{text}"
+
+
+def _literals(pattern):
+    return " ".join(w for w in pattern.split() if not w.startswith("{"))
+
+
+def command_phrases(commands=COMMANDS):
+    """The literal words of every pattern, one phrase per pattern."""
+    return tuple(_literals(p) for patterns in commands.values() for p in patterns if _literals(p))
+
+
+def dictation_verbs(commands=COMMANDS):
+    """First words of the patterns that take dictation ('type')."""
+    return tuple(sorted({p.split()[0] for patterns in commands.values() for p in patterns
+                         if DICTATION_SLOT in p.split()[1:]}))
+
+
+UNKNOWN = "[unk]"
+
+
+def vocabulary(apps=KNOWN_APPS):
+    """Sorted list of the distinct words in the command grammar."""
+    words = set()
+    for phrase in command_phrases() + tuple(KEY_ALIASES) + tuple(NUMBER_WORDS) + tuple(apps):
+        words.update(phrase.split())
+    return sorted(words)
+
+
+def normalize(text):
+    """'click number four' -> 'click number 4' (what the Google recognizer returns)."""
+    words = text.split()
+    for i in range(1, len(words)):
+        if words[i - 1] == "number" and words[i] in NUMBER_WORDS:
+            words[i] = str(NUMBER_WORDS[words[i]])
+    return " ".join(words)
+
+
+def parse_number(word):
+    """'4' or 'four' -> 4; anything else -> None."""
+    if word.isdigit():
+        return int(word)
+    return NUMBER_WORDS.get(word)
+
+
+def parse_keys(words):
+    """['control', 'c'] -> ['ctrl', 'c']; two-word names ('f four') are read as one key."""
+    keys = []
+    i = 0
+    while i < len(words):
+        pair = " ".join(words[i:i + 2])
+        if pair in KEY_ALIASES:
+            keys.append(KEY_ALIASES[pair])
+            i += 2
+        else:
+            keys.append(KEY_ALIASES.get(words[i], words[i]))
+            i += 1
+    return keys or None
+
+
+def available(model_path=MODEL_PATH):
+    return vosk is not None and os.path.isdir(model_path)
+
+
+class GrammarRecognizer:
+    """
+    Offline recognizer limited to vocabulary(apps). recognize(pcm, sample_rate)
+    takes 16-bit mono PCM and returns lowercase text ("" if nothing was
+    understood). open_fallback: decode [unk] / dictation phrases again with
+    the full vocabulary (counted in `fallbacks`). Thread-safe: every thread
+    gets its own decoders.
+    """
+
+    def __init__(self, model_path=MODEL_PATH, apps=KNOWN_APPS, open_fallback=True):
+        if vosk is None:
+            raise ImportError("vosk is not installed (pip install vosk)")
+        if not os.path.isdir(model_path):
+            raise FileNotFoundError(f"Vosk model not found at {model_path}")
+        vosk.SetLogLevel(-1)
+        self.model = vosk.Model(model_path)
+        self.grammar = json.dumps(vocabulary(apps) + [UNKNOWN])
+        self.open_fallback = open_fallback
+        self.dictation = dictation_verbs()
+        self.fallbacks = 0
+        self._local = threading.local()
+
+    def _decoder(self, sample_rate, constrained):
+        # building a grammar decoder costs a few ms, so they are kept per thread and reused
+        decoders = getattr(self._local, "decoders", None)
+        if decoders is None:
+            decoders = self._local.decoders = {}
+        key = (sample_rate, constrained)
+        if key not in decoders:
+            if constrained:
+                decoders[key] = vosk.KaldiRecognizer(self.model, sample_rate, self.grammar)
+            else:
+                decoders[key] = vosk.KaldiRecognizer(self.model, sample_rate)
+        return decoders[key]
+
+    def _decode(self, pcm, sample_rate, constrained):
+        decoder = self._decoder(sample_rate, constrained)
+        decoder.AcceptWaveform(pcm)
+        return json.loads(decoder.FinalResult()).get("text", "")
+
+    def recognize(self, pcm, sample_rate):
+        text = self._decode(pcm, sample_rate, True)
+        words = text.split()
+        if self.open_fallback and words and (UNKNOWN in words or words[0] in self.dictation):
+            self.fallbacks += 1
+            text = self._decode(pcm, sample_rate, False)
+        return normalize(text.replace(UNKNOWN, " "))
+
+    def recognize_audio(self, audio):
+        """recognize() for a speech_recognition.AudioData."""
+        return self.recognize(audio.get_raw_data(convert_rate=16000, convert_width=2), 16000)
+
+
+# -----------------------------
+# Recognize WAV files
+# -----------------------------
+if __name__ == "__main__":
+    import argparse
+    from voice_stream import read_wav
+    parser = argparse.ArgumentParser(description="Grammar-constrained offline recognition of WAV files")
+    parser.add_argument("wav", nargs="*", help="16-bit WAV files, one phrase each")
+    parser.add_argument("--words", action="store_true", help="print the grammar vocabulary")
+    parser.add_argument("--model", default=MODEL_PATH, help="Vosk model directory")
+    parser.add_argument("--open", action="store_true", help="full vocabulary instead of the grammar")
+    args = parser.parse_args()
+
+    if args.words:
+        print(" ".join(vocabulary()))
+    if args.wav:
+        recognizer = GrammarRecognizer(args.model)
+        audio_total = decode_total = 0.0
+        for path in args.wav:
+            samples, sample_rate = read_wav(path)
+            t0 = time.perf_counter()
+            if args.open:
+                text = recognizer._decode(samples.tobytes(), sample_rate, False)
+            else:
+                text = recognizer.recognize(samples.tobytes(), sample_rate)
+            seconds = time.perf_counter() - t0
+            duration = len(samples) / sample_rate
+            audio_total += duration
+            decode_total += seconds
+            print(f"[INFO] {os.path.basename(path)}: '{text}' in {1000 * seconds:.0f} ms "
+                  f"(RTF {seconds / duration:.3f})")
+        print(f"[INFO] {len(args.wav)} files, {audio_total:.1f}s of audio, RTF {decode_total / audio_total:.3f}, "
+              f"{recognizer.fallbacks} full-vocabulary fallbacks.")
@@ -6,17 +6,20 @@ import sys
 import traceback
 
 import speech_recognition as sr
-import pyttsx3
 import pyautogui
-import keyboard
-from pywinauto import Desktop, Application
-import win32gui
-import win32con
-import win32api
-from ctypes import windll
 from PIL import Image, ImageDraw, ImageFont
 import tkinter as tk
 
+import metrics
+from desktop import Win32Desktop
+from explorer_snapshot import ExplorerSnapshots
+from voice_stream import EnergyVad, MicrophoneStream, StreamingRecognizer
+import voice_grammar
+from voice_grammar import parse_keys, parse_number
+from intent_router import IntentRouter
+from speech_out import CONFIRM, NORMAL, URGENT, CachedEngine, Pyttsx3Engine, SpeechQueue, WavPlayer
+from phrase_cache import PhraseCache, template_fragments
+
 # -----------------------
 # Config
 # -----------------------
@@ -24,68 +27,132 @@ LISTENING_INDICATOR = True
 OVERLAY_TTL = 12.0  # seconds overlay stays
 SPEECH_TIMEOUT = 3  # seconds to wait for one phrase
 SPEECH_PHRASE_TIME_LIMIT = 4
-
-# Use 'google' by default (requires internet). To use offline engines swap out recognizer.recognize_google().
-USE_GOOGLE = True
+# Longest a recognition / a command may block before the supervisor treats the assistant as hung
+RECOGNITION_BUDGET = 10
+COMMAND_BUDGET = 30
+
+# Metrics (no-ops unless metrics.enable() was called)
+LISTEN_SPAN = metrics.span("voice_listen_seconds", "Time waiting for and capturing one phrase")
+RECOGNITION_SPAN = metrics.span("voice_recognition_seconds", "Speech-to-text time per phrase")
+COMMAND_SPAN = metrics.span("voice_command_seconds", "handle_command time per recognized phrase")
+PHRASES = metrics.counter("voice_phrases_total", "listen_once outcomes", labelnames=("result",))
+COMMANDS = metrics.counter("voice_commands_total", "Recognized phrases by outcome", labelnames=("handled",))
+LISTEN_BLOCKED = metrics.span("voice_listen_blocked_seconds", "Phrase heard -> listening for the next one")
+
+# Streaming mode: the microphone stays open on a capture thread, phrases are
+# cut out by voice activity detection and recognized on a small pool while
+# capture goes on, so nothing said during recognition or a command is lost
+STREAMING = True
+RECOGNITION_WORKERS = 2
+# Drop phrases heard entirely while the assistant itself was talking (speaker echo)
+IGNORE_OWN_SPEECH = True
+
+# Speech-to-text engine: "offline" (Vosk limited to the command grammar, see
+# voice_grammar.py), "google" (requires internet) or "sphinx". "auto" uses
+# offline when vosk and its model are installed, google otherwise.
+RECOGNIZER = "auto"
 
 # -----------------------
 # Utilities
 # -----------------------
-engine = pyttsx3.init()
-engine.setProperty('rate', 160)
-
-def speak(text):
-    try:
-        engine.say(text)
-        engine.runAndWait()
-    except Exception as e:
-        print("TTS error:", e)
-
-def press_win_and_type(text, wait=0.15):
-    """Press Windows key, type, press enter"""
-    pyautogui.press('win')
-    time.sleep(0.12)
-    pyautogui.typewrite(text, interval=0.03)
-    time.sleep(wait)
-    pyautogui.press('enter')
-
-def get_active_window_handle():
-    return win32gui.GetForegroundWindow()
-
-def find_window_by_title_contains(name):
-    name = name.lower()
-    def enum_cb(hwnd, results):
-        txt = win32gui.GetWindowText(hwnd).lower()
-        cls = win32gui.GetClassName(hwnd).lower()
-        if name in txt or name in cls:
-            results.append(hwnd)
-    results = []
-    win32gui.EnumWindows(lambda h, r=results: enum_cb(h, r), None)
-    return results
-
-def minimize_window(hwnd):
-    try:
-        win32gui.ShowWindow(hwnd, win32con.SW_MINIMIZE)
-    except Exception as e:
-        print("minimize error", e)
-
-def maximize_window(hwnd):
-    try:
-        win32gui.ShowWindow(hwnd, win32con.SW_MAXIMIZE)
-    except Exception as e:
-        print("maximize error", e)
-
-def restore_window(hwnd):
-    try:
-        win32gui.ShowWindow(hwnd, win32con.SW_RESTORE)
-    except Exception as e:
-        print("restore error", e)
-
-def close_window(hwnd):
-    try:
-        win32gui.PostMessage(hwnd, win32con.WM_CLOSE, 0, 0)
-    except Exception as e:
-        print("close window error", e)
+# Speech output runs on its own thread (speech_out.py): speak() only queues
+# the text, so the assistant goes straight back to listening. Short
+# confirmations replace each other and are dropped if they could not start
+# within CONFIRM_TTL seconds.
+TTS_RATE = 160
+CONFIRM_TTL = 3.0
+speech = None  # speech_out.SpeechQueue, created by the first speak()
+
+# Phrase cache (phrase_cache.py): responses are synthesized to WAV once and
+# then played from disk; sentences matching RESPONSE_TEMPLATES are joined
+# from cached fragments. Needs winsound (Windows) to play the files,
+# otherwise pyttsx3 speaks every response directly.
+SPEECH_CACHE = True
+SPEECH_CACHE_MB = 32
+HELP_COMMANDS = (
+    "Open app <name>",
+    "Open folder <full path> or say open documents / open downloads",
+    "Open this pc",
+    "Enumerate files",
+    "Click number <n>",
+    "Minimize window",
+    "Maximize window",
+    "Restore window",
+    "Close window",
+    "Close app <name>",
+    "Refresh",
+    "Back",
+    "Forward",
+    "Stop assistant",
+)
+HELP_TEXT = "Available commands. " + ", ".join(HELP_COMMANDS)
+# Fixed responses, rendered in the background when the speech thread starts
+RESPONSES = (
+    "Voice desktop assistant started.", "Assistant stopped.", "Shutting down assistant.", HELP_TEXT,
+    "Sorry, I didn't understand. Say help to list commands.", "Typing your text.", "Please say what to type.",
+    "Opening File Explorer.", "Opening Documents.", "Opening Downloads.", "Say the app name after open.",
+    "Couldn't open that path.", "No number heard. Cancelling.", "The folder changed. Say enumerate files again.",
+    "That number is not valid.", "Say enumerate files first.", "That is the last page.", "That is the first page.",
+    "I didn't catch a number to click.", "No Explorer items found.", "Number out of range.",
+    "Window minimized.", "Window maximized.", "Window restored.", "Window closed.", "Say the app name to close.",
+    "I couldn't find a window with that name.", "Refreshed.", "Back.", "Forward.",
+)
+RESPONSE_TEMPLATES = (
+    "Opening {target}",
+    "Pressed {keys}",
+    "Clicked number {n}",
+    "Clicked item number {n}",
+    "Page {page} of {pages}.",
+    "Closed {count} window(s) with name {app}.",
+    "I found {count} items. Say the number to open the item.{more}",
+)
+WARM_NUMBERS = 60  # item numbers on one overlay page
+
+def _speech_engine():
+    # runs on the speech thread
+    if SPEECH_CACHE and WavPlayer.available():
+        try:
+            cache = PhraseCache(max_bytes=SPEECH_CACHE_MB * 1024 * 1024, templates=RESPONSE_TEMPLATES,
+                                voice=f"pyttsx3 rate {TTS_RATE}")
+            return CachedEngine(cache, lambda: Pyttsx3Engine(rate=TTS_RATE))
+        except OSError as e:
+            print(f"[WARNING] Phrase cache unavailable ({e}); synthesizing every response.")
+    return Pyttsx3Engine(rate=TTS_RATE)
+
+def _speech():
+    global speech
+    if speech is None:
+        speech = SpeechQueue(_speech_engine)
+        speech.prepare(RESPONSES + tuple(template_fragments(RESPONSE_TEMPLATES))
+                       + tuple(str(n) for n in range(1, WARM_NUMBERS + 1)) + voice_grammar.KNOWN_APPS)
+    return speech
+
+def speak(text, priority=NORMAL, key=None, ttl=None):
+    """Queues `text`, cutting off whatever is being said."""
+    _speech().say(text, priority, key, ttl)
+
+def confirm(text):
+    """A short confirmation ("Window minimized."): skipped if newer speech supersedes it."""
+    speak(text, CONFIRM, key="confirm", ttl=CONFIRM_TTL)
+
+def close_speech(timeout=5.0):
+    """Says what is still queued (up to `timeout` seconds) and stops the speech thread."""
+    global speech
+    if speech is not None:
+        speech.close(drain=True, timeout=timeout)
+        speech = None
+
+def is_own_speech(segment, hangover=0.8):
+    """True if a streamed phrase lies entirely inside one of our own TTS utterances."""
+    return own_speech(segment.closed_at - segment.duration, segment.closed_at, hangover)
+
+def own_speech(start, end, hangover=0.8):
+    """True if audio heard from `start` to `end` (perf_counter) lies inside one of our TTS utterances."""
+    if speech is None:
+        return False
+    now = time.perf_counter()
+    return any(s - 0.1 <= start and end <= (e if e is not None else now) + hangover
+               for s, e in list(speech.history))
 
 # -----------------------
 # Overlay helper (Tkinter transparent window with numbered labels)
@@ -112,11 +179,13 @@ class OverlayManager:
         except Exception:
             pass
 
-    def show_numbered_overlays(self, coords_list):
+    def show_numbered_overlays(self, coords_list, numbers=None):
         """
         coords_list: list of (x_center, y_center) tuples to overlay numbers near
+        numbers: the number to show for each position (default 1, 2, ...)
         returns a map number->(x,y) to be used for clicking
         """
+        numbers = list(numbers) if numbers is not None else list(range(1, len(coords_list) + 1))
         self._start_root()
         # clear old
         for lbl in self.labels:
@@ -127,7 +196,7 @@ class OverlayManager:
         self.visible = True
 
         # Draw small circular numbers using Tk labels with an image
-        for idx, (x, y) in enumerate(coords_list, start=1):
+        for idx, (x, y) in zip(numbers, coords_list):
             lbl = tk.Label(self.root, bd=0)
             # create an image circle with number
             img = self._make_number_image(idx)
@@ -158,7 +227,7 @@ class OverlayManager:
         t.start()
 
         # return mapping of numbers to positions (center coords)
-        mapping = {i+1: coords_list[i] for i in range(len(coords_list))}
+        mapping = dict(zip(numbers, coords_list))
         return mapping
 
     def clear(self):
@@ -200,418 +269,473 @@ def pil_image_to_base64(pil_image):
     return base64.b64encode(b)
 
 # -----------------------
-# Explorer enumerator using pywinauto UIA backend
+# Command table
 # -----------------------
-def enumerate_explorer_visible_items():
-    """
-    Find the currently active File Explorer window and return a list of items with screen coordinates
-    Returns list of tuples: (name, (center_x, center_y))
-    """
-    try:
-        desktop = Desktop(backend="uia")
-        # find active explorer window
-        win = None
-        foreground = get_active_window_handle()
-        fg_title = win32gui.GetWindowText(foreground).lower()
-        # Attempt to find an 'Explorer' window among top windows
-        for w in desktop.windows():
-            try:
-                if 'file explorer' in w.window_text().lower() or 'explorer' in w.window_text().lower() or w.process_id() and 'explorer.exe' in str(w.process_id()):
-                    # choose the one that matches foreground if possible
-                    if w.handle == foreground:
-                        win = w
-                        break
-                    # fallback: use the first explorer-like window
-                    if win is None:
-                        win = w
-            except Exception:
-                continue
-        if win is None:
-            # try connecting to any explorer window
-            for w in desktop.windows():
-                txt = w.window_text().lower()
-                if 'file explorer' in txt or 'explorer' in txt:
-                    win = w
-                    break
-        if win is None:
-            return []
-
-        # try to find the items control (List or DataGrid)
-        items = []
-        # search for List control
-        try:
-            list_ctrls = win.descendants(control_type="List")
-            if not list_ctrls:
-                list_ctrls = win.descendants(control_type="DataGrid")
-            if not list_ctrls:
-                list_ctrls = win.descendants(control_type="ListItem")
-            # pick the first list-like control
-            if list_ctrls:
-                # flatten to items
-                elems = []
-                for c in list_ctrls:
-                    try:
-                        elems += c.descendants(control_type="ListItem")
-                    except Exception:
-                        pass
-                if not elems:
-                    # maybe the list_ctrls themselves are items
-                    elems = list_ctrls
-                # gather names and rectangles
-                for e in elems[:60]:  # limit for performance
-                    try:
-                        rect = e.rectangle()
-                        cx = (rect.left + rect.right) // 2
-                        cy = (rect.top + rect.bottom) // 2
-                        name = e.window_text() or e.legacy_properties().get('Name', '') if hasattr(e, 'legacy_properties') else e.window_text()
-                        if name:
-                            items.append((name, (cx, cy)))
-                    except Exception:
-                        continue
-        except Exception as ex:
-            print("explorer enumerate inner error:", ex)
-            # fallback: use icon positions from the desktop or grid, but that's out of scope
-
-        return items
-    except Exception as e:
-        print("enumerate_explorer_visible_items EX:", e)
-        return []
+# VoiceDesktopController methods register with @command under their name (less
+# the underscore) for the patterns in voice_grammar.COMMANDS, from which the
+# offline grammar is built too; all of them share one router, compiled into a
+# token trie as the class is defined
+router = IntentRouter(slot_types={"number": ("word", parse_number), "keys": ("rest", parse_keys)})
+
+def command(method):
+    """Registers the decorated controller method for its patterns in voice_grammar.COMMANDS."""
+    name = method.__name__.lstrip("_")
+    router.add(name, voice_grammar.COMMANDS[name], method)
+    return method
 
 # -----------------------
 # Main Voice Controller
 # -----------------------
 class VoiceDesktopController:
-    def __init__(self):
+    heartbeat = None  # supervisor.Heartbeat, set by main()
+
+    def __init__(self, desktop=None):
+        self.desktop = desktop or Win32Desktop()  # desktop.SimulatedDesktop for tests
+        self.explorer = ExplorerSnapshots(self.desktop)
         self.recognizer = sr.Recognizer()
         self.microphone = sr.Microphone()
         self.running = False
         self.overlay = OverlayManager()
+        self.stream = None  # voice_stream.StreamingRecognizer while streaming
+        self.offline = self._load_offline()
         # Pre-warm microphone
         with self.microphone as mic:
             self.recognizer.adjust_for_ambient_noise(mic, duration=1.0)
 
     def listen_once(self, timeout=SPEECH_TIMEOUT, phrase_time_limit=SPEECH_PHRASE_TIME_LIMIT):
+        if self.stream is not None:
+            return self._next_streamed(timeout + phrase_time_limit)
+        heartbeat = self.heartbeat
+        if heartbeat is not None:
+            heartbeat.expect(timeout + phrase_time_limit + RECOGNITION_BUDGET)
+        t_listen = LISTEN_SPAN.start()
         with self.microphone as source:
             audio = None
             try:
                 audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
             except sr.WaitTimeoutError:
+                LISTEN_SPAN.stop(t_listen)
+                PHRASES.labels("no_speech").inc()
+                if heartbeat is not None:
+                    heartbeat.done()
                 return ""
+        LISTEN_SPAN.stop(t_listen)
+        t0 = time.perf_counter()
+        seconds = len(audio.frame_data) / float(audio.sample_rate * audio.sample_width)
+        if IGNORE_OWN_SPEECH and own_speech(t0 - seconds, t0):
+            # the microphone heard the assistant (we no longer wait for it to finish talking)
+            PHRASES.labels("own_speech").inc()
+            if heartbeat is not None:
+                heartbeat.done()
+            return ""
+        result = "error"
         try:
-            if USE_GOOGLE:
-                text = self.recognizer.recognize_google(audio)
-            else:
+            text = self.recognize_audio(audio)
+            result = "recognized" if text else "unintelligible"
+            return text
+        except Exception as e:
+            print("recognition error:", e)
+            return ""
+        finally:
+            seconds = time.perf_counter() - t0
+            RECOGNITION_SPAN.record(t0, seconds)
+            PHRASES.labels(result).inc()
+            if heartbeat is not None:
+                heartbeat.recognition(seconds)
+                heartbeat.done()
+
+    def _load_offline(self):
+        """The grammar recognizer if RECOGNIZER asks for it (loading the model takes a while)."""
+        if RECOGNIZER != "offline" and not (RECOGNIZER == "auto" and voice_grammar.available()):
+            return None
+        try:
+            return voice_grammar.GrammarRecognizer()
+        except Exception as e:
+            print(f"[WARNING] Offline recognizer unavailable ({e}); using Google.")
+            return None
+
+    def recognize_audio(self, audio):
+        """Speech-to-text for one phrase (lowercase, "" if nothing was understood)."""
+        if self.offline is not None:
+            return self.offline.recognize_audio(audio)
+        try:
+            if RECOGNIZER == "sphinx":
                 text = self.recognizer.recognize_sphinx(audio)
-            return text.lower()
+            else:
+                text = self.recognizer.recognize_google(audio)
         except sr.UnknownValueError:
             return ""
+        return text.lower()
+
+    def recognize_segment(self, segment):
+        """recognize_audio for a voice_stream.Segment (runs on the recognizer pool)."""
+        return self.recognize_audio(sr.AudioData(segment.pcm, segment.sample_rate, 2))
+
+    def open_stream(self, source=None):
+        """
+        Starts streaming recognition from `source` (a voice_stream source; the
+        microphone by default). listen_once then returns streamed phrases in
+        order. Returns False if the audio source could not be opened.
+        """
+        try:
+            source = source or MicrophoneStream(self.microphone)
         except Exception as e:
-            print("recognition error:", e)
+            print(f"[WARNING] Streaming capture unavailable ({e}); listening phrase by phrase.")
+            return False
+        # the ambient-noise calibration from __init__ is the VAD's minimum threshold
+        vad = EnergyVad(source.sample_rate, threshold=self.recognizer.energy_threshold)
+        self.stream = StreamingRecognizer(source, self.recognize_segment,
+                                          workers=RECOGNITION_WORKERS, vad=vad).start()
+        return True
+
+    def close_stream(self):
+        if self.stream is not None:
+            self.stream.stop()
+            if self.stream.dropped:
+                print(f"[WARNING] {self.stream.dropped} phrases dropped (recognition backlog).")
+            self.stream = None
+
+    def _next_streamed(self, wait):
+        """listen_once in streaming mode: the next recognized phrase, "" if none within `wait`."""
+        heartbeat = self.heartbeat
+        if heartbeat is not None:
+            heartbeat.expect(wait)
+        t_listen = LISTEN_SPAN.start()
+        result = self.stream.next_result(wait)
+        LISTEN_SPAN.stop(t_listen)
+        if result is None:
+            PHRASES.labels("no_speech").inc()
+            if self.stream.finished:
+                print("[WARNING] Audio stream ended; listening phrase by phrase.")
+                self.close_stream()
+            if heartbeat is not None:
+                heartbeat.done()
+            return ""
+        RECOGNITION_SPAN.record(result.started, result.recognition_seconds)
+        if heartbeat is not None:
+            heartbeat.recognition(result.recognition_seconds)
+            heartbeat.done()
+        if IGNORE_OWN_SPEECH and is_own_speech(result.segment):
+            PHRASES.labels("own_speech").inc()
             return ""
+        PHRASES.labels(result.status).inc()
+        if result.error is not None:
+            print("recognition error:", result.error)
+        return result.text
 
-    def start(self):
+    def start(self, source=None):
+        """
+        Runs the assistant until stop(). In STREAMING mode (or when an audio
+        `source` such as voice_stream.WavStream is given) phrases are captured
+        and recognized continuously.
+        """
         self.running = True
+        if source is not None or STREAMING:
+            self.open_stream(source)
         speak("Voice desktop assistant started.")
         print("Listening for commands. Say 'help' to hear commands.")
-        # Main loop
-        while self.running:
+        try:
+            self._loop()
+        finally:
+            self.close_stream()
+        speak("Assistant stopped.")
+        close_speech()
+
+    def _loop(self):
+        # Main loop (the supervisor's stop event ends it too)
+        heartbeat = self.heartbeat
+        t_blocked = None
+        while self.running and (heartbeat is None or not heartbeat.stopping()):
             try:
+                if t_blocked is not None:
+                    LISTEN_BLOCKED.stop(t_blocked)
+                    t_blocked = None
                 print("Waiting for command...")
                 text = self.listen_once()
                 if not text:
                     continue
+                t_blocked = LISTEN_BLOCKED.start()
                 print("Heard:", text)
+                if speech is not None:
+                    speech.interrupt()  # the user talked over us
+                if heartbeat is not None:
+                    heartbeat.expect(COMMAND_BUDGET)
                 handled = self.handle_command(text)
                 if not handled:
                     speak("Sorry, I didn't understand. Say help to list commands.")
+                if heartbeat is not None:
+                    heartbeat.done()
             except KeyboardInterrupt:
                 break
             except Exception as e:
                 print("Main loop error:", e)
                 traceback.print_exc()
-        speak("Assistant stopped.")
 
     def stop(self):
         self.running = False
 
     def handle_command(self, text):
-        # basic commands patterns
-        if 'help' in text:
-            cmds = [
-                "Open app <name>",
-                "Open folder <full path> or say open documents / open downloads",
-                "Open this pc",
-                "Enumerate files",
-                "Click number <n>",
-                "Minimize window",
-                "Maximize window",
-                "Restore window",
-                "Close window",
-                "Close app <name>",
-                "Refresh",
-                "Back",
-                "Forward",
-                "Stop assistant",
-            ]
-            speak("Available commands. " + ", ".join(cmds))
-            return True
-
-        if 'stop assistant' in text or 'exit assistant' in text or 'quit assistant' in text:
-            speak("Shutting down assistant.")
-            self.stop()
-            return True
-
-        # ---------------------- TYPE COMMAND ----------------------
-        if text.startswith("type "):
-            to_type = text.replace("type ", "", 1).strip()
-
-            if not to_type:
-                speak("Please say what to type.")
-                return True
-
-            speak("Typing your text.")
-            pyautogui.typewrite(to_type, interval=0.03)
-            return True
-
-        # PRESS KEYBOARD BUTTONS
-        if text.startswith("press "):
-            command = text.replace("press ", "", 1).strip()
-
-            # Mapping for common keys users speak differently
-            key_alias = {
-                "enter": "enter",
-                "return": "enter",
-                "escape": "esc",
-                "esc": "esc",
-                "space": "space",
-                "spacebar": "space",
-                "tab": "tab",
-                "backspace": "backspace",
-                "delete": "delete",
-                "up": "up",
-                "down": "down",
-                "left": "left",
-                "right": "right",
-                "windows": "win",
-                "window": "win",
-                "win": "win",
-                "control": "ctrl",
-                "ctrl": "ctrl",
-                "alt": "alt",
-                "shift": "shift",
-                "f one": "f1",
-                "f two": "f2",
-                "f three": "f3",
-                "f four": "f4",
-                "f five": "f5",
-                "f six": "f6",
-                "f seven": "f7",
-                "f eight": "f8",
-                "f nine": "f9",
-                "f ten": "f10",
-                "f eleven": "f11",
-                "f twelve": "f12",
-            }
-
-            # Convert spoken words to pyautogui key names
-            words = command.split()
-            keys = []
-
-            for word in words:
-                keys.append(key_alias.get(word, word))
+        """Runs the command in `text`; returns whether it was understood."""
+        t0 = COMMAND_SPAN.start()
+        handled = self._handle_command(text)
+        COMMAND_SPAN.stop(t0)
+        COMMANDS.labels("yes" if handled else "no").inc()
+        return handled
+
+    def _handle_command(self, text):
+        # the command table below is compiled into one trie (see intent_router.py)
+        match, _ = router.dispatch(text, self)
+        return match is not None
+
+    # ---------------------- COMMANDS ----------------------
+    @command
+    def _help(self):
+        speak(HELP_TEXT)
+
+    @command
+    def _stop_assistant(self):
+        speak("Shutting down assistant.", URGENT)
+        self.stop()
+
+    @command
+    def _type(self, text=""):
+        if not text:
+            speak("Please say what to type.")
+            return
+        confirm("Typing your text.")
+        self.desktop.type_text(text, interval=0.03)
 
+    # PRESS KEYBOARD BUTTONS ("press control c", "press alt f four")
+    @command
+    def _press(self, keys):
+        try:
+            if len(keys) == 1:
+                # Single key press
+                self.desktop.press(keys[0])
+            else:
+                # Combination like ctrl + c, alt + f4, windows + d
+                self.desktop.hotkey(*keys)
+
+            confirm(f"Pressed {' '.join(keys)}")
+        except Exception as e:
+            speak("Sorry, I could not press that key.")
+            print("Key press error:", e)
+
+    # Open app via start/search
+    @command
+    def _open_app(self, app=""):
+        if not app:
+            speak("Say the app name after open.")
+            return
+        confirm(f"Opening {app}")
+        self.desktop.launch(app)
+
+    @command
+    def _open_explorer(self):
+        confirm("Opening File Explorer.")
+        self.desktop.start("explorer.exe")
+
+    # common known folders
+    @command
+    def _open_documents(self):
+        confirm("Opening Documents.")
+        self.desktop.start(os.path.join(os.path.expanduser('~'), 'Documents'))
+
+    @command
+    def _open_downloads(self):
+        confirm("Opening Downloads.")
+        self.desktop.start(os.path.join(os.path.expanduser('~'), 'Downloads'))
+
+    @command
+    def _open_folder(self, path):
+        if not os.path.exists(path):
+            speak("Couldn't open that path.")
+            return
+        confirm(f"Opening {path}")
+        self.desktop.start(path)
+
+    # direct "open chrome", "open notepad" or a path
+    @command
+    def _open(self, target):
+        if os.path.exists(target):  # path given
+            confirm(f"Opening {target}")
             try:
-                if len(keys) == 1:
-                    # Single key press
-                    pyautogui.press(keys[0])
-                else:
-                    # Combination like ctrl + c, alt + f4, windows + d
-                    pyautogui.hotkey(*keys)
-
-                speak(f"Pressed {' '.join(keys)}")
+                self.desktop.start(target)
             except Exception as e:
-                speak("Sorry, I could not press that key.")
-                print("Key press error:", e)
-
-            return True
-
-        # Open app via start/search
-        if text.startswith('open app') or text.startswith('open ') and ('app' in text and 'open app' in text):
-            # two variants: "open app chrome" or "open chrome"
-            target = text.replace('open app', '').replace('open', '').strip()
-            if not target:
-                speak("Say the app name after open.")
-                return True
-            speak(f"Opening {target}")
-            press_win_and_type(target)
-            return True
-
-        # direct "open chrome" or "open notepad"
-        if text.startswith('open '):
-            target = text.replace('open', '', 1).strip()
-            # if "open this pc" or "open file explorer" or "open documents"
-            if target in ('this pc', 'file explorer', 'explorer'):
-                # open explorer
-                speak("Opening File Explorer.")
-                os.startfile("explorer.exe")
-                return True
-            # common known folders
-            if target in ('documents', 'my documents'):
-                speak("Opening Documents.")
-                os.startfile(os.path.join(os.path.expanduser('~'), 'Documents'))
-                return True
-            if target in ('downloads', 'download'):
-                speak("Opening Downloads.")
-                os.startfile(os.path.join(os.path.expanduser('~'), 'Downloads'))
-                return True
-            if os.path.exists(target):  # path given
-                speak(f"Opening {target}")
-                try:
-                    os.startfile(target)
-                except Exception as e:
-                    speak("Couldn't open that path.")
-                return True
-            # else treat as app name search in start
-            speak(f"Opening {target}")
-            press_win_and_type(target)
-            return True
-
-        # enumerate files in active explorer
-        if 'enumerate files' in text or 'list files' in text or 'enumerate' in text or 'show files' in text:
-            items = enumerate_explorer_visible_items()
-            if not items:
-                speak("I couldn't find a File Explorer window. Please open the folder you want and say enumerate files again.")
-                return True
-            # prepare coordinates list
-            coords = [coord for (_, coord) in items]
-            mapping = self.overlay.show_numbered_overlays(coords)
-            # speak names optionally (keep short)
-            speak(f"I found {len(items)} items. Say the number to open the item.")
-            # wait for a number from user
-            number_spoken = self._listen_for_number()
-            if number_spoken is None:
-                speak("No number heard. Cancelling.")
-                self.overlay.clear()
-                return True
-            # click the coordinate
-            if number_spoken in mapping:
-                x,y = mapping[number_spoken]
-                pyautogui.click(x, y)
-                speak("Clicked item number " + str(number_spoken))
-            else:
-                speak("That number is not valid.")
+                speak("Couldn't open that path.")
+            return
+        # else treat as app name search in start
+        confirm(f"Opening {target}")
+        self.desktop.launch(target)
+
+    # enumerate files in active explorer
+    @command
+    def _enumerate_files(self):
+        snapshot = self.explorer.get()
+        if not snapshot:
+            speak("I couldn't find a File Explorer window. Please open the folder you want and say enumerate files again.")
+            return
+        self._show_page(snapshot, 1)
+        more = " Say next page for more." if snapshot.pages > 1 else ""
+        speak(f"I found {len(snapshot)} items. Say the number to open the item.{more}")
+        # wait for a number from user (paging through the overlay meanwhile)
+        number_spoken = self._listen_for_number(commands={"next page": self._next_page,
+                                                          "previous page": self._previous_page})
+        if number_spoken is None:
+            speak("No number heard. Cancelling.")
             self.overlay.clear()
-            return True
-
-        # click number explicit
-        if text.startswith('click') and 'number' in text:
-            # "click number 4"
-            words = text.split()
-            for w in words:
-                if w.isdigit():
-                    n = int(w)
-                    # we need mapping from last overlay - for simplicity, re-enumerate and map 1.N to current items
-                    items = enumerate_explorer_visible_items()
-                    if not items:
-                        speak("No Explorer items found.")
-                        return True
-                    # map indices to coords
-                    if 1 <= n <= len(items):
-                        x,y = items[n-1][1]
-                        pyautogui.click(x,y)
-                        speak("Clicked number " + str(n))
-                        return True
-                    else:
-                        speak("Number out of range.")
-                        return True
+            return
+        # click the item from the snapshot on screen (unless the folder scrolled or changed since)
+        item = snapshot.item(number_spoken)
+        if not self.explorer.shown.valid:
+            speak("The folder changed. Say enumerate files again.")
+        elif item is not None:
+            x,y = item[1]
+            self.desktop.click(x, y)
+            confirm("Clicked item number " + str(number_spoken))
+        else:
+            speak("That number is not valid.")
+        self.overlay.clear()
+
+    def _show_page(self, snapshot, page):
+        items = snapshot.page(page)
+        self.overlay.show_numbered_overlays([coord for (_, _, coord) in items], [n for (n, _, _) in items])
+        self.explorer.shown = snapshot
+        self.explorer.shown_page = page
+
+    @command
+    def _next_page(self):
+        snapshot = self.explorer.shown
+        if snapshot is None or not snapshot.valid:
+            speak("Say enumerate files first.")
+        elif self.explorer.shown_page >= snapshot.pages:
+            speak("That is the last page.")
+        else:
+            self._show_page(snapshot, self.explorer.shown_page + 1)
+            confirm(f"Page {self.explorer.shown_page} of {snapshot.pages}.")
+
+    @command
+    def _previous_page(self):
+        snapshot = self.explorer.shown
+        if snapshot is None or not snapshot.valid:
+            speak("Say enumerate files first.")
+        elif self.explorer.shown_page <= 1:
+            speak("That is the first page.")
+        else:
+            self._show_page(snapshot, self.explorer.shown_page - 1)
+            confirm(f"Page {self.explorer.shown_page} of {snapshot.pages}.")
+
+    # click number explicit ("click number 4"), from the snapshot in the overlay
+    @command
+    def _click_number(self, number=None):
+        if number is None:
             speak("I didn't catch a number to click.")
-            return True
-
-        # minimize, maximize, restore, close active window
-        if 'minimize' in text or ('minimise' in text):
-            hwnd = get_active_window_handle()
-            minimize_window(hwnd)
-            speak("Window minimized.")
-            return True
-        if 'maximize' in text:
-            hwnd = get_active_window_handle()
-            maximize_window(hwnd)
-            speak("Window maximized.")
-            return True
-        if 'restore' in text or 'unmaximize' in text or 'restore window' in text:
-            hwnd = get_active_window_handle()
-            restore_window(hwnd)
-            speak("Window restored.")
-            return True
-        if 'close window' in text or text.startswith('close '):
-            # close the active window or close by name
-            if text == 'close window':
-                hwnd = get_active_window_handle()
-                close_window(hwnd)
-                speak("Window closed.")
-                return True
-            else:
-                # "close app chrome"
-                target = text.replace('close app','').replace('close','').strip()
-                if not target:
-                    speak("Say the app name to close.")
-                    return True
-                wins = find_window_by_title_contains(target)
-                if not wins:
-                    speak("I couldn't find a window with that name.")
-                    return True
-                for w in wins:
-                    close_window(w)
-                speak(f"Closed {len(wins)} window(s) with name {target}.")
-                return True
-
-        # navigation commands
-        if 'refresh' in text:
-            keyboard.send('f5')
-            speak("Refreshed.")
-            return True
-        if text == 'back':
-            keyboard.send('alt+left')
-            speak("Back.")
-            return True
-        if text == 'forward':
-            keyboard.send('alt+right')
-            speak("Forward.")
-            return True
-
-        # fallback
-        return False
-
-    def _listen_for_number(self, timeout=8):
+            return
+        snapshot = self.explorer.current()
+        if not snapshot:
+            speak("No Explorer items found.")
+            return
+        item = snapshot.item(number)
+        if item is not None:
+            x,y = item[1]
+            self.desktop.click(x, y)
+            confirm("Clicked number " + str(number))
+        else:
+            speak("Number out of range.")
+
+    # minimize, maximize, restore, close active window
+    @command
+    def _minimize(self):
+        self.desktop.minimize(self.desktop.foreground_window())
+        confirm("Window minimized.")
+
+    @command
+    def _maximize(self):
+        self.desktop.maximize(self.desktop.foreground_window())
+        confirm("Window maximized.")
+
+    @command
+    def _restore(self):
+        self.desktop.restore(self.desktop.foreground_window())
+        confirm("Window restored.")
+
+    @command
+    def _close_window(self):
+        self.desktop.close(self.desktop.foreground_window())
+        confirm("Window closed.")
+
+    # "close app chrome" or "close chrome"
+    @command
+    def _close_app(self, app=""):
+        if not app:
+            speak("Say the app name to close.")
+            return
+        wins = self.desktop.find_windows(app)
+        if not wins:
+            speak("I couldn't find a window with that name.")
+            return
+        for w in wins:
+            self.desktop.close(w)
+        confirm(f"Closed {len(wins)} window(s) with name {app}.")
+
+    # navigation commands
+    @command
+    def _refresh(self):
+        self.desktop.send_keys('f5')
+        confirm("Refreshed.")
+
+    @command
+    def _back(self):
+        self.desktop.send_keys('alt+left')
+        confirm("Back.")
+
+    @command
+    def _forward(self):
+        self.desktop.send_keys('alt+right')
+        confirm("Forward.")
+
+    def _listen_for_number(self, timeout=8, commands=None):
         # listens for a number word or digit and returns int or None
+        # commands: {phrase: callable} also accepted meanwhile (each restarts the timeout)
         start = time.time()
         end_time = start + timeout
         while time.time() < end_time:
             txt = self.listen_once(timeout=3, phrase_time_limit=3)
+            if speech is not None and speech.speaking:
+                end_time = max(end_time, time.time() + timeout)   # counted from the end of our prompt
             if not txt:
                 continue
             print("Number-heard:", txt)
-            # try to extract integer
+            action = next((fn for phrase, fn in (commands or {}).items() if phrase in txt), None)
+            if action is not None:
+                action()
+                end_time = time.time() + timeout
+                continue
+            # first digit or number word ("seventeen" is not read as "seven")
             for token in txt.split():
-                if token.isdigit():
-                    return int(token)
-            # attempt to convert number words (one,two,three...)
-            word_to_num = {
-                'one':1,'two':2,'three':3,'four':4,'five':5,'six':6,'seven':7,'eight':8,'nine':9,'ten':10,
-                'eleven':11,'twelve':12,'thirteen':13,'fourteen':14,'fifteen':15,'sixteen':16,'seventeen':17,'eighteen':18,'nineteen':19,'twenty':20
-            }
-            for w,n in word_to_num.items():
-                if w in txt:
+                n = parse_number(token)
+                if n is not None:
                     return n
         return None
 
 # -----------------------
 # Run assistant
 # -----------------------
-def main():
-    # Ensure pyautogui FAILSAFE off (corner mouse won't break)
+def prepare():
+    """
+    Warm start for warm_start.WarmWorker: builds the controller (microphone
+    calibration, overlay) ahead of time and returns a function that runs it.
+    """
     pyautogui.FAILSAFE = False
     controller = VoiceDesktopController()
+    _speech()  # starts the speech thread, which fills the phrase cache in the meantime
+    return lambda heartbeat=None: main(controller, heartbeat)
+
+def main(controller=None, heartbeat=None):
+    # Ensure pyautogui FAILSAFE off (corner mouse won't break)
+    pyautogui.FAILSAFE = False
+    controller = controller or VoiceDesktopController()
+    controller.heartbeat = heartbeat
     try:
         controller.start()
     except Exception as e:
@@ -0,0 +1,412 @@
+# voice_stream.py
+"""
+Streaming speech capture for the voice assistant.
+
+The blocking loop (listen, then recognize, then handle, then listen again)
+loses whatever is said while it is recognizing or speaking. Here a capture
+thread reads the audio source continuously and feeds a voice-activity
+segmenter; every finished phrase is handed to a small recognizer pool while
+capture keeps going, and results come back in the order the phrases were
+spoken.
+
+    source (MicrophoneStream | WavStream) -> EnergyVad -> pool of recognize() -> results in order
+
+WAV files stand in for the microphone when testing:
+
+    python voice_stream.py command1.wav command2.wav --gap 0.5
+    python voice_stream.py session.wav --recognizer sphinx --workers 2
+"""
+
+import threading
+import time
+import wave
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Optional: WebRTC's VAD classifies frames better than plain energy in noise
+try:
+    import webrtcvad
+except ImportError:
+    webrtcvad = None
+
+
+class Segment:
+    """One detected phrase: 16-bit mono PCM plus its position in the stream (seconds)."""
+
+    def __init__(self, index, start, end, pcm, sample_rate):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.pcm = pcm
+        self.sample_rate = sample_rate
+        self.closed_at = time.perf_counter()   # when the segmenter finished it
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    def __repr__(self):
+        return f"Segment({self.index}, {self.start:.2f}-{self.end:.2f}s)"
+
+
+class Result:
+    """Recognition outcome for one Segment. status: recognized / unintelligible / error."""
+
+    def __init__(self, segment, text="", error=None, started=0.0, recognition_seconds=0.0):
+        self.segment = segment
+        self.text = text
+        self.error = error
+        self.started = started
+        self.recognition_seconds = recognition_seconds
+        self.latency = time.perf_counter() - segment.closed_at   # end of phrase -> result
+
+    @property
+    def status(self):
+        if self.error is not None:
+            return "error"
+        return "recognized" if self.text else "unintelligible"
+
+
+# -----------------------------
+# Audio sources
+# -----------------------------
+def read_wav(path):
+    """Samples (int16, mixed down to mono) and sample rate of a 16-bit WAV file."""
+    with wave.open(path, "rb") as w:
+        if w.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit WAV is supported")
+        samples = np.frombuffer(w.readframes(w.getnframes()), dtype="<i2")
+        channels = w.getnchannels()
+        sample_rate = w.getframerate()
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return samples, sample_rate
+
+
+class WavStream:
+    """
+    Reads 16-bit WAV files one chunk at a time, like a microphone would
+    deliver them. Several files play back to back with `gap` seconds of
+    silence in between; realtime=True paces reads at the audio rate.
+    read() returns bytes, or None at the end.
+    """
+
+    def __init__(self, paths, chunk_ms=30, realtime=False, gap=0.0):
+        self.paths = [paths] if isinstance(paths, str) else list(paths)
+        self.realtime = realtime
+        self.gap = gap
+        with wave.open(self.paths[0], "rb") as w:
+            self.sample_rate = w.getframerate()
+        self.sample_width = 2
+        self.chunk = max(1, self.sample_rate * chunk_ms // 1000)
+        self._pcm = self._load()
+        self._pos = 0
+        self._t0 = None
+
+    def _load(self):
+        parts = []
+        silence = np.zeros(int(self.gap * self.sample_rate), dtype=np.int16)
+        for i, path in enumerate(self.paths):
+            samples, sample_rate = read_wav(path)
+            if sample_rate != self.sample_rate:
+                raise ValueError(f"{path}: sample rate {sample_rate} != {self.sample_rate}")
+            if i:
+                parts.append(silence)
+            parts.append(samples)
+        return np.concatenate(parts).tobytes()
+
+    def read(self):
+        if self._pos >= len(self._pcm):
+            return None
+        n = self.chunk * self.sample_width
+        data = self._pcm[self._pos:self._pos + n]
+        self._pos += n
+        if self.realtime:
+            if self._t0 is None:
+                self._t0 = time.perf_counter()
+            due = self._t0 + self._pos / (self.sample_rate * self.sample_width)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        return data
+
+    def close(self):
+        pass
+
+
+class MicrophoneStream:
+    """A speech_recognition.Microphone kept open and read chunk by chunk."""
+
+    def __init__(self, microphone=None, chunk_ms=30):
+        import speech_recognition as sr
+        self.microphone = microphone or sr.Microphone(sample_rate=16000)
+        self.source = self.microphone.__enter__()
+        self.sample_rate = self.source.SAMPLE_RATE
+        self.sample_width = self.source.SAMPLE_WIDTH
+        if self.sample_width != 2:
+            self.close()
+            raise ValueError(f"Microphone delivers {8 * self.sample_width}-bit audio; 16-bit needed")
+        self.chunk = max(1, self.sample_rate * chunk_ms // 1000)
+
+    def read(self):
+        return self.source.stream.read(self.chunk)
+
+    def close(self):
+        if self.source is not None:
+            self.microphone.__exit__(None, None, None)
+            self.source = None
+
+
+# -----------------------------
+# Voice activity segmentation
+# -----------------------------
+class EnergyVad:
+    """
+    Splits a PCM stream into phrases. Each frame_ms frame is voiced if its RMS
+    is above max(threshold, noise_floor * ratio) (or, with aggressiveness set
+    and webrtcvad installed, if WebRTC's VAD says so); the noise floor tracks
+    unvoiced frames. A phrase starts after start_ms of voiced frames (and
+    keeps pre_roll_ms of audio before that), ends after end_ms of silence or
+    at max_phrase seconds, and is dropped if shorter than min_ms. Only tail_ms
+    of the closing silence is kept, so recognizers get less dead audio.
+    feed(pcm) returns the phrases finished by that chunk; flush() ends the last one.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=30, threshold=300.0, ratio=3.0,
+                 start_ms=90, end_ms=600, pre_roll_ms=300, min_ms=250, tail_ms=200, max_phrase=8.0,
+                 aggressiveness=None):
+        self.sample_rate = sample_rate
+        self.frame_bytes = 2 * sample_rate * frame_ms // 1000
+        self.frame_s = frame_ms / 1000.0
+        self.threshold = threshold
+        self.ratio = ratio
+        self.noise = None
+        self.start_frames = max(1, start_ms // frame_ms)
+        self.end_frames = max(1, end_ms // frame_ms)
+        self.min_frames = max(1, min_ms // frame_ms)
+        self.tail_frames = tail_ms // frame_ms
+        self.max_frames = max(1, int(max_phrase / self.frame_s))
+        self._pre_roll = deque(maxlen=max(self.start_frames, pre_roll_ms // frame_ms))
+        self._webrtc = None
+        if aggressiveness is not None and webrtcvad is not None:
+            self._webrtc = webrtcvad.Vad(aggressiveness)
+        self._pending = b""
+        self._frames = None       # frames of the phrase in progress
+        self._voiced_run = 0
+        self._silence = 0
+        self._t = 0.0             # stream time of the next frame
+        self._start = 0.0
+        self.segments = 0
+
+    def _voiced(self, frame):
+        if self._webrtc is not None:
+            return self._webrtc.is_speech(frame, self.sample_rate)
+        samples = np.frombuffer(frame, dtype="<i2").astype(np.float32)
+        rms = float(np.sqrt(np.mean(samples * samples)))
+        limit = max(self.threshold, (self.noise or 0.0) * self.ratio)
+        voiced = rms > limit
+        if not voiced:
+            self.noise = rms if self.noise is None else 0.95 * self.noise + 0.05 * rms
+        return voiced
+
+    def feed(self, pcm):
+        done = []
+        data = self._pending + pcm
+        n = self.frame_bytes
+        end = len(data) - len(data) % n
+        for i in range(0, end, n):
+            segment = self._frame(data[i:i + n])
+            if segment is not None:
+                done.append(segment)
+        self._pending = data[end:]
+        return done
+
+    def _frame(self, frame):
+        voiced = self._voiced(frame)
+        t = self._t
+        self._t += self.frame_s
+        if self._frames is None:
+            self._pre_roll.append(frame)
+            self._voiced_run = self._voiced_run + 1 if voiced else 0
+            if self._voiced_run >= self.start_frames:
+                self._frames = list(self._pre_roll)
+                self._start = t + self.frame_s - len(self._frames) * self.frame_s
+                self._pre_roll.clear()
+                self._silence = 0
+            return None
+        self._frames.append(frame)
+        self._silence = 0 if voiced else self._silence + 1
+        if self._silence >= self.end_frames or len(self._frames) >= self.max_frames:
+            return self._close()
+        return None
+
+    def _close(self):
+        frames = self._frames
+        self._frames = None
+        self._voiced_run = 0
+        if len(frames) - self._silence < self.min_frames:
+            return None
+        trim = max(0, self._silence - self.tail_frames)
+        if trim:
+            frames = frames[:-trim]
+        segment = Segment(self.segments, self._start, self._start + len(frames) * self.frame_s,
+                          b"".join(frames), self.sample_rate)
+        self.segments += 1
+        return segment
+
+    def flush(self):
+        return self._close() if self._frames is not None else None
+
+
+# -----------------------------
+# Capture + recognition pipeline
+# -----------------------------
+class StreamingRecognizer:
+    """
+    Runs `source` through `vad` on a capture thread and recognize(segment) on
+    a pool of `workers` threads. recognize returns the text ("" if nothing was
+    understood) and may raise. Results are delivered in phrase order by
+    next_result() / results(). If more than max_pending phrases are waiting
+    for recognition, new ones are dropped (counted in `dropped`) so capture
+    never blocks.
+    """
+
+    def __init__(self, source, recognize, workers=2, vad=None, max_pending=8):
+        self.source = source
+        self.recognize = recognize
+        self.vad = vad or EnergyVad(source.sample_rate)
+        self.max_pending = max_pending
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="voice-recognize")
+        self._order = deque()             # futures in phrase order
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._capture_done = False
+        self.dropped = 0
+        self.error = None
+        self._thread = threading.Thread(target=self._capture, name="voice-capture", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _capture(self):
+        try:
+            while not self._stop.is_set():
+                pcm = self.source.read()
+                if pcm is None:
+                    break
+                for segment in self.vad.feed(pcm):
+                    self._submit(segment)
+            segment = self.vad.flush()
+            if segment is not None:
+                self._submit(segment)
+        except Exception as e:
+            self.error = e
+            print(f"[ERROR] Audio capture stopped: {e}")
+        finally:
+            with self._cond:
+                self._capture_done = True
+                self._cond.notify_all()
+
+    def _submit(self, segment):
+        with self._cond:
+            if sum(1 for f in self._order if not f.done()) >= self.max_pending:
+                self.dropped += 1
+                return
+            future = self.pool.submit(self._run, segment)
+            future.add_done_callback(self._notify)
+            self._order.append(future)
+            self._cond.notify_all()
+
+    def _notify(self, future):
+        with self._cond:
+            self._cond.notify_all()
+
+    def _run(self, segment):
+        started = time.perf_counter()
+        try:
+            text = self.recognize(segment) or ""
+            return Result(segment, text, None, started, time.perf_counter() - started)
+        except Exception as e:
+            return Result(segment, "", e, started, time.perf_counter() - started)
+
+    def next_result(self, timeout=None):
+        """
+        The next phrase's Result, waiting up to `timeout` seconds for it to be
+        spoken and recognized; None on timeout or once the stream has ended.
+        """
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        with self._cond:
+            while True:
+                if self._order and self._order[0].done():
+                    return self._order.popleft().result()
+                if not self._order and self._capture_done:
+                    return None
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def results(self):
+        """Yields every Result in phrase order until the source ends."""
+        while True:
+            result = self.next_result()
+            if result is None:
+                return
+            yield result
+
+    @property
+    def finished(self):
+        with self._cond:
+            return self._capture_done and not self._order
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=2.0)
+        self.source.close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+# -----------------------------
+# Run on WAV files
+# -----------------------------
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Segment and recognize WAV files as a live stream")
+    parser.add_argument("wav", nargs="+", help="16-bit WAV files, played back to back")
+    parser.add_argument("--gap", type=float, default=0.5, help="seconds of silence between files")
+    parser.add_argument("--realtime", action="store_true", help="feed audio at its real rate")
+    parser.add_argument("--workers", type=int, default=2, help="parallel recognitions")
+    parser.add_argument("--recognizer", choices=["none", "offline", "google", "sphinx"], default="none",
+                        help="speech_recognition engine (none: only segment)")
+    args = parser.parse_args()
+
+    if args.recognizer == "none":
+        recognize = lambda segment: f"<{segment.duration:.2f}s of speech>"
+    elif args.recognizer == "offline":
+        from voice_grammar import GrammarRecognizer
+        grammar = GrammarRecognizer()
+        recognize = lambda segment: grammar.recognize(segment.pcm, segment.sample_rate)
+    else:
+        import speech_recognition as sr
+        engine = sr.Recognizer()
+        method = engine.recognize_google if args.recognizer == "google" else engine.recognize_sphinx
+
+        def recognize(segment):
+            try:
+                return method(sr.AudioData(segment.pcm, segment.sample_rate, 2)).lower()
+            except sr.UnknownValueError:
+                return ""
+
+    source = WavStream(args.wav, realtime=args.realtime, gap=args.gap)
+    stream = StreamingRecognizer(source, recognize, workers=args.workers).start()
+    start = time.perf_counter()
+    for result in stream.results():
+        seg = result.segment
+        print(f"[INFO] #{seg.index} {seg.start:6.2f}-{seg.end:6.2f}s {result.status:<14} "
+              f"recognition {1000 * result.recognition_seconds:.0f} ms, "
+              f"phrase end -> result {1000 * result.latency:.0f} ms: {result.text or result.error}")
+    stream.stop()
+    print(f"[INFO] {stream.vad.segments} phrases in {time.perf_counter() - start:.2f}s, {stream.dropped} dropped.")
@@ -0,0 +1,188 @@
+# warm_start.py
+"""
+Pre-warmed module workers and startup-phase timing.
+
+main.py starts a WarmWorker per module while the launch menu is still on
+screen. Each worker imports its module and calls the module's prepare()
+(which loads models, opens devices, etc. and returns the function that runs
+the module), then blocks on a pipe. The LAUNCH pinch only sends "go" (or
+"stop" to modules that were not picked), so the selected modules start
+without paying for a fresh interpreter, the cv2/mediapipe/pyautogui imports
+and model loading after the menu closes.
+
+Every worker reports how long each startup phase took:
+
+    [INFO] Gesture startup: spawn 310 ms | import 1830 ms | prepare 940 ms | total 3080 ms
+    [INFO] Gesture go -> running in 2 ms (waited 5.4 s warm)
+"""
+
+import importlib
+import time
+from contextlib import contextmanager
+from multiprocessing import Pipe, Process
+
+import metrics
+
+# How long go() waits for a worker that is still warming up before giving up
+# on it, so a hung prepare() (a camera that never opens, a stuck model load)
+# cannot hold the launch back; the module is then started cold instead
+READY_TIMEOUT = 20.0
+
+
+# -----------------------------
+# Phase timing
+# -----------------------------
+class StartupTimer:
+    """Durations of named startup phases, in the order they ran."""
+
+    def __init__(self, name, start=None):
+        """start: time.time() the process was asked to start (phases before
+        this process ran, such as interpreter spawn, count from there)."""
+        self.name = name
+        self.phases = []
+        self.started = time.time() if start is None else start
+        self._last = self.started
+
+    def mark(self, phase):
+        """Ends the current phase (running since the previous mark) as `phase`."""
+        now = time.time()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+        return now - self.started
+
+    @contextmanager
+    def phase(self, phase):
+        self._last = time.time()
+        try:
+            yield
+        finally:
+            self.mark(phase)
+
+    def total(self):
+        return self._last - self.started
+
+    def describe(self):
+        parts = [f"{phase} {1000 * seconds:.0f} ms" for phase, seconds in self.phases]
+        return " | ".join(parts + [f"total {1000 * self.total():.0f} ms"])
+
+    def report(self):
+        print(f"[INFO] {self.name} startup: {self.describe()}")
+
+
+# -----------------------------
+# Warm workers
+# -----------------------------
+def _worker_main(name, module, conn, requested_at, slot=None):
+    timer = StartupTimer(name, requested_at)
+    timer.mark("spawn")
+    metrics.enable_from_env(name.lower())
+    try:
+        with timer.phase("import"):
+            mod = importlib.import_module(module)
+        with timer.phase("prepare"):
+            run = mod.prepare()
+    except Exception as e:
+        print(f"[ERROR] {name} worker failed to warm up: {e}")
+        conn.send(("failed", str(e)))
+        return
+    timer.report()
+    conn.send(("ready", timer.phases))
+
+    ready_at = time.time()
+    try:
+        message = conn.recv()
+    except (EOFError, KeyboardInterrupt):
+        return
+    if message[0] != "go":
+        return
+    _, kwargs, sent_at = message
+    now = time.time()
+    print(f"[INFO] {name} go -> running in {1000 * (now - sent_at):.0f} ms "
+          f"(waited {now - ready_at:.1f} s warm)")
+    conn.close()
+    if slot is not None:
+        from supervisor import Heartbeat
+        kwargs["heartbeat"] = Heartbeat(slot)
+    print(f"[INFO] {name} module started.")
+    try:
+        run(**kwargs)
+    except Exception as e:
+        print(f"[ERROR] {name} module crashed: {e}")
+    finally:
+        metrics.disable()
+
+
+class WarmWorker:
+    """
+    A module process started ahead of time. `module` must define prepare(),
+    which does the slow setup and returns the callable that runs the module;
+    go(**kwargs) calls it with kwargs, stop() makes the worker exit unused.
+    slot: optional supervisor.HealthSlot; the callable then also gets
+    heartbeat=Heartbeat(slot). ready_timeout: how long go() waits for
+    warm-up to finish.
+    """
+
+    def __init__(self, name, module, slot=None, ready_timeout=READY_TIMEOUT):
+        self.name = name
+        self.module = module
+        self.slot = slot
+        self.ready_timeout = ready_timeout
+        self.state = "starting"
+        self.phases = None
+        self._conn, child = Pipe()
+        self.process = Process(target=_worker_main, name=f"{name.lower()}-worker",
+                               args=(name, module, child, time.time(), slot), daemon=False)
+        self.process.start()
+        child.close()
+
+    def poll(self, timeout=0.0):
+        """Picks up the worker's ready/failed message; returns the current state."""
+        if self.state == "starting" and self._conn.poll(timeout):
+            try:
+                message = self._conn.recv()
+            except EOFError:
+                self.state = "failed"
+                return self.state
+            self.state = message[0]
+            if self.state == "ready":
+                self.phases = message[1]
+        if self.state == "starting" and not self.process.is_alive():
+            self.state = "failed"
+        return self.state
+
+    def wait_ready(self, timeout=None):
+        """Blocks until the worker is ready (True) or failed/timed out (False)."""
+        deadline = None if timeout is None else time.time() + timeout
+        while self.poll(0.05) == "starting":
+            if deadline is not None and time.time() >= deadline:
+                return False
+        return self.state == "ready"
+
+    def go(self, **kwargs):
+        """
+        Starts the module, waiting up to ready_timeout for warm-up to finish
+        first. False if the worker failed or did not get ready in time; it is
+        then stopped and the caller starts the module cold.
+        """
+        if not self.wait_ready(self.ready_timeout):
+            if self.state == "starting":
+                print(f"[WARNING] {self.name} worker not ready after {self.ready_timeout:.0f} s; "
+                      f"starting it cold.")
+            self.stop(timeout=0)   # stuck in prepare(), it would not read "stop"
+            return False
+        self._conn.send(("go", kwargs, time.time()))
+        self.state = "running"
+        return True
+
+    def stop(self, timeout=2.0):
+        """Tells an unused worker to exit (terminating it if still warming up)."""
+        if self.state in ("starting", "ready"):
+            try:
+                self._conn.send(("stop",))
+            except (BrokenPipeError, OSError):
+                pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.state = "stopped"